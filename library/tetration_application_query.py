@@ -197,13 +197,14 @@ def run_module():
                 continue
             if module.params['is_enforcing'] is not None and module.params['is_enforcing'] != app['enforement_enabled']:
                 continue
+            result['objects'].append(app)
 
-            if module.params['return_details']:
-                route = f"{TETRATION_API_APPLICATIONS}/{app['id']}/details"
-                details = tet_module.run_method('GET', route)
-                result['objects'].append(details)
-            else:
-                result['objects'].append(app)
+        if module.params['return_details']:
+            # the details of every app are independent, fetch them concurrently
+            result['objects'] = tet_module.gather([
+                ('GET', f"{TETRATION_API_APPLICATIONS}/{app['id']}/details")
+                for app in result['objects']
+            ])
 
         result['items_found'] = len(result['objects'])
         if result['objects']:
@@ -262,6 +262,8 @@ from ansible.module_utils.tetration_constants import TETRATION_API_SCOPES
 from ansible.module_utils.tetration_constants import TETRATION_API_INVENTORY_FILTER
 from ansible.module_utils.tetration_constants import TETRATION_PROVIDER_SPEC
 from ansible.module_utils.tetration import TetrationApiModule
+from ansible.module_utils.tetration import diff_objects
+from ansible.module_utils.tetration import values_equal
 
 
 def run_module():
@@ -354,26 +356,19 @@ def run_module():
             route = f"{TETRATION_API_INVENTORY_FILTER}/{inv_filter_to_update}"
             response = tet_module.run_method('GET', route)
 
-            req_payload = {
-                'name': None,
-                'query': {},
-                'app_scope_id': None,
-                'primary': None,
-                'public': None
+            desired_state = {
+                'name': module.params['name'],
+                'app_scope_id': module.params['app_scope_id'],
+                'primary': module.params['primary'],
+                'public': module.params['public']
             }
+            desired_state = {k: v for k, v in desired_state.items() if v is not None}
 
-            # Updating the Update Object
-            payload_keys = [k for k in req_payload.keys()]
-            for key in payload_keys:
-                if module.params.get(key) is not None and module.params[key] != response[key]:
-                    req_payload[key] = module.params[key]
-                elif key == 'query':
-                    if extracted_query_filter and extracted_query_filter != response['short_query']:
-                        req_payload[key] = extracted_query_filter
-                    else:
-                        req_payload.pop(key)
-                else:
-                    req_payload.pop(key)
+            # Only send the fields that changed.  The filter is sent as `query` but
+            # read back as `short_query`, as `query` also holds the query of the scope.
+            req_payload = diff_objects(desired_state, response)
+            if extracted_query_filter and not values_equal(extracted_query_filter, response.get('short_query')):
+                req_payload['query'] = extracted_query_filter
 
             if req_payload:
                 update_response = tet_module.run_method('PUT', route, req_payload=req_payload)
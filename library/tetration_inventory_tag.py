@@ -41,6 +41,16 @@ options:
     description: Add, change, delete columns from Tetration user annotations
     required: true
     type: string
+  items:
+    description:
+    - List of addresses or subnets to annotate in one task instead of using C(loop).
+      Each item is a dict of the options above, and the options given next
+      to C(items) apply to every item that does not set them
+    - The items share one connection, and up to C(concurrency) items run at
+      the same time
+    - The result of every item is returned in C(results), like with C(loop)
+    type: list
+    elements: dict
 
 
 extends_documentation_fragment: tetration_doc_common
@@ -119,6 +129,22 @@ EXAMPLES = '''
       host: "https://tetration-cluster.company.com"
       api_key: 1234567890QWERTY
       api_secret: 1234567890QWERTY
+
+# Annotate many addresses in one task
+- tetration_inventory_tag:
+    root_scope_name: Default
+    state: present
+    items:
+    - ip_address: 10.0.0.1
+      attributes:
+        Application: Web
+    - ip_address: 10.0.0.2
+      attributes:
+        Application: Database
+    provider:
+      api_key: 1234567890QWERTY
+      api_secret: 1234567890QWERTY
+      server_endpoint: https://tetration-cluster.company.com
 '''
 
 RETURN = '''
@@ -138,6 +164,7 @@ from ipaddress import ip_address, ip_network
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.tetration import TetrationApiModule
+from ansible.module_utils.tetration import item_argument_spec
 from ansible.module_utils.tetration_constants import TETRATION_API_INVENTORY_TAG
 from ansible.module_utils.tetration_constants import TETRATION_PROVIDER_SPEC
 
@@ -155,8 +182,16 @@ def main():
         provider=dict(type='dict', options=TETRATION_PROVIDER_SPEC)
     )
 
+    # The options may also come from `items`, they are validated per item
     module = AnsibleModule(
-        argument_spec=module_args,
+        argument_spec=item_argument_spec(module_args)
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    tet_module.run_items(
+        module_args,
+        run_tag,
         required_one_of=[
             ['ip_address', 'ip_subnet']
         ],
@@ -168,6 +203,9 @@ def main():
         ]
     )
 
+
+def run_tag(module, tet_module):
+    ''' Manages the annotations of the address or subnet of one task or of one of its items '''
     ip_object = ''
 
     # Verify a valid IP address was passed in
@@ -190,8 +228,6 @@ def main():
     if module.params['state'] == 'absent' and module.params['attributes'] is not None:
         module.fail_json(msg='attributes cannot be passed for state `absent` because all attributes are cleared')
 
-    tet_module = TetrationApiModule(module)
-
     # These are all elements we put in our return JSON object for clarity
     result = {
         "object": None,
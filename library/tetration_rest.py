@@ -122,13 +122,14 @@ object:
   returned: always
   type: complex
 '''
-import json
-
 from ansible.module_utils.basic import AnsibleModule
 
 from ansible.module_utils.tetration_constants import TETRATION_PROVIDER_SPEC
 from ansible.module_utils.tetration_constants import TETRATION_API_SUCCESS_CODES
 from ansible.module_utils.tetration import RestClient
+from ansible.module_utils.tetration import JsonCodec
+from ansible.module_utils.tetration import ResponseCache
+from ansible.module_utils.tetration import metrics_enabled
 
 
 def main():
@@ -148,13 +149,37 @@ def main():
     api_route = '/openapi/' + \
         module.params['provider']['api_version'] + '/' + module.params['route']
     req_payload = module.params['payload']
+    try:
+        codec = JsonCodec(module.params['provider']['json_codec'])
+    except ValueError as exc:
+        module.fail_json(msg=str(exc))
 
     restclient = RestClient(
         module.params['provider']['server_endpoint'],
         api_key=module.params['provider']['api_key'],
         api_secret=module.params['provider']['api_secret'],
         verify=module.params['provider']['verify'],
-        max_retries=module.params['provider']['max_retries']
+        max_retries=module.params['provider']['max_retries'],
+        timeout=module.params['provider']['timeout'],
+        connect_timeout=module.params['provider']['connect_timeout'],
+        adaptive_timeout=module.params['provider']['adaptive_timeout'],
+        deadline=module.params['provider']['deadline'],
+        retry_backoff=module.params['provider']['retry_backoff'],
+        retry_base_delay=module.params['provider']['retry_base_delay'],
+        retry_max_delay=module.params['provider']['retry_max_delay'],
+        retry_budget=module.params['provider']['retry_budget'],
+        rate_limit=module.params['provider']['rate_limit'],
+        rate_limit_burst=module.params['provider']['rate_limit_burst'],
+        rate_limit_file=module.params['provider']['rate_limit_file'],
+        pool_connections=module.params['provider']['pool_connections'],
+        pool_maxsize=module.params['provider']['pool_maxsize'],
+        pool_block=module.params['provider']['pool_block'],
+        keep_alive=module.params['provider']['keep_alive'],
+        tcp_keepalive=module.params['provider']['tcp_keepalive'],
+        compression=module.params['provider']['compression'],
+        compress_requests=module.params['provider']['compress_requests'],
+        metrics=metrics_enabled(module.params['provider']),
+        conditional_get=module.params['provider']['conditional_get']
     )
 
     # Do our best to provide "changed" status accurately, but it's not possible
@@ -167,15 +192,25 @@ def main():
         response = restclient.delete(api_route)
         changed = True if response.status_code in TETRATION_API_SUCCESS_CODES else False
     elif method == 'post':
-        response = restclient.post(api_route, json_body=json.dumps(req_payload))
+        response = restclient.post(api_route, json_body=codec.dumps(req_payload))
         changed = True if response.status_code in TETRATION_API_SUCCESS_CODES else False
     elif method == 'put':
-        response = restclient.put(api_route, json_body=json.dumps(req_payload))
+        response = restclient.put(api_route, json_body=codec.dumps(req_payload))
         changed = True if response.status_code in TETRATION_API_SUCCESS_CODES else False
     else:
         response = None
         module.fail_json(msg='Unsupported HTTP Verb, only supported Methods are get, delete, post, and put')
 
+    # Drop the cached copies of the collections this call may have changed
+    if changed and float(module.params['provider']['cache_ttl'] or 0) > 0:
+        ResponseCache(
+            module.params['provider']['cache_dir'] or ResponseCache.default_cache_dir(),
+            module.params['provider']['cache_ttl'],
+            module.params['provider']['server_endpoint'],
+            module.params['provider']['api_key'],
+            uri_prefix='/openapi/' + module.params['provider']['api_version']
+        ).invalidate(api_route)
+
     # Put status_code in the return JSON. If the status_code is not 200, we
     # add the text that came from the REST call and the payload to make
     # debugging easier.
@@ -184,10 +219,13 @@ def main():
     result['ok'] = response.ok
     result['reason'] = response.reason
     if response.status_code in TETRATION_API_SUCCESS_CODES:
-        result['json'] = response.json()
+        result['json'] = codec.response_json(response)
     else:
         result['text'] = response.text
 
+    result['tetration_stats'] = restclient.get_stats()
+    if restclient.metrics is not None:
+        result['tetration_metrics'] = restclient.get_metrics()
     module.exit_json(changed=changed, **result)
 
 
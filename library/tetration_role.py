@@ -204,14 +204,20 @@ def run_module():
 
     tet_module = TetrationApiModule(module)
 
+    # Both lookup tables are independent, download them at the same time
+    (all_app_scopes_response, all_roles_response), errors = tet_module.run_batch([
+        ('GET', TETRATION_API_SCOPES),
+        ('GET', TETRATION_API_ROLE),
+    ])
+    if errors:
+        module.fail_json(msg=errors[0]['msg'], errors=errors)
+
     # Create an App Scope Name to ID Lookup Table
-    all_app_scopes_response = tet_module.run_method('GET', TETRATION_API_SCOPES)
     all_app_scopes_lookup = {r['name']: r['id'] for r in all_app_scopes_response}
 
     # Create a Role Name - App Scope ID to Role ID Lookup Table
     # A role is uniquely identified by its name and app scope
     # Create a dict of tuples, key to look up an ID
-    all_roles_response = tet_module.run_method('GET', TETRATION_API_ROLE)
     all_roles_lookup_by_name_app_id = {(r['name'], r['app_scope_id']): r['id'] for r in all_roles_response}
 
     # Role and App Scope Validation
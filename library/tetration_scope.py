@@ -251,6 +251,7 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.tetration_constants import TETRATION_API_SCOPES
 from ansible.module_utils.tetration_constants import TETRATION_PROVIDER_SPEC
 from ansible.module_utils.tetration import TetrationApiModule
+from ansible.module_utils.tetration import diff_objects
 
 
 def run_module():
@@ -357,25 +358,18 @@ def run_module():
             route = f"{TETRATION_API_SCOPES}/{scope_id_to_update}"
             response = tet_module.run_method('GET', route)
 
-            req_payload = {
-                'short_name': None,
-                'short_query': {},
-                'description': None,
-                'parent_app_scope_id': None,
-                'policy_priority': None
+            desired_state = {
+                'short_name': module.params['short_name'],
+                'short_query': extracted_query_filter or None,
+                'description': module.params['description'],
+                'parent_app_scope_id': module.params['parent_app_scope_id'],
+                'policy_priority': module.params['policy_priority']
             }
+            desired_state = {k: v for k, v in desired_state.items() if v is not None}
 
-            payload_keys = [k for k in req_payload.keys()]
-            for key in payload_keys:
-                if module.params.get(key) is not None and module.params[key] != response[key]:
-                    req_payload[key] = module.params[key]
-                elif key == 'short_query':
-                    if extracted_query_filter and extracted_query_filter != response['short_query']:
-                        req_payload[key] = extracted_query_filter
-                    else:
-                        req_payload.pop(key)
-                else:
-                    req_payload.pop(key)
+            # Only send the fields that changed, the query is compared regardless of
+            # the order of its filters
+            req_payload = diff_objects(desired_state, response)
 
             # Updating the Update Object
             if req_payload:
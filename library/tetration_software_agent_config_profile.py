@@ -565,6 +565,7 @@ object:
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.tetration import TetrationApiModule
+from ansible.module_utils.tetration import diff_objects
 from ansible.module_utils.tetration_constants import TETRATION_API_SCOPES
 from ansible.module_utils.tetration_constants import TETRATION_API_AGENT_CONFIG_PROFILES
 from ansible.module_utils.tetration_constants import TETRATION_PROVIDER_SPEC
@@ -754,13 +755,14 @@ def main():
         new_object = {k: v for k, v in new_object.items() if v is not None}
 
         if existing_profile:
-            if tet_module.is_subset(new_object, existing_profile):
+            req_payload = diff_objects(new_object, existing_profile)
+            if not req_payload:
                 # If there is no change required to the module
                 result['object'] = existing_profile
             else:
-                # A change is required
+                # A change is required, only send the fields that changed
                 route = f"{TETRATION_API_AGENT_CONFIG_PROFILES}/{existing_profile['id']}"
-                result['object'] = tet_module.run_method('PUT', route, req_payload=new_object)
+                result['object'] = tet_module.run_method('PUT', route, req_payload=req_payload)
                 result['changed'] = True
         else:
             result['object'] = tet_module.run_method('POST', TETRATION_API_AGENT_CONFIG_PROFILES, req_payload=new_object)
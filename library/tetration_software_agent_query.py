@@ -40,6 +40,11 @@ options:
     - Does not have to be an exact, can put in an IP and the subnet and will convert to the appropriate network
     - See examples for exact format
     type: string
+  max_results:
+    description:
+    - Stops searching once this many matching software agents are found
+    - Pages of the inventory past the last match needed are never downloaded
+    type: int
 
 extends_documentation_fragment: tetration_doc_common
 
@@ -105,6 +110,15 @@ tetration_software_agent_query:
       api_key: 1234567890QWERTY
       api_secret: 1234567890QWERTY
 
+# Find the first agent with a name, without reading the rest of the inventory
+tetration_software_agent_query:
+    host_name_is_exactly: student-867-0
+    max_results: 1
+    provider:
+      host: "https://tetration-cluster.company.com"
+      api_key: 1234567890QWERTY
+      api_secret: 1234567890QWERTY
+
 # Find agents in an IPv6 network
 tetration_software_agent_query:
     interface_ip_in_network: 'fe80::4001:aff:fe8a:e/96'
@@ -208,6 +222,7 @@ items_found:
 '''
 
 import ipaddress
+import itertools
 
 from ansible.module_utils.basic import AnsibleModule
 
@@ -223,6 +238,7 @@ def run_module():
         host_name_is_exactly=dict(type='str'),
         interface_ip_is_exactly=dict(type='str'),
         interface_ip_in_network=dict(type='str'),
+        max_results=dict(type='int'),
         provider=dict(type='dict', options=TETRATION_PROVIDER_SPEC)
     )
 
@@ -239,6 +255,9 @@ def run_module():
 
     tet_module = TetrationApiModule(module)
 
+    if module.params['max_results'] is not None and module.params['max_results'] < 1:
+        module.fail_json(msg='max_results must be 1 or more')
+
     # Verify a valid IP address was passed in
     if module.params['interface_ip_is_exactly']:
         try:
@@ -256,49 +275,47 @@ def run_module():
             error_message = f"Invalid IPv4 or IPv6 Network entered.  Value entered: {module.params['interface_ip_in_network']}"
             module.fail_json(msg=error_message)
 
-    response = tet_module.run_method_paginated('GET', TETRATION_API_SENSORS)
-
-    for s in response:
-        if 'deleted_at' not in s.keys():
-            to_append = s
-            if module.params['host_name_contains'] and module.params['host_name_contains'] not in s['host_name']:
-                to_append = None
-                continue
-            if module.params['host_name_is_exactly'] and module.params['host_name_is_exactly'] != s['host_name']:
-                to_append = None
-                continue
-            if module.params['interface_ip_is_exactly']:
-                ip_in_interface = False
-                for i in s['interfaces']:
-                    try:
-                        iface_addr = ipaddress.ip_address(i['ip'])
-                    except ValueError:
-                        iface_addr = None
-                    if iface_addr == ip_to_validate:
-                        ip_in_interface = True
-
-                if not ip_in_interface:
-                    to_append = None
-                    continue
-            if module.params['interface_ip_in_network']:
-                ip_in_network = False
-                for i in s['interfaces']:
-                    try:
-                        iface_addr = ipaddress.ip_address(i['ip'])
-                    except ValueError:
-                        iface_addr = None
-
-                    if iface_addr in network_to_validate:
-                        ip_in_network = True
-                        # Once I find a match, no need to keep searching
-                        break
-
-                if not ip_in_network:
-                    to_append = None
-                    continue
-
-            if to_append is not None:
-                result['object'].append(to_append)
+    def sensor_matches(s):
+        if 'deleted_at' in s.keys():
+            return False
+        if module.params['host_name_contains'] and module.params['host_name_contains'] not in s['host_name']:
+            return False
+        if module.params['host_name_is_exactly'] and module.params['host_name_is_exactly'] != s['host_name']:
+            return False
+        if module.params['interface_ip_is_exactly']:
+            ip_in_interface = False
+            for i in s['interfaces']:
+                try:
+                    iface_addr = ipaddress.ip_address(i['ip'])
+                except ValueError:
+                    iface_addr = None
+                if iface_addr == ip_to_validate:
+                    ip_in_interface = True
+
+            if not ip_in_interface:
+                return False
+        if module.params['interface_ip_in_network']:
+            ip_in_network = False
+            for i in s['interfaces']:
+                try:
+                    iface_addr = ipaddress.ip_address(i['ip'])
+                except ValueError:
+                    iface_addr = None
+
+                if iface_addr in network_to_validate:
+                    ip_in_network = True
+                    # Once I find a match, no need to keep searching
+                    break
+
+            if not ip_in_network:
+                return False
+        return True
+
+    # Sensors are filtered while the pages stream in, so only the matching
+    # ones are ever held in memory, and no more pages are read once
+    # max_results agents have been found
+    matches = (s for s in tet_module.iter_paginated('GET', TETRATION_API_SENSORS) if sensor_matches(s))
+    result['object'] = list(itertools.islice(matches, module.params['max_results']))
 
     result['items_found'] = len(result['object'])
     module.exit_json(**result)
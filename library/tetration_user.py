@@ -69,6 +69,19 @@ options:
         description: Add, change, remove or search for the user
         type: string
         required: true
+    items:
+        description:
+            - List of users to manage in one task instead of using C(loop).
+              Each item is a dict of the options above, and the options
+              given next to C(items) apply to every item that does not set
+              them.
+            - The items share one connection and one download of the scopes
+              and roles, and up to C(concurrency) items run at the same time.
+            - The result of every item is returned in C(results), like
+              with C(loop).
+        type: list
+        elements: dict
+        required: false
 
 extends_documentation_fragment: tetration_doc_common
 
@@ -114,6 +127,13 @@ EXAMPLES = '''
     email: bsmith@example.com
     state: absent
 
+# Onboard many users in one task
+- tetration_user:
+    provider: "{{ my_tetration }}"
+    state: present
+    app_scope_name: Default
+    items: "{{ new_users }}"  # list of dicts with email, first_name, last_name, role_names
+
 '''
 
 RETURN = '''
@@ -172,6 +192,7 @@ from ansible.module_utils.tetration_constants import TETRATION_API_USER
 from ansible.module_utils.tetration_constants import TETRATION_API_ROLE
 from ansible.module_utils.tetration_constants import TETRATION_PROVIDER_SPEC
 from ansible.module_utils.tetration import TetrationApiModule
+from ansible.module_utils.tetration import item_argument_spec
 
 
 def run_module():
@@ -189,6 +210,26 @@ def run_module():
         provider=dict(type='dict', options=TETRATION_PROVIDER_SPEC)
     )
 
+    # Creating the Ansible Module, the options may also come from `items`
+    module = AnsibleModule(
+        argument_spec=item_argument_spec(module_args),
+        supports_check_mode=True
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    tet_module.run_items(
+        module_args,
+        run_user,
+        mutually_exclusive=[
+            ['app_scope_id', 'app_scope_name'],
+            ['role_ids', 'role_names']
+        ]
+    )
+
+
+def run_user(module, tet_module):
+    ''' Manages the user of one task or of one of its items '''
     # Create the objects that will be returned
     result = {
         "object": None,
@@ -206,24 +247,18 @@ def run_module():
         role_ids=[]
     )
 
-    # Creating the Ansible Module
-    module = AnsibleModule(
-        argument_spec=module_args,
-        supports_check_mode=True,
-        mutually_exclusive=[
-            ['app_scope_id', 'app_scope_name'],
-            ['role_ids', 'role_names']
-        ]
-    )
-
-    tet_module = TetrationApiModule(module)
+    # Both lookup tables are independent, download them at the same time
+    (all_app_scopes_response, all_roles_response), errors = tet_module.run_batch([
+        ('GET', TETRATION_API_SCOPES),
+        ('GET', TETRATION_API_ROLE),
+    ])
+    if errors:
+        module.fail_json(msg=errors[0]['msg'], errors=errors)
 
     # Create an App Scope Name to ID Lookup Table
-    all_app_scopes_response = tet_module.run_method('GET', TETRATION_API_SCOPES)
     all_app_scopes_lookup = {r['name'].upper(): r['id'] for r in all_app_scopes_response}
 
     # Create a Role Name to ID Lookup Table
-    all_roles_response = tet_module.run_method('GET', TETRATION_API_ROLE)
     all_roles_lookup = {r['name']: r['id'] for r in all_roles_response}
 
     # Role and App Scope Validation
@@ -416,24 +451,21 @@ def run_module():
                 roles_to_delete = list(current_state.difference(desired_state))
 
             # Set the results equal to what it is currently
-            result_obj['role_ids'] = returned_user_object['role_ids']
+            result_obj['role_ids'] = list(returned_user_object['role_ids'])
 
-            req_payload = {
-                "role_id": None,
-            }
-            for role in roles_to_add:
-                add_role_route = f"{TETRATION_API_USER}/{user_id}/add_role"
-                req_payload['role_id'] = role
-                result_obj['role_ids'].append(role)
-                if not module.check_mode:
-                    method_results = tet_module.run_method('PUT', add_role_route, req_payload=req_payload)
-                result['changed'] = True
+            # Every call changes the role list of the same user, send them one
+            # after another, removals first
             for role in roles_to_delete:
-                req_payload['role_id'] = role
                 result_obj['role_ids'] = [r for r in result_obj['role_ids'] if r != role]
                 remove_role_route = f"{TETRATION_API_USER}/{user_id}/remove_role"
                 if not module.check_mode:
-                    method_results = tet_module.run_method('DELETE', remove_role_route, req_payload=req_payload)
+                    method_results = tet_module.run_method('DELETE', remove_role_route, req_payload={"role_id": role})
+                result['changed'] = True
+            for role in roles_to_add:
+                add_role_route = f"{TETRATION_API_USER}/{user_id}/add_role"
+                result_obj['role_ids'].append(role)
+                if not module.check_mode:
+                    method_results = tet_module.run_method('PUT', add_role_route, req_payload={"role_id": role})
                 result['changed'] = True
 
     if module.params['state'] == 'absent':
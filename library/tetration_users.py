@@ -0,0 +1,357 @@
+#!/usr/bin/python
+
+# MIT License - See LICENSE file in the module
+
+
+ANSIBLE_METADATA = {
+    'metadata_version': '1.1',
+    'status': ['preview'],
+    'supported_by': 'community'
+}
+
+DOCUMENTATION = '''
+---
+module: tetration_users
+
+short_description: Reconciles all the user accounts of Tetration with a list
+
+version_added: '2.9'
+
+description:
+    - "Makes the user accounts of Tetration match a complete list of users in one task."
+    - "The users, roles and scopes are downloaded once and compared with the list on
+      the controller, then only the changes are sent to the cluster, up to
+      C(concurrency) at a time."
+    - "Users are created, renamed, moved to another scope, enabled, disabled, and get
+      roles added and removed."
+    - "Use C(tetration_user) to manage a single user."
+
+options:
+    users:
+        description: Desired user accounts.
+        type: list
+        elements: dict
+        required: true
+        suboptions:
+            email:
+                description: User email address (must be unique within Tetration)
+                type: string
+                required: true
+            first_name:
+                description: User first name, required when the user is created
+                type: string
+            last_name:
+                description: User last name, required when the user is created
+                type: string
+            app_scope_id:
+                description: ID of the user scope. Left unchanged when omitted.
+                    C(app_scope_id) and C(app_scope_name) are mutually exclusive.
+                type: string
+            app_scope_name:
+                description: Name of the root scope in which to place the user.
+                    C(app_scope_id) and C(app_scope_name) are mutually exclusive.
+                type: string
+            role_ids:
+                description: Complete list of role ID's of the user. Roles
+                    not listed are removed. The roles are left unchanged when
+                    both C(role_ids) and C(role_names) are omitted.
+                    C(role_ids) and C(role_names) are mutually exclusive.
+                type: list
+                elements: string
+            role_names:
+                description: Complete list of role names of the user, see C(role_ids).
+                    C(role_ids) and C(role_names) are mutually exclusive.
+                type: list
+                elements: string
+            state:
+                choices: [present, absent]
+                description: Whether the user should be enabled or disabled
+                type: string
+                default: present
+    purge:
+        description: Also disable every enabled user that is not in C(users).
+            Make sure the list includes the user owning the API key.
+        type: bool
+        default: false
+
+extends_documentation_fragment: tetration_doc_common
+
+notes:
+- Requires the `requests` Python module.
+- Supports check mode
+- Set C(rate_limit) in the C(provider) to keep the bursts of changes under
+  the API quota of the cluster.
+
+requirements:
+- requests
+- 'Required API Permission(s): user_role_scope_management'
+'''
+
+EXAMPLES = '''
+# Onboard a list of users, leaving the other accounts alone
+- tetration_users:
+    provider: "{{ my_tetration }}"
+    users:
+    - email: bsmith@example.com
+      first_name: Bob
+      last_name: Smith
+      app_scope_name: Default
+      role_names: [Operators]
+    - email: jdoe@example.com
+      first_name: Jane
+      last_name: Doe
+      app_scope_name: Default
+      role_names: [Operators, Auditors]
+    - email: leaver@example.com
+      state: absent
+
+# Make the enabled accounts exactly the users of a file
+- tetration_users:
+    provider: "{{ my_tetration }}"
+    users: "{{ lookup('file', 'users.json') | from_json }}"
+    purge: true
+'''
+
+RETURN = '''
+created:
+    description: Emails of the users created
+    returned: always
+    type: list
+    sample: ["bsmith@example.com"]
+enabled:
+    description: Emails of the disabled users enabled again
+    returned: always
+    type: list
+updated:
+    description: Emails of the users whose name or scope changed
+    returned: always
+    type: list
+disabled:
+    description: Emails of the users disabled
+    returned: always
+    type: list
+roles_added:
+    description: IDs of the roles added to each existing user, by email
+    returned: always
+    type: dict
+    sample: {"jdoe@example.com": ["5bb7bc06497d4f231c3bd481"]}
+roles_removed:
+    description: IDs of the roles removed from each user, by email
+    returned: always
+    type: dict
+errors:
+    description: Changes the cluster rejected, with the email, the change, the
+        message and the status code
+    returned: failure
+    type: list
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible.module_utils.tetration_constants import TETRATION_API_SCOPES
+from ansible.module_utils.tetration_constants import TETRATION_API_USER
+from ansible.module_utils.tetration_constants import TETRATION_API_ROLE
+from ansible.module_utils.tetration_constants import TETRATION_PROVIDER_SPEC
+from ansible.module_utils.tetration import TetrationApiModule
+from ansible.module_utils.tetration import diff_objects
+
+
+def desired_role_ids(user, roles_lookup):
+    ''' Returns the set of role ids of a desired user, None to leave the roles alone '''
+    if user['role_names'] is not None:
+        return set(roles_lookup[name] for name in user['role_names'])
+    if user['role_ids'] is not None:
+        return set(user['role_ids'])
+    return None
+
+
+def run_module():
+    user_spec = dict(
+        email=dict(type='str', required=True),
+        first_name=dict(type='str'),
+        last_name=dict(type='str'),
+        app_scope_id=dict(type='str'),
+        app_scope_name=dict(type='str'),
+        role_ids=dict(type='list', elements='str'),
+        role_names=dict(type='list', elements='str'),
+        state=dict(type='str', choices=['present', 'absent'], default='present')
+    )
+    module_args = dict(
+        users=dict(type='list', elements='dict', required=True, options=user_spec,
+                   mutually_exclusive=[
+                       ['app_scope_id', 'app_scope_name'],
+                       ['role_ids', 'role_names']
+                   ]),
+        purge=dict(type='bool', default=False),
+        provider=dict(type='dict', options=TETRATION_PROVIDER_SPEC)
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    tet_module = TetrationApiModule(module)
+
+    # Everything is compared locally, download the three collections at once
+    (all_users, all_scopes, all_roles), errors = tet_module.run_batch([
+        ('GET', TETRATION_API_USER, dict(include_disabled='true')),
+        ('GET', TETRATION_API_SCOPES),
+        ('GET', TETRATION_API_ROLE),
+    ])
+    if errors:
+        module.fail_json(msg=errors[0]['msg'], errors=errors)
+
+    scopes_lookup = {s['name'].upper(): s['id'] for s in all_scopes}
+    roles_lookup = {r['name']: r['id'] for r in all_roles}
+    current = {u['email']: u for u in all_users}
+
+    # =========================================================================
+    # Validate the whole list before changing anything
+    desired = {}
+    invalid_parameters = {}
+    for user in module.params['users']:
+        email = user['email']
+        invalid = {}
+        if email in desired:
+            invalid['email'] = 'listed more than once'
+        if user['app_scope_name'] and user['app_scope_name'].upper() not in scopes_lookup:
+            invalid['app_scope_name'] = user['app_scope_name']
+        if user['app_scope_id'] and user['app_scope_id'] not in scopes_lookup.values():
+            invalid['app_scope_id'] = user['app_scope_id']
+        invalid_role_names = [n for n in user['role_names'] or [] if n not in roles_lookup]
+        if invalid_role_names:
+            invalid['role_names'] = invalid_role_names
+        invalid_role_ids = [i for i in user['role_ids'] or [] if i not in roles_lookup.values()]
+        if invalid_role_ids:
+            invalid['role_ids'] = invalid_role_ids
+        if user['state'] == 'present' and email not in current and not all(
+                [user['first_name'], user['last_name']]):
+            invalid['first_name/last_name'] = 'required when creating a user'
+        if invalid:
+            invalid_parameters[email] = invalid
+        desired[email] = user
+
+    if invalid_parameters:
+        error_message = "Check the `invalid parameters` object for the invalid parameters"
+        module.fail_json(msg=error_message, invalid_parameters=invalid_parameters)
+
+    # =========================================================================
+    # Compute the changes with set operations
+    present = set(e for e, u in desired.items() if u['state'] == 'present')
+    existing = set(current)
+    enabled = set(e for e in existing if not current[e].get('disabled_at'))
+
+    to_create = present - existing
+    to_enable = (present & existing) - enabled
+    to_disable = (set(desired) - present) & enabled
+    if module.params['purge']:
+        to_disable |= enabled - set(desired)
+
+    changes = []
+    for email in sorted(to_create):
+        user = desired[email]
+        req_payload = {
+            'email': email,
+            'first_name': user['first_name'],
+            'last_name': user['last_name']
+        }
+        if user['app_scope_name']:
+            req_payload['app_scope_id'] = scopes_lookup[user['app_scope_name'].upper()]
+        elif user['app_scope_id']:
+            req_payload['app_scope_id'] = user['app_scope_id']
+        role_ids = desired_role_ids(user, roles_lookup)
+        if role_ids:
+            req_payload['role_ids'] = sorted(role_ids)
+        changes.append((email, 'create', ('POST', TETRATION_API_USER, None, req_payload)))
+
+    for email in sorted(to_enable):
+        user_id = current[email]['id']
+        changes.append((email, 'enable', ('POST', f'{TETRATION_API_USER}/{user_id}/enable')))
+
+    for email in sorted(present & existing):
+        user = desired[email]
+        user_id = current[email]['id']
+        desired_state = {
+            'first_name': user['first_name'],
+            'last_name': user['last_name'],
+            'app_scope_id': scopes_lookup[user['app_scope_name'].upper()] if user['app_scope_name'] else user['app_scope_id']
+        }
+        desired_state = {k: v for k, v in desired_state.items() if v}
+        req_payload = diff_objects(desired_state, current[email])
+        if req_payload:
+            changes.append((email, 'update', ('PUT', f'{TETRATION_API_USER}/{user_id}', None, req_payload)))
+
+        role_ids = desired_role_ids(user, roles_lookup)
+        if role_ids is None:
+            continue
+        current_role_ids = set(current[email].get('role_ids') or [])
+        for role_id in sorted(current_role_ids - role_ids):
+            changes.append((email, 'remove_role', (
+                'DELETE', f'{TETRATION_API_USER}/{user_id}/remove_role', None, {'role_id': role_id})))
+        for role_id in sorted(role_ids - current_role_ids):
+            changes.append((email, 'add_role', (
+                'PUT', f'{TETRATION_API_USER}/{user_id}/add_role', None, {'role_id': role_id})))
+
+    for email in sorted(to_disable):
+        user_id = current[email]['id']
+        changes.append((email, 'disable', ('DELETE', f'{TETRATION_API_USER}/{user_id}')))
+
+    # =========================================================================
+    # Apply the changes: a user must be enabled before it is updated or its
+    # roles change. Each batch holds at most one change per user, so the
+    # changes of one user are sent in order and those of different users
+    # at the same time.
+    failed = {}
+    if not module.check_mode:
+        not_enabled = set()
+        for phase in (['create', 'enable', 'disable'], ['update', 'remove_role', 'add_role']):
+            queues = {}
+            for index, (email, change, _) in enumerate(changes):
+                if change not in phase:
+                    continue
+                if email in not_enabled:
+                    failed[index] = dict(msg='Not sent, the user could not be enabled', code=None)
+                    continue
+                queues.setdefault(email, []).append(index)
+            while queues:
+                indexes = [queue.pop(0) for queue in queues.values()]
+                queues = {email: queue for email, queue in queues.items() if queue}
+                _, errors = tet_module.run_batch([changes[index][2] for index in indexes])
+                for error in errors:
+                    index = indexes[error['index']]
+                    failed[index] = error
+                    if changes[index][1] == 'enable':
+                        not_enabled.add(changes[index][0])
+
+    applied = [change for index, change in enumerate(changes) if index not in failed]
+
+    result = {
+        'changed': bool(applied),
+        'created': [e for e, c, _ in applied if c == 'create'],
+        'enabled': [e for e, c, _ in applied if c == 'enable'],
+        'updated': [e for e, c, _ in applied if c == 'update'],
+        'disabled': [e for e, c, _ in applied if c == 'disable'],
+        'roles_added': {},
+        'roles_removed': {}
+    }
+    for email, change, call in applied:
+        if change == 'add_role':
+            result['roles_added'].setdefault(email, []).append(call[3]['role_id'])
+        elif change == 'remove_role':
+            result['roles_removed'].setdefault(email, []).append(call[3]['role_id'])
+
+    if failed:
+        result['errors'] = [dict(email=changes[index][0], change=changes[index][1], msg=error['msg'], code=error['code'])
+                            for index, error in sorted(failed.items())]
+        module.fail_json(msg='%d of %d changes failed' % (len(failed), len(changes)), **result)
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
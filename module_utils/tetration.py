@@ -1,22 +1,963 @@
 import os
+import re
 import json
 import requests
 import hmac
 import hashlib
 import base64
+import gzip
+import asyncio
+import codecs
+import copy
+import functools
 import time
+import random
+import socket
+import queue
+import tempfile
+import threading
 import warnings
 
-from datetime import datetime
+from collections import OrderedDict, defaultdict, deque
+from email.utils import parsedate_tz, mktime_tz
 from six.moves.urllib.parse import urljoin
 from ansible.module_utils.six import iteritems
-from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.module_utils.common.validation import (
+    check_mutually_exclusive, check_required_arguments, check_required_if, check_required_one_of,
+    check_required_together, check_type_bool, check_type_dict, check_type_float, check_type_int,
+    check_type_list, check_type_path, check_type_raw, check_type_str)
 from . import tetration_constants
+from . import tetration_turbo
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3 import disable_warnings
+from requests.packages.urllib3.connection import HTTPConnection
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+except ImportError:
+    # ansible before 2.11, see ItemValidator
+    ArgumentSpecValidator = None
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import ujson
+    HAS_UJSON = True
+except ImportError:
+    HAS_UJSON = False
 
 # Disable SSL Warnings
 disable_warnings()
 
+# Path segments that identify a single object rather than a collection.  They
+# are collapsed so that every object of a collection shares one route template.
+_ROUTE_ID_SEGMENT = re.compile(
+    r'^([0-9a-fA-F]{24}|[0-9a-fA-F]{32,64}|'
+    r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|\d+)$')
+
+
+def route_template(uri_path, uri_prefix='/openapi/v1'):
+    '''Returns the route template for a URI path
+
+    Query strings and the OpenAPI prefix are dropped and object identifiers
+    are replaced with `{id}`, e.g. `/openapi/v1/users/5bb7...` becomes
+    `/users/{id}`.
+    '''
+    path = uri_path.split('?', 1)[0]
+    if path.startswith(uri_prefix):
+        path = path[len(uri_prefix):]
+    segments = ['{id}' if _ROUTE_ID_SEGMENT.match(seg) else seg
+                for seg in path.split('/')]
+    return '/'.join(segments) or '/'
+
+
+def routes_overlap(route_a, route_b):
+    '''Returns True when a write to one route template may change what a
+    read of the other returns, i.e. when one is a prefix of the other.
+    '''
+    prefix_a = route_a.rstrip('/') + '/'
+    prefix_b = route_b.rstrip('/') + '/'
+    return route_a == route_b or route_a.startswith(prefix_b) or route_b.startswith(prefix_a)
+
+
+def metrics_enabled(provider):
+    '''Returns True when the provider option metrics or the TETRATION_METRICS
+    environment variable asks for the tetration_metrics result block.
+    '''
+    for value in (provider.get('metrics'), os.environ.get('TETRATION_METRICS')):
+        if value not in (None, '') and boolean(value, strict=False):
+            return True
+    return False
+
+
+def canonical_value(value):
+    '''Returns a hashable form of a JSON value in which the order of list
+    items does not matter and numbers equal their string form, so that
+    `{'filters': [{'value': 80}, {'value': 'a'}]}` and
+    `{'filters': [{'value': 'a'}, {'value': '80'}]}` have the same form.
+    '''
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((to_text(k), canonical_value(v)) for k, v in value.items())))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return ('list', tuple(sorted(canonical_value(v) for v in value)))
+    if value is None or isinstance(value, bool):
+        return ('const', repr(value))
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return ('scalar', to_text(value))
+
+
+def values_equal(value_a, value_b):
+    '''Compares two JSON values recursively, ignoring the order of lists
+    and the difference between a number and its string form.
+    '''
+    if value_a == value_b:
+        return True
+    return canonical_value(value_a) == canonical_value(value_b)
+
+
+def diff_objects(desired, current):
+    '''Returns the items of `desired` whose value differs from `current`,
+    the smallest payload that turns `current` into `desired`.
+
+    Values are compared with values_equal, nested objects and lists are
+    returned whole when anything in them differs. A key missing from
+    `current` compares as None.
+    '''
+    return dict((key, value) for key, value in desired.items()
+                if not values_equal(value, current.get(key)))
+
+
+class ObjectIndex(object):
+    '''
+    Objects of one collection read so far, with hash indexes on the sets of
+    filter keys they were searched by.
+
+    An object matches a filter when every filtered key it has holds the
+    filtered value; objects missing a key, or holding an unhashable value,
+    are kept aside and compared one by one.
+
+    Attributes:
+        objects: list of the objects in the order the server returned them,
+        None in place of the removed ones
+        offset: cursor of the next page to read, None for the first one
+        complete: True once the last page has been read
+    '''
+
+    def __init__(self):
+        self.objects = []
+        self.offset = None
+        self.complete = False
+        self.__indexes = {}
+        self.__positions = {}
+
+    @staticmethod
+    def matches(obj, filter):
+        for k, v in iteritems(filter):
+            if k in obj and obj[k] != v:
+                return False
+        return True
+
+    @staticmethod
+    def __add_to_index(index, keys, position, obj):
+        buckets, others = index
+        try:
+            buckets.setdefault(tuple(obj[k] for k in keys), []).append(position)
+        except (KeyError, TypeError):
+            others.append(position)
+
+    @staticmethod
+    def __remove_from_index(index, keys, position, obj):
+        buckets, others = index
+        try:
+            buckets[tuple(obj[k] for k in keys)].remove(position)
+        except (KeyError, TypeError):
+            others.remove(position)
+
+    def add(self, objects):
+        for obj in objects:
+            obj_id = obj.get('id') if isinstance(obj, dict) else None
+            if obj_id is not None and obj_id in self.__positions:
+                # already known from a write made before this page was read
+                self.replace(obj_id, obj)
+                continue
+            position = len(self.objects)
+            self.objects.append(obj)
+            if obj_id is not None:
+                self.__positions[obj_id] = position
+            for keys, index in iteritems(self.__indexes):
+                self.__add_to_index(index, keys, position, obj)
+
+    def replace(self, obj_id, obj):
+        ''' Replaces the object with id obj_id by obj, removes it when obj is None '''
+        position = self.__positions.get(obj_id)
+        if position is None:
+            return
+        for keys, index in iteritems(self.__indexes):
+            self.__remove_from_index(index, keys, position, self.objects[position])
+        self.objects[position] = obj
+        if obj is None:
+            del self.__positions[obj_id]
+            return
+        for keys, index in iteritems(self.__indexes):
+            self.__add_to_index(index, keys, position, obj)
+
+    def find(self, filter):
+        ''' Returns the positions of the objects read so far matching filter '''
+        keys = tuple(sorted(filter))
+        values = tuple(filter[k] for k in keys)
+        try:
+            hash(values)
+        except TypeError:
+            return [i for i, obj in enumerate(self.objects) if obj is not None and self.matches(obj, filter)]
+        if keys not in self.__indexes:
+            index = ({}, [])
+            for position, obj in enumerate(self.objects):
+                if obj is not None:
+                    self.__add_to_index(index, keys, position, obj)
+            self.__indexes[keys] = index
+        buckets, others = self.__indexes[keys]
+        positions = buckets.get(values, []) + [
+            i for i in others if self.matches(self.objects[i], filter)]
+        return sorted(positions)
+
+
+class ResponseCache(object):
+    '''
+    Cache on the controller of the reference collections (scopes, roles,
+    inventory filters, ...) that most modules download in full, shared by
+    every task and fork using the same endpoint and API key.
+
+    Each collection has a directory of entries (one per set of query
+    parameters) and a lock file holding its generation. Readers take a
+    shared flock, writers an exclusive one. Invalidating a collection bumps
+    the generation and removes its entries; a response fetched before an
+    invalidation is not stored, since its generation no longer matches.
+    Cache failures are never fatal, the request then goes to the cluster.
+
+    Attributes:
+        ttl: Float of seconds an entry stays valid
+        root: String directory holding the entries of one endpoint and key
+        stats: dict of hits, misses and invalidations
+    '''
+
+    def __init__(self, cache_dir, ttl, server_endpoint, api_key, uri_prefix='/openapi/v1', codec=None):
+        self.ttl = float(ttl)
+        key = hashlib.sha256(to_bytes(server_endpoint) + b'\n' + to_bytes(api_key)).hexdigest()
+        self.root = os.path.join(cache_dir, key[:16])
+        self.uri_prefix = uri_prefix
+        self.codec = codec or JsonCodec('json')
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    @staticmethod
+    def default_cache_dir():
+        ''' Returns the cache directory of the controller user, created on first use '''
+        return tetration_turbo.user_tmp_dir('tetration-cache')
+
+    def cacheable(self, target):
+        ''' Returns the collection route of target when its GET is cached '''
+        route = route_template(target, self.uri_prefix)
+        if route in tetration_constants.TETRATION_API_CACHED_ROUTES:
+            return route
+        return None
+
+    def __directory(self, route):
+        return os.path.join(self.root, route.strip('/').replace('/', '__'))
+
+    def __entry(self, route, params):
+        encoded = json.dumps(params or {}, sort_keys=True, default=str).encode('utf-8')
+        return os.path.join(self.__directory(route), hashlib.sha256(encoded).hexdigest()[:32] + '.json')
+
+    def __locked(self, route, mode):
+        directory = self.__directory(route)
+        if not os.path.isdir(directory):
+            old_umask = os.umask(0o077)
+            try:
+                os.makedirs(directory)
+            finally:
+                os.umask(old_umask)
+        fd = os.open(directory + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, mode)
+        return fd
+
+    @staticmethod
+    def __generation(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        try:
+            return int(os.read(fd, 32) or 0)
+        except ValueError:
+            return 0
+
+    def get(self, target, params):
+        '''
+        Looks up the cached GET of target.
+
+        Returns:
+            Tuple of (hit, value, token); token is passed back to put() after
+            a miss, and is None when target is not cached at all
+        '''
+        route = self.cacheable(target)
+        if route is None or not HAS_FCNTL:
+            return False, None, None
+        token = None
+        try:
+            fd = self.__locked(route, fcntl.LOCK_SH)
+            try:
+                token = self.__generation(fd)
+                with open(self.__entry(route, params), 'rb') as entry:
+                    stored = self.codec.loads(entry.read())
+            finally:
+                os.close(fd)
+            fresh = time.time() - stored['stored_at'] <= self.ttl
+        except (EnvironmentError, KeyError, TypeError, ValueError):
+            fresh = False
+        if not fresh:
+            self.stats['misses'] += 1
+            return False, None, token
+        self.stats['hits'] += 1
+        return True, stored['value'], token
+
+    def put(self, target, params, value, token):
+        ''' Stores the GET of target unless the collection changed since get() '''
+        route = self.cacheable(target)
+        if route is None or token is None or not HAS_FCNTL:
+            return
+        try:
+            fd = self.__locked(route, fcntl.LOCK_EX)
+            try:
+                if self.__generation(fd) != token:
+                    return
+                data = to_bytes(self.codec.dumps({'stored_at': time.time(), 'value': value}))
+                temp_fd, temp_path = tempfile.mkstemp(dir=self.__directory(route))
+                try:
+                    with os.fdopen(temp_fd, 'wb') as temp_file:
+                        temp_file.write(data)
+                    os.rename(temp_path, self.__entry(route, params))
+                except EnvironmentError:
+                    os.unlink(temp_path)
+                    raise
+            finally:
+                os.close(fd)
+        except (EnvironmentError, TypeError, ValueError):
+            pass
+
+    def invalidate(self, target):
+        ''' Drops every cached collection a write to target may change '''
+        if not HAS_FCNTL:
+            return
+        written = route_template(target, self.uri_prefix)
+        for route in tetration_constants.TETRATION_API_CACHED_ROUTES:
+            if not routes_overlap(written, route):
+                continue
+            try:
+                fd = self.__locked(route, fcntl.LOCK_EX)
+                try:
+                    generation = self.__generation(fd) + 1
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    os.ftruncate(fd, 0)
+                    os.write(fd, to_bytes(str(generation)))
+                    directory = self.__directory(route)
+                    for name in os.listdir(directory):
+                        os.unlink(os.path.join(directory, name))
+                finally:
+                    os.close(fd)
+                self.stats['invalidations'] += 1
+            except EnvironmentError:
+                pass
+
+
+class TetrationDeadlineExceeded(requests.exceptions.Timeout):
+    ''' Raised when the overall task deadline has been used up '''
+
+
+class TetrationApiError(Exception):
+    '''
+    Raised instead of failing the module when a call of a batch fails, see
+    TetrationApiModule.run_batch.
+
+    Attributes:
+        msg: String error message
+        operation: String method of the failed call
+        code: Int HTTP status code, None when no response was received
+        route: String target of the failed call
+    '''
+
+    def __init__(self, msg, operation=None, code=None, route=None):
+        super(TetrationApiError, self).__init__(msg)
+        self.msg = msg
+        self.operation = operation
+        self.code = code
+        self.route = route
+
+
+class RouteLatencyModel(object):
+    '''
+    Keeps a rolling window of response times for each route template and
+    derives a read timeout from a high percentile of that window.
+
+    The derived timeout never exceeds the configured read timeout, so the
+    model only tightens the budget of routes that are consistently fast and a
+    stalled socket on those routes is detected long before the default
+    timeout would expire.
+    '''
+
+    def __init__(self, window=50, percentile=99, multiplier=3.0,
+                 min_timeout=2.0, min_samples=5):
+        self.window = window
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+
+    def observe(self, route, seconds):
+        self.samples[route].append(seconds)
+
+    def quantile(self, route, percentile=None):
+        ''' Returns the requested percentile for a route, or None without samples '''
+        samples = self.samples.get(route)
+        if not samples:
+            return None
+        percentile = self.percentile if percentile is None else percentile
+        ordered = sorted(samples)
+        index = int(round((len(ordered) - 1) * percentile / 100.0))
+        return ordered[index]
+
+    def timeout_for(self, route, max_timeout):
+        ''' Returns the read timeout to use for the next request on a route '''
+        samples = self.samples.get(route)
+        if not samples or len(samples) < self.min_samples:
+            return max_timeout
+        adaptive = max(self.quantile(route) * self.multiplier, self.min_timeout)
+        return min(adaptive, max_timeout)
+
+
+class RetryPolicy(object):
+    '''
+    Decides how long to sleep before retrying a throttled or failed request.
+
+    Supported backoff curves are `constant`, `linear`, `exponential` (with
+    full jitter) and `decorrelated` (decorrelated jitter). A `Retry-After`
+    header sent by the cluster always takes precedence over the curve.
+    `budget` caps the total number of seconds a single task may sleep
+    between retries, 0 disables the cap.
+    '''
+    BACKOFF_CURVES = ['constant', 'linear', 'exponential', 'decorrelated']
+
+    def __init__(self, backoff='decorrelated', base_delay=1.0, max_delay=30.0,
+                 budget=60.0, jitter=True):
+        if backoff not in self.BACKOFF_CURVES:
+            raise ValueError('retry_backoff must be one of: %s' %
+                             ', '.join(self.BACKOFF_CURVES))
+        self.backoff = backoff
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.budget = float(budget or 0)
+        self.jitter = jitter
+
+    @staticmethod
+    def parse_retry_after(value):
+        ''' Returns the delay in seconds of a Retry-After header value '''
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        parsed = parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(mktime_tz(parsed) - time.time(), 0.0)
+
+    def delay(self, attempt, previous_delay=None, retry_after=None):
+        '''
+        Returns the number of seconds to sleep before the next attempt.
+
+        Args:
+            attempt: Number of the attempt that just failed, starting at 0
+            previous_delay: Float of the previous delay, used by the
+            decorrelated curve
+            retry_after: Value of the Retry-After response header, if any
+        '''
+        server_delay = self.parse_retry_after(retry_after)
+        if server_delay is not None:
+            # Spread the forks that were throttled together over one base
+            # delay so they do not come back at the same instant
+            spread = random.uniform(0, self.base_delay) if self.jitter else 0
+            return server_delay + spread
+
+        if self.backoff == 'constant':
+            delay = self.base_delay
+        elif self.backoff == 'linear':
+            delay = self.base_delay * (attempt + 1)
+        elif self.backoff == 'exponential':
+            delay = self.base_delay * (2 ** attempt)
+            if self.jitter:
+                delay = random.uniform(0, min(delay, self.max_delay))
+        else:
+            previous_delay = previous_delay or self.base_delay
+            if self.jitter:
+                delay = random.uniform(self.base_delay, previous_delay * 3)
+            else:
+                delay = previous_delay * 3 if attempt else self.base_delay
+        return min(delay, self.max_delay)
+
+    def allows(self, delay, slept):
+        ''' Returns True when sleeping `delay` more seconds stays within budget '''
+        return not self.budget or slept + delay <= self.budget
+
+
+class RateLimiter(object):
+    '''
+    Token bucket that spaces out the requests of every fork on the
+    controller talking to the same cluster with the same API key.
+
+    The bucket (token count and time of the last refill) is kept in a small
+    state file guarded by an exclusive flock, so all processes draw from the
+    same bucket. Threads of one process additionally share a lock. Without
+    fcntl (non POSIX controllers) the bucket is local to the process.
+    '''
+
+    def __init__(self, rate, burst=None, state_file=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(self.rate, 1))
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.time()
+
+    @staticmethod
+    def default_state_file(server_endpoint, api_key):
+        '''
+        Returns the state file shared by every client of one cluster and key,
+        or None when its directory cannot be created (the bucket is then
+        local to the process).
+        '''
+        key = hashlib.sha256(to_bytes(server_endpoint) + b'\n' + to_bytes(api_key)).hexdigest()
+        directory = tetration_turbo.user_tmp_dir('tetration-ratelimit')
+        old_umask = os.umask(0o077)
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except EnvironmentError:
+            return None
+        finally:
+            os.umask(old_umask)
+        return os.path.join(directory, key[:16])
+
+    def __take(self, tokens, updated):
+        '''
+        Refills the bucket and takes one token when available.
+
+        Returns:
+            Tuple of (tokens, updated, seconds to wait before a token is free)
+        '''
+        now = time.time()
+        tokens = min(self.burst, tokens + max(now - updated, 0) * self.rate)
+        if tokens >= 1:
+            return tokens - 1, now, 0
+        return tokens, now, (1 - tokens) / self.rate
+
+    def __take_shared(self):
+        fd = os.open(self.state_file, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, 64).split()
+            try:
+                tokens, updated = float(raw[0]), float(raw[1])
+            except (IndexError, ValueError):
+                tokens, updated = self.burst, time.time()
+            tokens, updated, wait = self.__take(tokens, updated)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, to_bytes('%r %r' % (tokens, updated)))
+            return wait
+        finally:
+            os.close(fd)
+
+    def acquire(self, max_wait=None):
+        '''
+        Blocks until a request may be sent.
+
+        Args:
+            max_wait: Float of the longest time to wait, None to wait forever
+
+        Returns:
+            Float of the seconds spent waiting, or None when no token became
+            available within max_wait.
+        '''
+        waited = 0.0
+        while True:
+            with self._lock:
+                if self.state_file and HAS_FCNTL:
+                    wait = self.__take_shared()
+                else:
+                    self._tokens, self._updated, wait = self.__take(self._tokens, self._updated)
+            if not wait:
+                return waited
+            if max_wait is not None and waited + wait > max_wait:
+                return None
+            time.sleep(wait)
+            waited += wait
+
+
+def _counting_pool_class(pool_class, adapter):
+    ''' Returns a subclass of an urllib3 pool class reporting to `adapter` '''
+
+    class CountingPool(pool_class):
+        def _get_conn(self, timeout=None):
+            must_wait = self.block and self.pool is not None and self.pool.empty()
+            started = time.monotonic()
+            conn = super(CountingPool, self)._get_conn(timeout=timeout)
+            adapter.record_checkout(
+                reused=getattr(conn, 'sock', None) is not None,
+                waited=time.monotonic() - started if must_wait else None)
+            return conn
+
+    return CountingPool
+
+
+class TetrationHTTPAdapter(HTTPAdapter):
+    '''
+    HTTPAdapter with configurable TCP keep-alive probes that counts how its
+    connection pools are used.
+
+    Attributes:
+        pool_stats: dict with the number of connections opened, the number
+        of requests sent over an already open connection, and how often and
+        how long a request waited for a connection of a full pool.
+    '''
+
+    def __init__(self, tcp_keepalive=0, shared_stats=None, **kwargs):
+        self.tcp_keepalive = tcp_keepalive
+        if shared_stats is not None:
+            # count into the pool_stats of another adapter
+            self.pool_stats = shared_stats.pool_stats
+            self._stats_lock = shared_stats._stats_lock
+        else:
+            self.pool_stats = {
+                'connections_created': 0,
+                'connections_reused': 0,
+                'connection_waits': 0,
+                'connection_wait_sec': 0.0
+            }
+            self._stats_lock = threading.Lock()
+        super(TetrationHTTPAdapter, self).__init__(**kwargs)
+
+    def __socket_options(self):
+        options = list(HTTPConnection.default_socket_options)
+        if self.tcp_keepalive:
+            options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+            for name in ('TCP_KEEPIDLE', 'TCP_KEEPINTVL'):
+                if hasattr(socket, name):
+                    options.append((socket.IPPROTO_TCP, getattr(socket, name), int(self.tcp_keepalive)))
+        return options
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs['socket_options'] = self.__socket_options()
+        super(TetrationHTTPAdapter, self).init_poolmanager(
+            connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, self),
+            'https': _counting_pool_class(HTTPSConnectionPool, self),
+        }
+
+    def record_checkout(self, reused, waited=None):
+        with self._stats_lock:
+            if reused:
+                self.pool_stats['connections_reused'] += 1
+            else:
+                self.pool_stats['connections_created'] += 1
+            if waited is not None:
+                self.pool_stats['connection_waits'] += 1
+                self.pool_stats['connection_wait_sec'] += waited
+
+
+class JsonCodec(object):
+    """
+    Serializes request bodies and parses response bodies with the fastest
+    JSON library available, or the one selected by the provider.
+
+    Attributes:
+        name: String name of the library in use, 'orjson', 'ujson' or 'json'
+    """
+    CODECS = ['orjson', 'ujson', 'json']
+
+    def __init__(self, name='auto'):
+        available = {'orjson': HAS_ORJSON, 'ujson': HAS_UJSON, 'json': True}
+        if name in (None, 'auto'):
+            name = [codec for codec in self.CODECS if available[codec]][0]
+        if name not in available:
+            raise ValueError('Unknown json_codec "%s", expected one of: auto, %s' % (
+                name, ', '.join(self.CODECS)))
+        if not available[name]:
+            raise ValueError('json_codec "%s" requires the %s Python package' % (name, name))
+        self.name = name
+
+    def dumps(self, obj):
+        """ Returns obj serialized, as bytes for orjson and str otherwise """
+        if self.name == 'orjson':
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        if self.name == 'ujson':
+            return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+        return json.dumps(obj)
+
+    def loads(self, data):
+        """ Parses a str or bytes document, raising ValueError if invalid """
+        if self.name == 'orjson':
+            return orjson.loads(data)
+        if self.name == 'ujson':
+            return ujson.loads(data)
+        return json.loads(data)
+
+    def response_json(self, response):
+        """ Parses the body of a requests.Response like response.json() """
+        if self.name == 'json':
+            return response.json()
+        return self.loads(response.content)
+
+
+class ValidatorStore(object):
+    '''
+    Bounded store of the GET responses of a RestClient, used to revalidate
+    them with If-None-Match / If-Modified-Since instead of downloading them
+    again.
+
+    Bodies are only kept for responses carrying an ETag or Last-Modified
+    header; a 304 answer is then replaced with the kept body. For every
+    response the digest of the body is remembered, so a response whose body
+    did not change since the previous GET of the same URL is flagged with
+    `unchanged` even when the cluster sends no validators, letting callers
+    skip processing it again.
+
+    Attributes:
+        max_entries: Int of URLs remembered, least recently used first out
+        max_bytes: Int of body bytes kept across all entries
+        stats: dict with the number of 304 answers served from the store
+        and of responses found unchanged
+    '''
+
+    def __init__(self, max_entries=256, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = {'not_modified': 0, 'unchanged': 0}
+        self.__entries = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+    def __drop(self, url):
+        entry = self.__entries.pop(url, None)
+        if entry is not None and entry['content'] is not None:
+            self.__size -= len(entry['content'])
+
+    def conditional_headers(self, url):
+        ''' Returns the validator headers to send with a GET of url '''
+        with self.__lock:
+            entry = self.__entries.get(url)
+            if entry is None or entry['content'] is None:
+                return {}
+            headers = {}
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+            return headers
+
+    def update(self, url, response):
+        '''
+        Records the response of a GET of url and returns the response to
+        hand to the caller: the kept response when the cluster answered 304,
+        otherwise `response` itself. Both carry `body_digest` and
+        `unchanged` attributes.
+        '''
+        with self.__lock:
+            entry = self.__entries.get(url)
+            if response.status_code == 304 and entry is not None and entry['content'] is not None:
+                self.__entries.move_to_end(url)
+                self.stats['not_modified'] += 1
+                self.stats['unchanged'] += 1
+                kept = requests.Response()
+                kept.status_code = 200
+                kept.reason = 'OK'
+                kept.url = response.url
+                kept.request = response.request
+                kept.headers.update(entry['headers'])
+                kept.encoding = entry['encoding']
+                kept._content = entry['content']
+                kept.body_digest = entry['digest']
+                kept.unchanged = True
+                return kept
+            if response.status_code != 200:
+                self.__drop(url)
+                return response
+            content = response.content or b''
+            digest = hashlib.sha256(content).hexdigest()
+            response.body_digest = digest
+            response.unchanged = entry is not None and entry['digest'] == digest
+            if response.unchanged:
+                self.stats['unchanged'] += 1
+            self.__drop(url)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            keep = (etag or last_modified) and len(content) <= self.max_bytes // 4
+            self.__entries[url] = {
+                'digest': digest,
+                'etag': etag,
+                'last_modified': last_modified,
+                'headers': dict(response.headers) if keep else None,
+                'encoding': response.encoding,
+                'content': content if keep else None
+            }
+            if keep:
+                self.__size += len(content)
+            while self.__entries and (len(self.__entries) > self.max_entries or self.__size > self.max_bytes):
+                self.__drop(next(iter(self.__entries)))
+            return response
+
+
+def item_argument_spec(argument_spec):
+    '''
+    Returns the argument spec of a module run with TetrationApiModule.run_items:
+    argument_spec with an `items` list of dicts and without required options,
+    since they may be given by the items instead.
+    '''
+    spec = {}
+    for key, value in iteritems(argument_spec):
+        spec[key] = dict((k, v) for k, v in iteritems(value) if k != 'required')
+    spec['items'] = dict(type='list', elements='dict')
+    return spec
+
+
+class ItemValidator(object):
+    '''
+    Validates the arguments of one item of TetrationApiModule.run_items
+    against its argument spec and constraints, like AnsibleModule does.
+
+    Uses ArgumentSpecValidator when ansible provides it (2.11 and later),
+    otherwise the checks of ansible.module_utils.common.validation, which
+    cover the types, choices, defaults and constraints of the modules.
+    '''
+
+    TYPE_CHECKERS = {
+        'str': check_type_str,
+        'list': check_type_list,
+        'dict': check_type_dict,
+        'bool': check_type_bool,
+        'int': check_type_int,
+        'float': check_type_float,
+        'path': check_type_path,
+        'raw': check_type_raw,
+    }
+
+    def __init__(self, argument_spec, mutually_exclusive=None, required_together=None,
+                 required_one_of=None, required_if=None):
+        self.argument_spec = argument_spec
+        self.mutually_exclusive = mutually_exclusive
+        self.required_together = required_together
+        self.required_one_of = required_one_of
+        self.required_if = required_if
+        self._validator = None
+        if ArgumentSpecValidator is not None:
+            self._validator = ArgumentSpecValidator(
+                argument_spec, mutually_exclusive=mutually_exclusive, required_together=required_together,
+                required_one_of=required_one_of, required_if=required_if)
+
+    def validate(self, params):
+        '''
+        Returns:
+            Tuple of (dict of the validated parameters with their defaults,
+            list of error messages)
+        '''
+        if self._validator is not None:
+            result = self._validator.validate(params)
+            return result.validated_parameters, result.error_messages
+
+        given = dict((k, v) for k, v in iteritems(params) if v is not None)
+        errors = []
+        unsupported = sorted(set(given) - set(self.argument_spec))
+        if unsupported:
+            errors.append('Unsupported parameters: %s' % ', '.join(unsupported))
+        validated = {}
+        for name, option in iteritems(self.argument_spec):
+            if name not in given:
+                validated[name] = copy.deepcopy(option.get('default'))
+                continue
+            try:
+                value = self.TYPE_CHECKERS[option.get('type', 'str')](given[name])
+                if option.get('elements') and isinstance(value, list):
+                    value = [self.TYPE_CHECKERS[option['elements']](element) for element in value]
+            except (TypeError, ValueError) as exc:
+                errors.append('argument %s: %s' % (name, to_text(exc)))
+                continue
+            if option.get('choices') is not None and value not in option['choices']:
+                errors.append('value of %s must be one of: %s, got: %s' % (
+                    name, ', '.join(to_text(choice) for choice in option['choices']), value))
+            validated[name] = value
+
+        # the constraints look at which keys are present, like AnsibleModule
+        # required_if also sees the defaults
+        present = dict((k, v) for k, v in iteritems(validated) if v is not None)
+        for check, terms, parameters in (
+                (check_required_arguments, self.argument_spec, given),
+                (check_mutually_exclusive, self.mutually_exclusive, given),
+                (check_required_together, self.required_together, given),
+                (check_required_one_of, self.required_one_of, given),
+                (check_required_if, self.required_if, present)):
+            if not terms:
+                continue
+            try:
+                check(terms, parameters)
+            except TypeError as exc:
+                errors.append(to_text(exc))
+        return validated, errors
+
+
+class ItemModule(object):
+    '''
+    Stands in for the AnsibleModule while one item of a task is run: params
+    holds the arguments of the item, and exit_json / fail_json end the item
+    instead of the module. Everything else is read from the AnsibleModule.
+    '''
+
+    class Exit(Exception):
+        ''' Raised by exit_json and fail_json with the result of the item '''
+
+        def __init__(self, result):
+            super(ItemModule.Exit, self).__init__(result.get('msg'))
+            self.result = result
+
+    def __init__(self, module, params):
+        self._module = module
+        self.params = params
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+    def exit_json(self, **kwargs):
+        raise ItemModule.Exit(kwargs)
+
+    def fail_json(self, msg, **kwargs):
+        kwargs['msg'] = msg
+        kwargs['failed'] = True
+        raise ItemModule.Exit(kwargs)
+
 
 class TetrationApiBase(object):
     ''' Base class for implementing Tetration API '''
@@ -45,7 +986,23 @@ class TetrationApiBase(object):
                 # if key is required but still not defined raise Exception
                 if key not in provider and 'required' in value and value['required']:
                     raise ValueError('option: %s is required' % key)
-        self.rc = RestClient(**provider)
+            if value.get('type') == 'bool':
+                # environment variables arrive as strings, 'false' included
+                flag = provider.get(key)
+                provider[key] = boolean(value.get('default', False) if flag is None else flag, strict=False)
+        # the environment variable also applies when a provider is given
+        provider['metrics'] = metrics_enabled(provider)
+        self.provider = provider
+        self.codec = JsonCodec(provider.get('json_codec'))
+        self.rc = None
+        if provider.get('turbo'):
+            try:
+                self.rc = TurboRestClient(provider)
+            except (tetration_turbo.TurboError, EnvironmentError):
+                # turbo is only an optimization, talk to the cluster directly
+                self.rc = None
+        if self.rc is None:
+            self.rc = RestClient(**provider)
 
 
 class TetrationApiModule(TetrationApiBase):
@@ -59,12 +1016,84 @@ class TetrationApiModule(TetrationApiBase):
             super(TetrationApiModule, self).__init__(provider, module)
         except Exception as exc:
             self.module.fail_json(msg=to_text(exc))
+        self._object_indexes = {}
+        self._index_lock = threading.RLock()
+        self._memo = {}
+        self._memo_lock = threading.Lock()
+        self._memo_flights = {}
+        self._memo_writes = 0
+        self._memo_hits = 0
+        self._batch = threading.local()
+        self._pages = {'paginated_calls': 0, 'pages': 0}
+        self.memoize = self.provider['memoize']
+        self.cache = None
+        if float(self.provider.get('cache_ttl') or 0) > 0 and HAS_FCNTL:
+            self.cache = ResponseCache(
+                self.provider.get('cache_dir') or ResponseCache.default_cache_dir(),
+                self.provider['cache_ttl'],
+                self.provider.get('server_endpoint'),
+                self.provider.get('api_key'),
+                uri_prefix=self.rc.uri_prefix,
+                codec=self.codec)
+        self._wrap_module_results()
+
+    def _wrap_module_results(self):
+        ''' Adds the client statistics to every result the module returns '''
+        exit_json = self.module.exit_json
+        fail_json = self.module.fail_json
+
+        def _exit_json(**kwargs):
+            kwargs.setdefault('tetration_stats', self.get_stats())
+            if self.provider.get('metrics'):
+                kwargs.setdefault('tetration_metrics', self.get_metrics())
+            exit_json(**kwargs)
+
+        def _fail_json(msg, **kwargs):
+            kwargs.setdefault('tetration_stats', self.get_stats())
+            if self.provider.get('metrics'):
+                kwargs.setdefault('tetration_metrics', self.get_metrics())
+            fail_json(msg=msg, **kwargs)
+
+        self.module.exit_json = _exit_json
+        self.module.fail_json = _fail_json
+
+    def get_stats(self):
+        ''' Returns the client counters along with the cache counters '''
+        stats = self.rc.get_stats()
+        cache_stats = self.cache.stats if self.cache is not None else {}
+        stats['cache_hits'] = cache_stats.get('hits', 0)
+        stats['cache_misses'] = cache_stats.get('misses', 0)
+        stats['memo_hits'] = self._memo_hits
+        return stats
+
+    def get_metrics(self):
+        ''' Returns the per-call records of the client along with the page
+        and cache counters of the module run, see the metrics provider option '''
+        metrics = self.rc.get_metrics() or {'calls': [], 'calls_dropped': 0}
+        metrics.update(self._pages)
+        cache_stats = self.cache.stats if self.cache is not None else {}
+        metrics['cache_hits'] = cache_stats.get('hits', 0)
+        metrics['cache_misses'] = cache_stats.get('misses', 0)
+        metrics['memo_hits'] = self._memo_hits
+        return metrics
+
+    def _handle_deadline(self, method_name, target, exc):
+        ''' Fails the module when the overall task deadline is exceeded '''
+        if getattr(self._batch, 'active', False):
+            raise TetrationApiError(to_text(exc), operation=method_name, route=target)
+        self.module.fail_json(
+            msg=to_text(exc),
+            operation=method_name,
+            route=target
+        )
 
     def _handle_exception(self, method_name, exc):
         ''' Handles any exceptions raised
         This method is called when an unexpected response
         code is returned from a Tetration OpenAPI call
         '''
+        if getattr(self._batch, 'active', False):
+            raise TetrationApiError(exc.text, operation=method_name, code=exc.status_code)
         self.module.fail_json(
             msg=exc.text,
             code=exc.status_code,
@@ -74,29 +1103,128 @@ class TetrationApiModule(TetrationApiBase):
     def get_object(self, filter, target=None, params=None, sub_element=None, allow_multiple=False, search_array=None):
         '''Returns a single object from Tetration that exactly matches every
         value specified in filter.
+
+        Objects read from `target` are kept in an ObjectIndex for the rest of
+        the module run, so repeated lookups in the same collection are hash
+        lookups, and pages are only read until a match is found. Writes
+        through run_method update the index, see _update_indexes. The
+        objects returned are copies, the caller may change them.
+
+        Filter keys the OpenAPI can apply itself (TETRATION_API_SERVER_FILTERS)
+        are also sent as query parameters. The server then leaves out the
+        objects missing such a key, which a filter applied on the client
+        would have matched.
         '''
-        result_array = []
-        while True:
-            if search_array:
-                query_result = search_array
-            else:
-                query_result = self._get(
-                    target=target, params=params, req_payload=None)
-            search_objects = query_result[sub_element] if sub_element and sub_element in query_result else query_result
-            for obj in search_objects:
-                match = True
-                for k, v in iteritems(filter):
-                    if k in obj and obj[k] != v:
-                        match = False
-                if match:
-                    if allow_multiple:
-                        result_array.append(obj)
-                    else:
-                        return obj
-            if 'offset' in query_result and not search_array:
-                params['offset'] = query_result['offset']
-            else:
+        if search_array:
+            search_objects = search_array[sub_element] if sub_element and sub_element in search_array else search_array
+            result_array = [obj for obj in search_objects if ObjectIndex.matches(obj, filter)]
+            if allow_multiple:
                 return result_array if result_array else None
+            return result_array[0] if result_array else None
+
+        params = dict(params or {})
+        for key in tetration_constants.TETRATION_API_SERVER_FILTERS.get(target, []):
+            if key in filter and key not in params and isinstance(filter[key], (str, int)):
+                params[key] = filter[key]
+        index_key = (target, json.dumps(params, sort_keys=True, default=str), sub_element)
+        # threads running items share the index, only one of them reads pages
+        with self._index_lock:
+            index = self._object_indexes.setdefault(index_key, ObjectIndex())
+            while True:
+                positions = index.find(filter)
+                # copies, like _get, so callers cannot change the indexed objects
+                if positions and not allow_multiple:
+                    return copy.deepcopy(index.objects[positions[0]])
+                if index.complete:
+                    if not positions:
+                        return None
+                    return copy.deepcopy([index.objects[position] for position in positions])
+                self._read_index_page(index, target, params, sub_element)
+
+    def _read_index_page(self, index, target, params, sub_element):
+        page_params = dict(params)
+        if index.offset is not None:
+            page_params['offset'] = index.offset
+        query_result = self._get(target=target, params=page_params, req_payload=None)
+        if query_result is None:
+            search_objects = []
+        elif sub_element and sub_element in query_result:
+            search_objects = query_result[sub_element]
+        elif isinstance(query_result, dict):
+            search_objects = query_result.get('results', [])
+        else:
+            search_objects = query_result
+        index.add(search_objects)
+        if isinstance(query_result, dict) and 'offset' in query_result:
+            index.offset = query_result['offset']
+        else:
+            index.complete = True
+
+    def _invalidate_collection(self, target):
+        ''' Drops the cached and memoized responses a write to target may change '''
+        if self.cache is not None:
+            self.cache.invalidate(target)
+        written_path = self._memo_path(target)
+        with self._memo_lock:
+            self._memo_writes += 1
+            for memo_key in list(self._memo):
+                if routes_overlap(written_path, memo_key[0]):
+                    del self._memo[memo_key]
+
+    def _update_indexes(self, method_name, target, result=None, failed=False):
+        '''Applies a write to target to the object indexes of get_object.
+
+        When the server returns the object it created or changed, such as
+        for `POST /users`, `PUT /users/{id}` or `PUT /users/{id}/add_role`,
+        that object is added to or replaced in the indexes of its
+        collection. A DELETE of `/roles/{id}` removes the object, unless the
+        collection only disables its objects (TETRATION_API_SOFT_DELETE) or
+        the server answered with something else than the object. Any other
+        write, or a failed one, drops the indexes of every route it may
+        change.
+        '''
+        written = route_template(target, self.rc.uri_prefix)
+        segments = written.split('/')
+        collection = written
+        obj_id = None
+        if '{id}' in segments:
+            position = segments.index('{id}')
+            collection = '/'.join(segments[:position])
+            obj_id = self._memo_path(target).split('/')[position]
+        returned = isinstance(result, dict) and result.get('id') is not None and (
+            obj_id is None or result['id'] == obj_id)
+        if method_name == 'delete':
+            if obj_id is None or not written.endswith('/{id}') or not (returned or not result):
+                failed = True
+            elif not returned or collection not in tetration_constants.TETRATION_API_SOFT_DELETE:
+                # the object is gone, whatever the server answered with
+                returned = False
+                result = None
+        with self._index_lock:
+            for index_key, index in list(self._object_indexes.items()):
+                indexed = route_template(index_key[0], self.rc.uri_prefix)
+                if not routes_overlap(written, indexed):
+                    continue
+                if failed or indexed != collection or index_key[2] is not None or written.count('{id}') > 1:
+                    del self._object_indexes[index_key]
+                elif returned:
+                    # objects the server-side filters of the index leave out are removed
+                    keep = ObjectIndex.matches(result, json.loads(index_key[1]))
+                    if obj_id is None and keep:
+                        index.add([result])
+                    else:
+                        index.replace(result['id'], result if keep else None)
+                elif method_name == 'delete':
+                    index.replace(obj_id, None)
+                else:
+                    del self._object_indexes[index_key]
+
+    def _memo_path(self, target):
+        ''' Returns the path of target without the OpenAPI prefix and the query '''
+        path = target.split('?', 1)[0]
+        if path.startswith(self.rc.uri_prefix):
+            path = path[len(self.rc.uri_prefix):]
+        return path
 
     def run_method(self, method_name, target, params=None, req_payload=None):
         methods = {
@@ -107,88 +1235,580 @@ class TetrationApiModule(TetrationApiBase):
         }
         return methods[method_name.lower()](target, params, req_payload)
 
-    def run_method_paginated(self, method_name, target, params=None, req_payload=None, offset=None):
+    def run_method_paginated(self, method_name, target, params=None, req_payload=None, offset=None,
+                             record_filter=None):
+        '''Returns the records of every page of a paginated route.
+
+        When record_filter is given, only the records it returns True for
+        are kept, so the rejected ones never accumulate in memory. See
+        iter_paginated.
+        '''
+        return [record for record in self.iter_paginated(
+                method_name, target, params=params, req_payload=req_payload, offset=offset)
+                if record_filter is None or record_filter(record)]
+
+    def iter_paginated(self, method_name, target, params=None, req_payload=None, page_size=None,
+                       max_items=None, offset=None):
+        '''Yields the records of a paginated route one at a time, requesting
+        the next page only when the records of the current one are used up.
+
+        GET pages are decoded while they download. With the provider option
+        prefetch_depth, the next GET pages are fetched on a worker thread
+        while the current one is processed. Stopping the iteration early,
+        or reaching max_items, stops fetching pages. The caller's params are
+        not modified.
+
+        Args:
+            page_size: Int of records requested per page, defaults to
+            TETRATION_API_PAGINATION_SIZE
+            max_items: Int of records after which to stop, None for all
+            offset: cursor of the first page to request
+        '''
+        if max_items is not None and max_items <= 0:
+            return
+        page_size = int(page_size or tetration_constants.TETRATION_API_PAGINATION_SIZE)
+        if max_items is not None:
+            page_size = min(page_size, max_items)
+        params = dict(params or {})
+        params['limit'] = page_size
+        params['offset'] = offset
+
+        prefetch_depth = int(self.provider.get('prefetch_depth') or 0)
+        if method_name.lower() == 'get' and prefetch_depth > 0:
+            pages = self._prefetch_pages(target, params, prefetch_depth)
+        else:
+            pages = self._iter_pages(method_name, target, params, req_payload)
+
+        count = 0
+        self._pages['paginated_calls'] += 1
+        try:
+            for records in pages:
+                self._pages['pages'] += 1
+                for record in records:
+                    yield record
+                    count += 1
+                    if max_items is not None and count >= max_items:
+                        return
+        finally:
+            pages.close()
+
+    def _iter_pages(self, method_name, target, params, req_payload):
+        ''' Yields the records of each page, one request at a time '''
         methods = {
             'get': self._get,
             'post': self._post,
             'put': self._put,
             'delete': self._delete
         }
-        if params is None:
-            params = {
-                'limit': tetration_constants.TETRATION_API_PAGINATION_SIZE,
-                'offset': offset
-            }
-        else:
-            params['limit'] = tetration_constants.TETRATION_API_PAGINATION_SIZE
-            params['offset'] = offset
-
-        keep_searching = True
-        all_results = []
-        while keep_searching:
-            results = methods[method_name.lower()](target, params, req_payload)
+        while True:
+            if method_name.lower() == 'get':
+                records = self._get_stream(target, params)
+                if records is None:
+                    return
+                try:
+                    yield records
+                finally:
+                    records.close()
+                # filled in as the page was read
+                results = records.meta
+            else:
+                results = methods[method_name.lower()](target, params, req_payload)
+                yield results['results']
+            if 'offset' not in results.keys():
+                return
+            params['offset'] = results['offset']
+
+    def _prefetch_pages(self, target, params, depth):
+        '''Yields the records of each GET page while a worker thread fetches
+        up to `depth` pages ahead.
+
+        The worker never touches the module: error responses and exceptions
+        are handed over to the calling thread, which fails the module.
+        '''
+        pages = queue.Queue(maxsize=depth)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def fetch():
+            page_params = dict(params)
+            try:
+                while True:
+                    resp = self.rc.get(target, params=dict(page_params), stream=True)
+                    if resp.status_code != 200:
+                        put(('response', resp))
+                        return
+                    records = self.rc.iter_records(resp)
+                    if not put(('page', list(records))):
+                        return
+                    if 'offset' not in records.meta:
+                        break
+                    page_params['offset'] = records.meta['offset']
+            except Exception as exc:
+                put(('error', exc))
+                return
+            put(('done', None))
+
+        worker = threading.Thread(target=fetch)
+        worker.daemon = True
+        worker.start()
+        try:
+            while True:
+                kind, value = pages.get()
+                if kind == 'page':
+                    yield value
+                elif kind == 'response':
+                    self._parse_response('get', value)
+                    return
+                elif kind == 'error':
+                    if isinstance(value, TetrationDeadlineExceeded):
+                        self._handle_deadline('get', target, value)
+                    raise value
+                else:
+                    return
+        finally:
+            stop.set()
+
+    def gather(self, calls, concurrency=None):
+        '''Runs independent calls concurrently and returns their results in
+        order, as run_method would have returned them one by one. The first
+        failed call fails the module, like run_method.
+
+        The calls are sent on an aiohttp session when aiohttp is installed,
+        otherwise they go through run_batch.
 
-            all_results.extend(results['results'])
-            if 'offset' in results.keys():
-                params['offset'] = results['offset']
+        Args:
+            calls: list of (method_name, target, params, req_payload) tuples,
+            params and req_payload are optional
+            concurrency: Int of calls in flight, defaults to the provider
+            concurrency option
+        '''
+        calls = [tuple(call) + (None,) * (4 - len(call)) for call in calls]
+        if concurrency is None:
+            concurrency = self.provider.get('concurrency')
+        if not HAS_AIOHTTP or not isinstance(self.rc, RestClient) or len(calls) < 2:
+            results, errors = self.run_batch(calls, max_workers=concurrency)
+            if errors:
+                error = errors[0]
+                if getattr(self._batch, 'active', False):
+                    raise TetrationApiError(error['msg'], operation=error['operation'],
+                                            code=error['code'], route=error['route'])
+                self.module.fail_json(msg=error['msg'], code=error['code'], operation=error['operation'])
+            return results
+
+        requests_args = []
+        for method_name, target, params, req_payload in calls:
+            if method_name.lower() not in ('get', 'post', 'put', 'delete'):
+                raise ValueError('HTTP method "%s" is unsupported' % method_name)
+            if method_name.lower() == 'get':
+                args = {'params': params}
             else:
-                keep_searching = False
+                args = {'json_body': self.codec.dumps(req_payload)}
+            if not target.startswith(self.rc.uri_prefix):
+                target = self.rc.uri_prefix + target
+            requests_args.append((method_name.upper(), target, args))
 
-        return all_results
+        async def _gather():
+            async with AsyncRestClient(self.rc, concurrency or 10) as client:
+                return await client.gather(requests_args)
 
-    def _get(self, target, params, req_payload):
-        resp = self.rc.get(target, params=params)
-        if resp.status_code == 400:
-            return None
-        elif resp.status_code == 200:
-            return resp.json()
-        else:
-            self._handle_exception('get', resp)
+        loop = asyncio.new_event_loop()
+        try:
+            responses = loop.run_until_complete(_gather())
+        except TetrationDeadlineExceeded as exc:
+            self._handle_deadline(calls[0][0].lower(), calls[0][1], exc)
+        finally:
+            loop.close()
+            # like run_method, forget what the writes changed once they are sent
+            for method_name, target, _ in requests_args:
+                if method_name != 'GET':
+                    self._invalidate_collection(target)
+        writes = [(index, method_name.lower(), target)
+                  for index, (method_name, target, _) in enumerate(requests_args) if method_name != 'GET']
+        try:
+            results = [self._parse_response(call[0].lower(), resp)
+                       for call, resp in zip(calls, responses)]
+        except BaseException:
+            for index, method_name, target in writes:
+                self._update_indexes(method_name, target, failed=True)
+            raise
+        for index, method_name, target in writes:
+            self._update_indexes(method_name, target, results[index])
+        return results
+
+    def run_batch(self, calls, max_workers=None):
+        '''Runs independent calls on a bounded pool of threads, each thread
+        with a session of its own, and returns their results in order.
+
+        Unlike run_method, a failed call does not fail the module: it is
+        reported in the returned errors and the other calls still run.
 
-    def _post(self, target, params, req_payload):
-        resp = self.rc.post(target, json_body=json.dumps(req_payload))
-        if resp.status_code in tetration_constants.TETRATION_API_SUCCESS_CODES:
-            try:
-                return resp.json()
-            except ValueError:
-                return None
-        else:
-            self._handle_exception('post', resp)
+        Args:
+            calls: list of (method_name, target, params, req_payload) tuples,
+            params and req_payload are optional
+            max_workers: Int of threads, defaults to the provider concurrency
+            option
 
-    def _put(self, target, params, req_payload):
-        resp = self.rc.put(target, json_body=json.dumps(req_payload))
-        if resp.status_code in tetration_constants.TETRATION_API_SUCCESS_CODES:
+        Returns:
+            (results, errors) where results holds what run_method returned
+            for each call, None for the failed ones, and errors is a list of
+            dicts with the index, msg, operation, code and route of every
+            failed call
+        '''
+        calls = [tuple(call) + (None,) * (4 - len(call)) for call in calls]
+
+        def _run(index):
+            method_name, target, params, req_payload = calls[index]
             try:
-                return resp.json()
-            except ValueError:
-                return None
-        else:
-            self._handle_exception('put', resp)
+                return self.run_method(method_name, target, params, req_payload), None
+            except TetrationApiError as exc:
+                return None, exc
+            except requests.exceptions.RequestException as exc:
+                return None, TetrationApiError(to_text(exc), operation=method_name.lower())
+
+        outcomes = self._run_pool(_run, len(calls), max_workers)
+
+        results = []
+        errors = []
+        for index, (result, exc) in enumerate(outcomes):
+            results.append(result)
+            if exc is not None:
+                errors.append({
+                    'index': index,
+                    'msg': exc.msg,
+                    'operation': exc.operation,
+                    'code': exc.code,
+                    'route': exc.route or calls[index][1]
+                })
+        return results, errors
+
+    def _run_pool(self, run, count, max_workers=None):
+        '''Calls run(index) for every index below count on a bounded pool of
+        threads, each thread with a session of its own, and returns the
+        values returned in order.
+
+        While run executes, API errors raise TetrationApiError instead of
+        failing the module.
+        '''
+        from concurrent.futures import ThreadPoolExecutor
+
+        if max_workers is None:
+            max_workers = self.provider.get('concurrency')
+        max_workers = min(max(int(max_workers or 1), 1), count)
+        if max_workers <= 1:
+            # may be nested in a worker of another pool, restore its flag
+            active = getattr(self._batch, 'active', False)
+            self._batch.active = True
+            try:
+                return [run(index) for index in range(count)]
+            finally:
+                self._batch.active = active
 
-    def _delete(self, target, params, req_payload):
-        resp = self.rc.delete(target, json_body=json.dumps(req_payload))
-        if resp.status_code in tetration_constants.TETRATION_API_SUCCESS_CODES:
+        sessions = []
+        sessions_lock = threading.Lock()
+
+        def _start_worker():
+            self._batch.active = True
+            bind_thread_session = getattr(self.rc, 'bind_thread_session', None)
+            if bind_thread_session is not None:
+                session = bind_thread_session()
+                with sessions_lock:
+                    sessions.append(session)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers, initializer=_start_worker) as executor:
+                return list(executor.map(run, range(count)))
+        finally:
+            for session in sessions:
+                session.close()
+
+    def run_items(self, argument_spec, run_item, **constraints):
+        '''Runs the module once for the task arguments, or once for each dict
+        of its `items` option, see item_argument_spec.
+
+        Items are merged over the other task arguments, validated against
+        argument_spec and the constraints (mutually_exclusive, required_if,
+        ...) like AnsibleModule does, and run on a bounded pool of threads,
+        sharing this client, its memoized GETs and its object indexes. The
+        module then exits with the result of every item in `results`, in
+        the shape of a loop.
+
+        Args:
+            argument_spec: dict argument spec of one item, without `items`
+            run_item: function(module, tet_module) ending with exit_json or
+            fail_json; for an item it receives an ItemModule
+            constraints: keyword arguments of ItemValidator
+        '''
+        spec = dict((k, v) for k, v in iteritems(argument_spec) if k != 'provider')
+        validator = ItemValidator(spec, **constraints)
+        # only the arguments given in the task, defaults are set again per item
+        common = dict((k, v) for k, v in iteritems(self.module.params)
+                      if k in spec and v is not None and v != spec[k].get('default'))
+
+        items = self.module.params.get('items')
+        if items is None:
+            validated, errors = validator.validate(common)
+            if errors:
+                self.module.fail_json(msg='; '.join(errors))
+            self.module.params.update(validated)
+            run_item(self.module, self)
+            return
+
+        def _run(index):
+            params = dict(common)
+            params.update(items[index])
+            params, errors = validator.validate(params)
+            if errors:
+                return {'failed': True, 'msg': '; '.join(errors)}
+            params['provider'] = self.module.params.get('provider')
             try:
-                return resp.json()
-            except ValueError:
+                run_item(ItemModule(self.module, params), self)
+            except ItemModule.Exit as exc:
+                return exc.result
+            except TetrationApiError as exc:
+                return {'failed': True, 'msg': exc.msg, 'code': exc.code, 'operation': exc.operation}
+            except requests.exceptions.RequestException as exc:
+                return {'failed': True, 'msg': to_text(exc)}
+            return {'failed': True, 'msg': 'The item ended without a result'}
+
+        results = self._run_pool(_run, len(items)) if items else []
+        for item, result in zip(items, results):
+            result['item'] = item
+            result.setdefault('changed', False)
+        changed = any(result['changed'] for result in results)
+        if any(result.get('failed') for result in results):
+            self.module.fail_json(msg='One or more items failed', changed=changed, results=results)
+        self.module.exit_json(msg='All items completed', changed=changed, results=results)
+
+    def _parse_response(self, method_name, resp):
+        if method_name == 'get':
+            if resp.status_code == 400:
                 return None
-        elif resp.status_code in tetration_constants.TETRATION_API_FAILURE_CODES_THAT_RETURN_DATA:
+            elif resp.status_code == 200:
+                return self.codec.response_json(resp)
+        elif resp.status_code in tetration_constants.TETRATION_API_SUCCESS_CODES or (
+                method_name == 'delete' and resp.status_code in
+                tetration_constants.TETRATION_API_FAILURE_CODES_THAT_RETURN_DATA):
             try:
-                return resp.json()
+                return self.codec.response_json(resp)
             except ValueError:
                 return None
-        else:
-            self._handle_exception('delete', resp)
+        self._handle_exception(method_name, resp)
+
+    def _get(self, target, params, req_payload):
+        '''GETs target, serving repeated identical GETs of the module run
+        from memory.
+
+        Results are memoized per path and query parameters and handed out as
+        copies, so callers may modify them. Writes drop the memoized GETs of
+        the paths they may change (see _invalidate_collection). Threads asking
+        for a GET already in flight wait for its result instead of sending
+        it again.
+        '''
+        if not self.memoize:
+            return self._get_uncached(target, params)
+        memo_key = (self._memo_path(target), json.dumps(params, sort_keys=True, default=str))
+        with self._memo_lock:
+            if memo_key in self._memo:
+                self._memo_hits += 1
+                return copy.deepcopy(self._memo[memo_key])
+            flight = self._memo_flights.get(memo_key)
+            leader = flight is None
+            if leader:
+                flight = self._memo_flights[memo_key] = {'done': threading.Event(), 'writes': self._memo_writes}
+        if not leader:
+            flight['done'].wait()
+            if 'result' in flight:
+                with self._memo_lock:
+                    self._memo_hits += 1
+                return copy.deepcopy(flight['result'])
+            return self._get_uncached(target, params)
+        try:
+            result = self._get_uncached(target, params)
+            with self._memo_lock:
+                # a write while the GET was in flight may have changed it
+                if flight['writes'] == self._memo_writes:
+                    self._memo[memo_key] = result
+                    flight['result'] = result
+            return copy.deepcopy(result)
+        finally:
+            with self._memo_lock:
+                del self._memo_flights[memo_key]
+            flight['done'].set()
+
+    def _get_uncached(self, target, params):
+        token = None
+        if self.cache is not None:
+            hit, value, token = self.cache.get(target, params)
+            if hit:
+                return value
+        try:
+            resp = self.rc.get(target, params=params)
+        except TetrationDeadlineExceeded as exc:
+            self._handle_deadline('get', target, exc)
+        result = self._parse_response('get', resp)
+        if token is not None and resp.status_code == 200:
+            self.cache.put(target, params, result, token)
+        return result
+
+    def _get_stream(self, target, params):
+        try:
+            resp = self.rc.get(target, params=params, stream=True)
+        except TetrationDeadlineExceeded as exc:
+            self._handle_deadline('get', target, exc)
+        if resp.status_code != 200:
+            return self._parse_response('get', resp)
+        return self.rc.iter_records(resp)
+
+    def _write(self, method_name, target, req_payload):
+        '''Sends a POST, PUT or DELETE, then updates what the module run
+        knows about the collection it changed'''
+        try:
+            resp = getattr(self.rc, method_name)(target, json_body=self.codec.dumps(req_payload))
+        except TetrationDeadlineExceeded as exc:
+            self._handle_deadline(method_name, target, exc)
+        self._invalidate_collection(target)
+        try:
+            result = self._parse_response(method_name, resp)
+        except BaseException:
+            self._update_indexes(method_name, target, failed=True)
+            raise
+        self._update_indexes(method_name, target, result)
+        return result
+
+    def _post(self, target, params, req_payload):
+        return self._write('post', target, req_payload)
+
+    def _put(self, target, params, req_payload):
+        return self._write('put', target, req_payload)
+
+    def _delete(self, target, params, req_payload):
+        return self._write('delete', target, req_payload)
 
     def is_subset(self, smaller_obj, bigger_obj):
         # Accepts 2 dictionaries and determines if the first dict is a subset of the second dict
+        # Nested values are compared with values_equal, see diff_objects
         if not isinstance(smaller_obj, dict) or not isinstance(bigger_obj, dict):
             raise TypeError("Both objects must be dictionaries.")
 
-        for k, v in smaller_obj.items():
-            if bigger_obj.get(k) != v:
-                return False
-        return True
+        return not diff_objects(smaller_obj, bigger_obj)
+
+
+class JsonRecordStream(object):
+    """
+    Incrementally decodes a JSON document read from an iterable of byte
+    chunks and yields the items of one array as soon as each is complete.
+
+    For an object like {"results": [...], "offset": "..."} the items of
+    `key` are yielded and the other members are collected in `meta` once
+    they are read; a top-level array yields its items directly. Only the
+    item being decoded is held in memory, not the whole page.
+
+    Attributes:
+        meta: dict of the top-level members other than `key`
+    """
+    __WHITESPACE = ' \t\r\n'
+
+    def __init__(self, chunks, key='results'):
+        self.chunks = iter(chunks)
+        self.key = key
+        self.meta = {}
+        self.__text = codecs.getincrementaldecoder('utf-8')()
+        self.__json = json.JSONDecoder()
+        self.__buf = ''
+        self.__pos = 0
+        self.__eof = False
+
+    def close(self):
+        """ Stops reading, releasing the underlying response """
+        if hasattr(self.chunks, 'close'):
+            self.chunks.close()
+
+    def __fill(self):
+        """ Reads more data, returns False at the end of the stream """
+        if self.__eof:
+            return False
+        for chunk in self.chunks:
+            text = self.__text.decode(chunk)
+            if text:
+                self.__buf = self.__buf[self.__pos:] + text
+                self.__pos = 0
+                return True
+        self.__eof = True
+        self.__buf = self.__buf[self.__pos:] + self.__text.decode(b'', final=True)
+        self.__pos = 0
+        return False
+
+    def __peek(self):
+        """ Returns the next non-whitespace character, '' at the end """
+        while True:
+            while self.__pos < len(self.__buf) and self.__buf[self.__pos] in self.__WHITESPACE:
+                self.__pos += 1
+            if self.__pos < len(self.__buf):
+                return self.__buf[self.__pos]
+            if not self.__fill():
+                return ''
+
+    def __expect(self, chars):
+        char = self.__peek()
+        if not char or char not in chars:
+            raise ValueError('Expecting one of %r in the JSON stream, found %r' % (chars, char))
+        self.__pos += 1
+        return char
+
+    def __value(self):
+        """
+        Decodes the next value. A value ending exactly at the end of the
+        buffer is only accepted at the end of the stream, since a number may
+        continue in the next chunk.
+        """
+        self.__peek()
+        while True:
+            try:
+                value, end = self.__json.raw_decode(self.__buf, self.__pos)
+            except ValueError:
+                if not self.__fill():
+                    raise
+                continue
+            if end < len(self.__buf) or not self.__fill():
+                self.__pos = end
+                return value
+
+    def __items(self):
+        if self.__peek() == ']':
+            self.__pos += 1
+            return
+        while True:
+            yield self.__value()
+            if self.__expect(',]') == ']':
+                return
+
+    def __iter__(self):
+        if self.__expect('[{') == '[':
+            for item in self.__items():
+                yield item
+            return
+        if self.__peek() == '}':
+            self.__pos += 1
+            return
+        while True:
+            key = self.__value()
+            self.__expect(':')
+            if key == self.key and self.__peek() == '[':
+                self.__pos += 1
+                for item in self.__items():
+                    yield item
+            else:
+                self.meta[key] = self.__value()
+            if self.__expect(',}') == '}':
+                return
 
 
 class MultiPartOption(object):
@@ -214,6 +1834,15 @@ class RestClient(object):
         generation UI.
         verify: Boolean for SSL verification of requests.
         session: requests.Session object to execute requests
+        adapter: TetrationHTTPAdapter mounted on the session
+        latency_model: RouteLatencyModel with the observed response times
+        of every route template.
+        retry_policy: RetryPolicy deciding the sleep between retries
+        rate_limiter: RateLimiter shared with the other forks, or None
+        stats: dict of counters for the requests sent by this client
+        validators: ValidatorStore revalidating GET responses, or None
+        metrics: list of per-call records, None unless enabled with the
+        metrics argument
 
     Constants:
         SUPPORTED_METHODS: list of supported HTTP methods
@@ -222,9 +1851,13 @@ class RestClient(object):
     __MULTIPART_FILE_ID = 'file'
     __DEFAULT_MAX_RETRIES = 3
     __DEFAULT_TIMEOUT = 10
+    __DEFAULT_CONNECT_TIMEOUT = 5
+    __DEFAULT_POOL_SIZE = 10
     __RETRY_HTTP_CODES = [429, 502, 503, 504]
     __RETRY_METHODS = ['GET', 'PUT', 'DELETE']
-    __SLEEP_BETWEEN_RETRIES_SEC = 2
+    __THROTTLED_HTTP_CODE = 429
+    __STREAM_CHUNK_SIZE = 64 * 1024
+    __METRICS_MAX_CALLS = 10000
 
     SUPPORTED_METHODS = ['GET', 'PUT', 'POST', 'DELETE', 'PATCH']
 
@@ -260,6 +1893,41 @@ class RestClient(object):
                 api_key: String of hex API key provided by Tetration UI.
                 api_secret: String of hex API secret provided by Tetration UI.
                 max_retries: int for max retries for requests
+                timeout: Float of the read timeout in seconds
+                connect_timeout: Float of the connect timeout in seconds
+                adaptive_timeout: Boolean, derive the read timeout of each
+                route template from its observed latency
+                deadline: Float of seconds the whole task may spend talking
+                to the server, 0 or None to disable
+                retry_policy: RetryPolicy to use instead of building one from
+                the retry_* arguments below
+                retry_backoff: String backoff curve, see RetryPolicy
+                retry_base_delay: Float of the first retry delay in seconds
+                retry_max_delay: Float of the longest retry delay in seconds
+                retry_budget: Float of the total seconds a task may sleep
+                between retries, 0 to disable
+                rate_limit: Float of requests per second allowed across every
+                fork on the controller, 0 to disable
+                rate_limit_burst: Int of requests that may be sent at once
+                before the rate limit applies
+                rate_limit_file: String path of the file holding the shared
+                token bucket
+                pool_connections: Int of connection pools (hosts) to cache
+                pool_maxsize: Int of connections kept open per host
+                pool_block: Boolean, wait for a free connection instead of
+                opening one beyond pool_maxsize
+                keep_alive: Boolean, reuse connections between requests
+                tcp_keepalive: Int of idle seconds before TCP keep-alive probes
+                are sent on open connections, 0 to disable
+                compression: Boolean, ask the server for gzip/deflate encoded
+                responses
+                compress_requests: Boolean, gzip request bodies larger than
+                TETRATION_API_COMPRESSION_MIN_SIZE bytes
+                metrics: Boolean, keep a record of every call, see
+                get_metrics
+                conditional_get: Boolean, revalidate repeated GETs with the
+                ETag / Last-Modified validators of the previous response,
+                see ValidatorStore
         """
         self.server_endpoint = server_endpoint
         self.uri_prefix = '/openapi/' + kwargs.get('api_version', 'v1')
@@ -270,8 +1938,88 @@ class RestClient(object):
             self.api_key = kwargs.get('api_key', '').encode('ascii')
             self.api_secret = kwargs.get('api_secret', '').encode('ascii')
         self.verify = kwargs.get('verify', True)
+        self.adapter = TetrationHTTPAdapter(
+            pool_connections=int(kwargs.get('pool_connections') or self.__DEFAULT_POOL_SIZE),
+            pool_maxsize=int(kwargs.get('pool_maxsize') or self.__DEFAULT_POOL_SIZE),
+            pool_block=boolean(kwargs.get('pool_block', False), strict=False),
+            tcp_keepalive=int(kwargs.get('tcp_keepalive') or 0))
         self.session = requests.Session()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        if not boolean(kwargs.get('keep_alive', True), strict=False):
+            self.session.headers['Connection'] = 'close'
+        if boolean(kwargs.get('compression', True), strict=False):
+            self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        else:
+            self.session.headers['Accept-Encoding'] = 'identity'
+        self._local = threading.local()
+        self.compress_requests = boolean(kwargs.get('compress_requests', False), strict=False)
+        self.__signer = None
+        self.__last_timestamp = (None, None)
+        self.__header_template = self.session.headers.copy()
+        self.__header_template.update({
+            'Content-Type': 'application/json',
+            'User-Agent': 'Cisco Tetration Python client',
+            'Id': self.api_key
+        })
         self.retries = kwargs.get('max_retries', self.__DEFAULT_MAX_RETRIES)
+        self.timeout = float(kwargs.get('timeout') or self.__DEFAULT_TIMEOUT)
+        self.connect_timeout = float(
+            kwargs.get('connect_timeout') or self.__DEFAULT_CONNECT_TIMEOUT)
+        self.adaptive_timeout = boolean(kwargs.get('adaptive_timeout', False), strict=False)
+        self.latency_model = RouteLatencyModel()
+        deadline = float(kwargs.get('deadline') or 0)
+        self.deadline_at = time.monotonic() + deadline if deadline > 0 else None
+        self.retry_policy = kwargs.get('retry_policy') or RetryPolicy(
+            backoff=kwargs.get('retry_backoff') or 'decorrelated',
+            base_delay=kwargs.get('retry_base_delay') or 1.0,
+            max_delay=kwargs.get('retry_max_delay') or 30.0,
+            budget=kwargs.get('retry_budget', 60.0))
+        self.rate_limiter = None
+        rate_limit = float(kwargs.get('rate_limit') or 0)
+        if rate_limit > 0:
+            self.rate_limiter = RateLimiter(
+                rate_limit,
+                burst=kwargs.get('rate_limit_burst'),
+                state_file=kwargs.get('rate_limit_file') or RateLimiter.default_state_file(
+                    self.server_endpoint, self.api_key))
+        self.stats = self.__new_stats()
+        self.metrics = [] if boolean(kwargs.get('metrics') or False, strict=False) else None
+        self.validators = None
+        if boolean(kwargs.get('conditional_get') or False, strict=False):
+            self.validators = ValidatorStore(
+                max_entries=tetration_constants.TETRATION_API_REVALIDATE_MAX_ENTRIES,
+                max_bytes=tetration_constants.TETRATION_API_REVALIDATE_MAX_BYTES)
+        self.metrics_dropped = 0
+
+    @staticmethod
+    def __new_stats():
+        return {
+            'requests': 0,
+            'retries': 0,
+            'throttled': 0,
+            'retry_sleep_sec': 0.0,
+            'rate_limit_wait_sec': 0.0,
+            'bytes_sent': 0,
+            'bytes_received': 0,
+            'bytes_received_wire': 0
+        }
+
+    def begin_task(self, deadline=None):
+        """
+        Resets the per-task state of a client that is reused by another task,
+        as done by the turbo daemon. Sessions and caches are kept.
+
+        Args:
+            deadline: Float of seconds the new task may spend talking to the
+            server, 0 or None to disable
+        """
+        deadline = float(deadline or 0)
+        self.deadline_at = time.monotonic() + deadline if deadline > 0 else None
+        self.stats = self.__new_stats()
+        if self.metrics is not None:
+            self.metrics = []
+            self.metrics_dropped = 0
 
     def __add_auth_header(self, req):
         """
@@ -281,24 +2029,37 @@ class RestClient(object):
             req: requests.PreparedRequest for which to update the
             Authorization header.
         """
-        # The signature uses an AWS/Azure-like scheme.
-        signer = hmac.new(self.api_secret,
-                          digestmod=hashlib.sha256)
-        signer.update((req.method + '\n').encode('utf-8'))
-        signer.update((req.path_url + '\n').encode('utf-8'))
-        signer.update((req.headers.get('X-Tetration-Cksum', '') + '\n')
-                      .encode('utf-8'))
-        signer.update((req.headers.get('Content-Type', '') + '\n')
-                      .encode('utf-8'))
-        signer.update((req.headers.get('Timestamp', '') + '\n')
-                      .encode('utf-8'))
-        signature = base64.b64encode(signer.digest())
-        req.headers['Authorization'] = signature
+        # The signature uses an AWS/Azure-like scheme. The HMAC keyed with
+        # the secret is built once and copied for every request.
+        if self.__signer is None:
+            self.__signer = hmac.new(self.api_secret, digestmod=hashlib.sha256)
+        signer = self.__signer.copy()
+        signer.update(b''.join([
+            to_bytes(req.method), b'\n',
+            to_bytes(req.path_url), b'\n',
+            to_bytes(req.headers.get('X-Tetration-Cksum', '')), b'\n',
+            to_bytes(req.headers.get('Content-Type', '')), b'\n',
+            to_bytes(req.headers.get('Timestamp', '')), b'\n'
+        ]))
+        req.headers['Authorization'] = base64.b64encode(signer.digest())
+
+    def __timestamp(self):
+        """
+        Returns the Timestamp header value, formatted at most once a second.
+        """
+        now = int(time.time())
+        if self.__last_timestamp[0] != now:
+            # The time format is hardcoded with +0000 for the time offset.
+            # Use ISO 8601 standard?
+            self.__last_timestamp = (
+                now, time.strftime('%Y-%m-%dT%H:%M:%S+0000', time.gmtime(now)))
+        return self.__last_timestamp[1]
 
     def __add_custom_headers(self, req, checksum=True):
         """
         Adds custom headers to the request used by the backend for
-        validation.
+        validation. The static headers (User-Agent, Id, Content-Type) are
+        already part of the header template the request was built from.
 
         Args:
             req: requests.PreparedRequest for which to update the
@@ -310,15 +2071,37 @@ class RestClient(object):
             Nothing
         """
         if req.body and checksum and req.method in ['POST', 'PUT', 'DELETE']:
-            req.headers['X-Tetration-Cksum'] = (
-                hashlib.sha256(req.body.encode('utf-8')).hexdigest()
-            )
-        req.headers['User-Agent'] = 'Cisco Tetration Python client'
-        time_fmt = '%Y-%m-%dT%H:%M:%S+0000'
-        # The time format above is hardcoded with +0000 for the time offset.
-        # Use ISO 8601 standard?
-        req.headers['Timestamp'] = datetime.utcnow().strftime(time_fmt)
-        req.headers['Id'] = self.api_key
+            req.headers['X-Tetration-Cksum'] = hashlib.sha256(req.body).hexdigest()
+        req.headers['Timestamp'] = self.__timestamp()
+
+    def __compress_body(self, req):
+        """
+        Gzips the body of the requests.PreparedRequest when request
+        compression is enabled and the body is large enough to benefit.
+        The checksum header is computed afterwards over the bytes sent.
+        """
+        if not self.compress_requests or not req.body:
+            return
+        if len(req.body) < tetration_constants.TETRATION_API_COMPRESSION_MIN_SIZE:
+            return
+        req.body = gzip.compress(req.body)
+        req.headers['Content-Encoding'] = 'gzip'
+
+    def __count_transfer(self, req, response):
+        """
+        Adds the body sizes of one exchange to the transfer counters.
+        bytes_received is the decoded body, bytes_received_wire what actually
+        came over the network before decompression.
+        """
+        if req.body:
+            self.stats['bytes_sent'] += len(req.body)
+        received = len(response.content or b'')
+        self.stats['bytes_received'] += received
+        try:
+            wire = response.raw.tell()
+        except (AttributeError, ValueError):
+            wire = 0
+        self.stats['bytes_received_wire'] += wire or received
 
     def __load_credentials_from_file(self):
         """
@@ -356,33 +2139,344 @@ class RestClient(object):
         else:
             return self.uri_prefix + uri_path
 
-    def __send_request(self, req, retries, timeout):
+    def remaining_time(self):
+        """
+        Returns the seconds left before the task deadline, or None when no
+        deadline is set.
+        """
+        if self.deadline_at is None:
+            return None
+        return self.deadline_at - time.monotonic()
+
+    def request_timeout(self, route, timeout=None):
+        """
+        Works out the (connect, read) timeout tuple for the next attempt.
+
+        Args:
+            route: String route template of the request
+            timeout: Float read timeout requested by the caller, if any
+
+        Returns:
+            Tuple of floats (connect timeout, read timeout)
+        """
+        if timeout is None:
+            timeout = self.timeout
+            if self.adaptive_timeout:
+                timeout = self.latency_model.timeout_for(route, timeout)
+        connect_timeout = self.connect_timeout
+        remaining = self.remaining_time()
+        if remaining is not None:
+            if remaining <= 0:
+                raise TetrationDeadlineExceeded(
+                    'Task deadline exceeded before sending %s' % route)
+            timeout = min(timeout, remaining)
+            connect_timeout = min(connect_timeout, remaining)
+        return connect_timeout, timeout
+
+    def retries_for(self, http_method):
+        """
+        Returns the number of attempts allowed for an HTTP method; only
+        idempotent methods are retried.
+        """
+        if http_method in self.__RETRY_METHODS:
+            return max(self.retries, 1)
+        return 1
+
+    def begin_call(self, req, route):
+        """
+        Starts the metrics record of a call, made of one or more attempts.
+
+        Returns:
+            dict record to hand to the other methods for this call, None when
+            metrics are disabled
+        """
+        if self.metrics is None:
+            return None
+        return {
+            'method': req.method,
+            'route': route,
+            'status': None,
+            'started_at': round(time.time(), 3),
+            'latency_sec': time.monotonic(),
+            'bytes_sent': len(req.body or b''),
+            'bytes_received': 0,
+            'retries': 0,
+            'throttled': 0,
+            'retry_sleep_sec': 0.0
+        }
+
+    def end_call(self, call, response=None, error=None):
+        """
+        Completes the metrics record of a call and keeps it.
+
+        Args:
+            call: dict returned by begin_call, or None
+            response: final requests.Response of the call, if any
+            error: exception that ended the call, if any
+        """
+        if call is None:
+            return
+        call['latency_sec'] = round(time.monotonic() - call['latency_sec'], 4)
+        call['retry_sleep_sec'] = round(call['retry_sleep_sec'], 3)
+        if response is not None:
+            call['status'] = response.status_code
+        if error is not None:
+            call['error'] = type(error).__name__
+        if len(self.metrics) < self.__METRICS_MAX_CALLS:
+            self.metrics.append(call)
+        else:
+            self.metrics_dropped += 1
+
+    def get_metrics(self):
+        """
+        Returns the per-call records kept since the client was created or
+        the last begin_task, None when metrics are disabled.
+        """
+        if self.metrics is None:
+            return None
+        return {'calls': list(self.metrics), 'calls_dropped': self.metrics_dropped}
+
+    def begin_attempt(self, retry_count, route, call=None):
+        """
+        Counts one attempt and waits for the rate limiter, if any.
+
+        Args:
+            retry_count: Int index of the attempt, 0 for the first one
+            route: String route template of the request
+            call: metrics record of the call, see begin_call
+        """
+        if call is not None:
+            call['retries'] = retry_count
+        if retry_count:
+            self.stats['retries'] += 1
+        self.stats['requests'] += 1
+        if self.rate_limiter is not None:
+            self.wait_for_rate_limit(route)
+
+    def record_response(self, req, response, route, elapsed, stream=False, call=None):
+        """
+        Records a response received after `elapsed` seconds. The body of a
+        final streamed response is left unread and counted by iter_records.
+
+        Returns:
+            True when the response is final, False when it should be retried
+        """
+        self.latency_model.observe(route, elapsed)
+        final = response.status_code not in self.__RETRY_HTTP_CODES
+        if stream and final:
+            if req.body:
+                self.stats['bytes_sent'] += len(req.body)
+            # the body is counted in the record once it has been read
+            response.tetration_call = call
+        else:
+            self.__count_transfer(req, response)
+            if call is not None:
+                call['bytes_received'] += len(response.content or b'')
+        if response.status_code == self.__THROTTLED_HTTP_CODE:
+            self.stats['throttled'] += 1
+            if call is not None:
+                call['throttled'] += 1
+        return final
+
+    def __stream_body(self, response):
+        """
+        Yields the decoded body of a streamed response chunk by chunk and
+        counts it, closing the response when done or abandoned.
+        """
+        received = 0
+        try:
+            for chunk in response.iter_content(chunk_size=self.__STREAM_CHUNK_SIZE):
+                received += len(chunk)
+                yield chunk
+        finally:
+            self.stats['bytes_received'] += received
+            call = getattr(response, 'tetration_call', None)
+            if call is not None:
+                call['bytes_received'] += received
+            try:
+                wire = response.raw.tell()
+            except (AttributeError, ValueError):
+                wire = 0
+            self.stats['bytes_received_wire'] += wire or received
+            response.close()
+
+    def iter_records(self, response, key='results'):
+        """
+        Returns a JsonRecordStream over a response sent with stream=True,
+        decoding the items of `key` while the body is being downloaded.
+        """
+        return JsonRecordStream(self.__stream_body(response), key=key)
+
+    def next_retry_delay(self, retry_count, previous_delay, response, route):
+        """
+        Returns the seconds to sleep before the next attempt and accounts for
+        them, or None when the retry budget does not allow another attempt.
+
+        Args:
+            retry_count: Int index of the attempt that failed
+            previous_delay: Float delay slept before that attempt, if any
+            response: requests.Response of the failed attempt, None if the
+            attempt raised
+            route: String route template of the request
+
+        Raises:
+            TetrationDeadlineExceeded when the attempt raised and the task
+            deadline leaves no time for another one
+        """
+        delay = self.retry_policy.delay(
+            retry_count, previous_delay,
+            response.headers.get('Retry-After') if response is not None else None)
+        remaining = self.remaining_time()
+        out_of_time = remaining is not None and remaining <= delay
+        if out_of_time or not self.retry_policy.allows(delay, self.stats['retry_sleep_sec']):
+            if out_of_time and response is None:
+                raise TetrationDeadlineExceeded(
+                    'Task deadline exceeded while retrying %s' % route)
+            return None
+        self.stats['retry_sleep_sec'] += delay
+        return delay
+
+    def __send_request(self, req, retries, route, timeout=None, stream=False):
         """
          Retries a request `retries` times. Returns a requests.Response.
 
          Args:
              req: requests.Request object for the request
              retries: Number of times to retry the request
-             timeout: Float of timeout in seconds
+             route: String route template of the request
+             timeout: Float of timeout in seconds, None to use the client
+             defaults
+             stream: if True, the body of the final response is not read
 
          Returns:
              requests.Response object for the request
          """
+        call = self.begin_call(req, route)
+        try:
+            response = self.__send_attempts(req, retries, route, timeout, stream, call)
+        except Exception as exc:
+            self.end_call(call, error=exc)
+            raise
+        self.end_call(call, response)
+        return response
+
+    def __send_attempts(self, req, retries, route, timeout, stream, call):
         response = None
+        delay = None
         for retry_count in range(retries):
+            self.begin_attempt(retry_count, route, call)
+            started = time.monotonic()
             try:
-                response = self.session.send(req,
-                                             timeout=timeout,
-                                             verify=self.verify)
-            except requests.exceptions.RequestException:
+                response = getattr(self._local, 'session', self.session).send(
+                    req,
+                    timeout=self.request_timeout(route, timeout),
+                    verify=self.verify,
+                    stream=stream)
+            except TetrationDeadlineExceeded:
+                raise
+            except requests.exceptions.RequestException as exc:
                 if retry_count == retries - 1:
                     raise
+                response = None
+                error = exc
             else:
-                if response.status_code not in self.__RETRY_HTTP_CODES:
+                if self.record_response(req, response, route, time.monotonic() - started, stream, call):
+                    return response
+            if retry_count == retries - 1:
+                break
+            delay = self.next_retry_delay(retry_count, delay, response, route)
+            if delay is None:
+                if response is not None:
                     return response
-            time.sleep(self.__SLEEP_BETWEEN_RETRIES_SEC)
+                raise error
+            if call is not None:
+                call['retry_sleep_sec'] += delay
+            time.sleep(delay)
         return response
 
+    def bind_thread_session(self):
+        """
+        Gives the calling thread a requests.Session of its own, used for
+        every request the thread sends from then on, as requests.Session is
+        not safe to share between threads. The connections it opens are
+        counted in the pool statistics of the client.
+
+        Returns:
+            requests.Session bound to the thread, closed by the caller once
+            the thread is done
+        """
+        adapter = TetrationHTTPAdapter(
+            tcp_keepalive=self.adapter.tcp_keepalive,
+            shared_stats=self.adapter,
+            pool_connections=1,
+            pool_maxsize=1)
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers = self.session.headers.copy()
+        self._local.session = session
+        return session
+
+    def wait_for_rate_limit(self, route):
+        """
+        Blocks until the shared rate limiter lets the next request through.
+
+        Args:
+            route: String route template of the request
+        """
+        waited = self.rate_limiter.acquire(max_wait=self.remaining_time())
+        if waited is None:
+            raise TetrationDeadlineExceeded(
+                'Task deadline exceeded while waiting for the rate limiter on %s' % route)
+        self.stats['rate_limit_wait_sec'] += waited
+
+    def get_stats(self):
+        """
+        Returns a copy of the client counters suitable for a module result.
+        """
+        stats = dict(self.stats)
+        stats['retry_sleep_sec'] = round(stats['retry_sleep_sec'], 3)
+        stats['rate_limit_wait_sec'] = round(stats['rate_limit_wait_sec'], 3)
+        if self.validators is not None:
+            stats['not_modified'] = self.validators.stats['not_modified']
+            stats['unchanged'] = self.validators.stats['unchanged']
+        stats['pool'] = dict(self.adapter.pool_stats)
+        stats['pool']['connection_wait_sec'] = round(stats['pool']['connection_wait_sec'], 3)
+        return stats
+
+    def prepare_signed_request(self, http_method, uri_path, params=None, json_body=''):
+        """
+        Builds a signed requests.PreparedRequest ready to be sent.
+
+        The request is built from a copy of the static header template
+        instead of going through requests.Session.prepare_request, and the
+        body is encoded once; the same bytes are hashed for the checksum and
+        sent on the wire.
+
+        Args:
+            http_method: String HTTP method like 'GET', 'PUT', 'POST', ...
+            uri_path: String URI path including the API prefix
+            params: Additional dictionary of query parameters
+            json_body: String or bytes JSON body
+
+        Returns:
+            requests.PreparedRequest object
+        """
+        body = to_bytes(json_body) if json_body else None
+        req = requests.PreparedRequest()
+        req.prepare_method(http_method)
+        req.prepare_url(urljoin(self.server_endpoint, uri_path), params)
+        req.headers = self.__header_template.copy()
+        req.body = body
+        self.__compress_body(req)
+        if req.body:
+            req.headers['Content-Length'] = str(len(req.body))
+        elif req.method not in ('GET', 'HEAD'):
+            req.headers['Content-Length'] = '0'
+        self.__add_custom_headers(req)
+        self.__add_auth_header(req)
+        return req
+
     def signed_http_request(self, http_method, uri_path, args=None):
         """
         Send a signed http request to the server. Returns a requests.Response.
@@ -394,6 +2488,7 @@ class RestClient(object):
                 "params": Additional dictionary of parameters for GET and PUT
                 "json_body": String JSON body
                 "timeout": Float of timeout in seconds
+                "stream": if True, leave the body unread for iter_records
 
         Returns:
             requests.Response object for the request
@@ -407,22 +2502,23 @@ class RestClient(object):
             return None
 
         args = {} if args is None else args
-        params = args.get('params')
-        json_body = args.get('json_body', '')
-        timeout = args.get('timeout', self.__DEFAULT_TIMEOUT)
-        unprep_req = requests.Request(
-            http_method,
-            urljoin(self.server_endpoint, uri_path),
-            params=params,
-            data=json_body)
-        req = self.session.prepare_request(unprep_req)
-        req.headers['Content-Type'] = 'application/json'
-        self.__add_custom_headers(req)
-        self.__add_auth_header(req)
-        retries = 1
-        if http_method in self.__RETRY_METHODS:
-            retries = max(self.retries, 1)
-        return self.__send_request(req, retries, timeout)
+        timeout = args.get('timeout')
+        req = self.prepare_signed_request(
+            http_method, uri_path,
+            params=args.get('params'),
+            json_body=args.get('json_body', ''))
+        route = route_template(uri_path, self.uri_prefix)
+        stream = bool(args.get('stream'))
+        # streamed pages are not kept, there is nothing to revalidate them with
+        conditional = self.validators is not None and http_method == 'GET' and not stream
+        if conditional:
+            # not part of the signature, added once the request is signed
+            req.headers.update(self.validators.conditional_headers(req.url))
+        response = self.__send_request(
+            req, self.retries_for(http_method), route, timeout, stream)
+        if conditional and response is not None:
+            response = self.validators.update(req.url, response)
+        return response
 
     def get(self, uri_path='', **kwargs):
         """
@@ -492,3 +2588,273 @@ class RestClient(object):
         return self.signed_http_request(
             http_method='DELETE', uri_path=self.__prefix_path(uri_path),
             args=kwargs)
+
+
+class AsyncRestClient(object):
+    """
+    asyncio front end of a RestClient, used to issue many independent calls
+    concurrently from a single task.
+
+    Requests are built and signed by the wrapped RestClient and go through
+    the same retry policy, rate limiter, deadline and counters. With aiohttp
+    installed they are sent on an aiohttp session; otherwise each request
+    runs the blocking RestClient on a thread of a bounded executor, every
+    thread with a session of its own (see RestClient.bind_thread_session).
+
+    Attributes:
+        rc: RestClient used to sign requests and keep the counters
+        concurrency: Int of requests allowed in flight at the same time
+    """
+
+    def __init__(self, rest_client, concurrency=10):
+        self.rc = rest_client
+        self.concurrency = max(int(concurrency or 1), 1)
+        self._semaphore = None
+        self._session = None
+        self._executor = None
+        self._thread_sessions = []
+        self._thread_sessions_lock = threading.Lock()
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        if HAS_AIOHTTP:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.concurrency, ssl=self.__ssl_option()))
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.concurrency, initializer=self.__bind_thread_session)
+        return self
+
+    def __bind_thread_session(self):
+        session = self.rc.bind_thread_session()
+        with self._thread_sessions_lock:
+            self._thread_sessions.append(session)
+
+    async def __aexit__(self, *exc_info):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            for session in self._thread_sessions:
+                session.close()
+            self._thread_sessions = []
+
+    def __ssl_option(self):
+        if self.rc.verify is False:
+            return False
+        if isinstance(self.rc.verify, str):
+            import ssl
+            return ssl.create_default_context(cafile=self.rc.verify)
+        return None
+
+    async def signed_http_request(self, http_method, uri_path, args=None):
+        """
+        Sends a signed http request to the server. Returns a
+        requests.Response, see RestClient.signed_http_request.
+        """
+        async with self._semaphore:
+            if self._session is None:
+                loop = asyncio.get_event_loop()
+                return await loop.run_in_executor(self._executor, functools.partial(
+                    self.rc.signed_http_request, http_method, uri_path, args))
+            return await self.__send(http_method, uri_path, args or {})
+
+    async def __send(self, http_method, uri_path, args):
+        if http_method not in self.rc.SUPPORTED_METHODS:
+            warnings.warn('HTTP method "%s" is unsupported. Returning None' %
+                          http_method)
+            return None
+        req = self.rc.prepare_signed_request(
+            http_method, uri_path,
+            params=args.get('params'),
+            json_body=args.get('json_body', ''))
+        route = route_template(uri_path, self.rc.uri_prefix)
+        call = self.rc.begin_call(req, route)
+        try:
+            response = await self.__send_attempts(req, route, args, call)
+        except Exception as exc:
+            self.rc.end_call(call, error=exc)
+            raise
+        self.rc.end_call(call, response)
+        return response
+
+    async def __send_attempts(self, req, route, args, call):
+        retries = self.rc.retries_for(req.method)
+        loop = asyncio.get_event_loop()
+        response = None
+        delay = None
+        for retry_count in range(retries):
+            if self.rc.rate_limiter is not None:
+                # the limiter may sleep, keep the event loop running
+                await loop.run_in_executor(
+                    None, self.rc.begin_attempt, retry_count, route, call)
+            else:
+                self.rc.begin_attempt(retry_count, route, call)
+            started = time.monotonic()
+            try:
+                response = await self.__attempt(
+                    req, self.rc.request_timeout(route, args.get('timeout')))
+            except TetrationDeadlineExceeded:
+                raise
+            except requests.exceptions.RequestException as exc:
+                if retry_count == retries - 1:
+                    raise
+                response = None
+                error = exc
+            else:
+                if self.rc.record_response(req, response, route, time.monotonic() - started, call=call):
+                    return response
+            if retry_count == retries - 1:
+                break
+            delay = self.rc.next_retry_delay(retry_count, delay, response, route)
+            if delay is None:
+                if response is not None:
+                    return response
+                raise error
+            if call is not None:
+                call['retry_sleep_sec'] += delay
+            await asyncio.sleep(delay)
+        return response
+
+    async def __attempt(self, req, timeout):
+        """
+        Sends a prepared request once on the aiohttp session and converts
+        the reply to a requests.Response, mapping aiohttp errors to the
+        requests exceptions RestClient raises.
+        """
+        headers = dict((k, to_text(v)) for k, v in req.headers.items()
+                       if k.lower() != 'content-length')
+        try:
+            async with self._session.request(
+                    req.method, req.url, data=req.body, headers=headers,
+                    timeout=aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])) as reply:
+                content = await reply.read()
+        except asyncio.TimeoutError as exc:
+            raise requests.exceptions.Timeout(to_text(exc) or 'Request to %s timed out' % req.url)
+        except aiohttp.ClientError as exc:
+            raise requests.exceptions.ConnectionError(to_text(exc))
+        response = requests.Response()
+        response.status_code = reply.status
+        response.reason = reply.reason
+        response.url = req.url
+        response.request = req
+        response.headers.update(reply.headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response._content = content
+        return response
+
+    async def gather(self, calls):
+        """
+        Sends every call with at most `concurrency` of them in flight.
+
+        Args:
+            calls: list of (http_method, uri_path, args) tuples
+
+        Returns:
+            list of requests.Response, in the order of `calls`
+        """
+        return await asyncio.gather(*[
+            self.signed_http_request(http_method, uri_path, args)
+            for http_method, uri_path, args in calls])
+
+
+class TurboRestClient(object):
+    """
+    Stands in for RestClient when the provider enables turbo mode.
+
+    Requests are forwarded to a long-lived daemon on the controller (see
+    tetration_turbo) that hosts warm RestClient instances, so the module
+    process skips building a session and the TLS handshake.
+
+    Attributes:
+        uri_prefix: String prefix of URI Path
+        sock: socket connected to the turbo daemon
+    """
+
+    def __init__(self, provider):
+        self.uri_prefix = '/openapi/' + (provider.get('api_version') or 'v1')
+        self._lock = threading.Lock()
+        self.sock = tetration_turbo.connect(
+            provider,
+            client_factory=lambda: RestClient(**provider),
+            begin_task=lambda client, deadline: client.begin_task(deadline),
+            idle_timeout=int(provider.get('turbo_idle_timeout') or 300))
+        self.__call({'op': 'begin', 'deadline': provider.get('deadline')})
+
+    def __call(self, message):
+        with self._lock:
+            try:
+                tetration_turbo.send_message(self.sock, message)
+                reply = tetration_turbo.recv_message(self.sock)
+            except EnvironmentError as exc:
+                raise tetration_turbo.TurboError('turbo daemon connection failed: %s' % exc)
+        if reply is None:
+            raise tetration_turbo.TurboError('turbo daemon closed the connection')
+        error = reply.get('error')
+        if error:
+            if error['type'] == TetrationDeadlineExceeded.__name__:
+                raise TetrationDeadlineExceeded(error['message'])
+            raise requests.exceptions.RequestException(
+                '%s: %s' % (error['type'], error['message']))
+        return reply
+
+    def __prefix_path(self, uri_path):
+        if uri_path.startswith(self.uri_prefix):
+            return uri_path
+        else:
+            return self.uri_prefix + uri_path
+
+    def signed_http_request(self, http_method, uri_path, args=None):
+        """
+        Sends a signed http request through the turbo daemon. Returns a
+        requests.Response, see RestClient.signed_http_request.
+        """
+        # the daemon sends whole bodies, there is nothing to stream
+        args = dict((k, v) for k, v in (args or {}).items() if k != 'stream')
+        if isinstance(args.get('json_body'), bytes):
+            args['json_body'] = to_text(args['json_body'])
+        reply = self.__call({
+            'op': 'request',
+            'method': http_method,
+            'uri_path': uri_path,
+            'args': args
+        })
+        if reply['response'] is None:
+            return None
+        return tetration_turbo.decode_response(reply['response'], requests.Response)
+
+    def iter_records(self, response, key='results'):
+        """
+        Returns a JsonRecordStream over a response, see
+        RestClient.iter_records.
+        """
+        return JsonRecordStream(response.iter_content(chunk_size=64 * 1024), key=key)
+
+    def get_stats(self):
+        """
+        Returns the counters of the daemon client serving this task.
+        """
+        return self.__call({'op': 'stats'})['stats']
+
+    def get_metrics(self):
+        """
+        Returns the per-call records of the daemon client serving this
+        task, see RestClient.get_metrics.
+        """
+        return self.__call({'op': 'metrics'})['metrics']
+
+    def get(self, uri_path='', **kwargs):
+        return self.signed_http_request('GET', self.__prefix_path(uri_path), args=kwargs)
+
+    def post(self, uri_path='', **kwargs):
+        return self.signed_http_request('POST', self.__prefix_path(uri_path), args=kwargs)
+
+    def put(self, uri_path='', **kwargs):
+        return self.signed_http_request('PUT', self.__prefix_path(uri_path), args=kwargs)
+
+    def delete(self, uri_path='', **kwargs):
+        return self.signed_http_request('DELETE', self.__prefix_path(uri_path), args=kwargs)
@@ -22,13 +22,72 @@ TETRATION_API_FAILURE_CODES_THAT_RETURN_DATA = [422]
 
 TETRATION_API_PAGINATION_SIZE = 100
 
+# Reference collections whose GET may be cached on the controller between
+# tasks, see the cache_ttl provider option
+TETRATION_API_CACHED_ROUTES = [
+    TETRATION_API_SCOPES,
+    TETRATION_API_ROLE,
+    TETRATION_API_INVENTORY_FILTER,
+    TETRATION_API_AGENT_CONFIG_PROFILES,
+    TETRATION_API_APPLICATIONS,
+]
+
+# Collections whose DELETE only disables the object, which is still listed
+TETRATION_API_SOFT_DELETE = [TETRATION_API_USER]
+
+# Object fields the OpenAPI filters on itself when they are passed as query
+# parameters to the GET of the collection. Unlike the filters get_object
+# applies on the client, the server leaves out the objects missing the field.
+TETRATION_API_SERVER_FILTERS = {
+    TETRATION_API_SCOPES: ['root_app_scope_id'],
+    TETRATION_API_ROLE: ['app_scope_id'],
+    TETRATION_API_USER: ['app_scope_id'],
+    TETRATION_API_INVENTORY_FILTER: ['root_app_scope_id'],
+}
+
+# Bounds of the GET responses a client keeps to revalidate them with their
+# ETag / Last-Modified validators, see the conditional_get provider option
+TETRATION_API_REVALIDATE_MAX_ENTRIES = 256
+TETRATION_API_REVALIDATE_MAX_BYTES = 32 * 1024 * 1024
+
+# Request bodies smaller than this are not worth compressing
+TETRATION_API_COMPRESSION_MIN_SIZE = 1024
+
 TETRATION_PROVIDER_SPEC = {
     'server_endpoint': dict(type='str', required=True, aliases=['endpoint', 'host']),
     'api_key': dict(type='str', required=True),
     'api_secret': dict(type='str', required=True, no_log=True),
     'verify': dict(type='bool', default=False),
     'timeout': dict(type='int', default=10),
+    'connect_timeout': dict(type='float', default=5),
+    'adaptive_timeout': dict(type='bool', default=False),
+    'deadline': dict(type='int', default=0),
     'max_retries': dict(type='int', default=3),
+    'retry_backoff': dict(type='str', default='decorrelated',
+                          choices=['constant', 'linear', 'exponential', 'decorrelated']),
+    'retry_base_delay': dict(type='float', default=1.0),
+    'retry_max_delay': dict(type='float', default=30.0),
+    'retry_budget': dict(type='float', default=60.0),
+    'rate_limit': dict(type='float', default=0),
+    'rate_limit_burst': dict(type='int', required=False),
+    'rate_limit_file': dict(type='path', required=False),
+    'pool_connections': dict(type='int', default=10),
+    'pool_maxsize': dict(type='int', default=10),
+    'pool_block': dict(type='bool', default=False),
+    'keep_alive': dict(type='bool', default=True),
+    'tcp_keepalive': dict(type='int', default=0),
+    'compression': dict(type='bool', default=True),
+    'compress_requests': dict(type='bool', default=False),
+    'turbo': dict(type='bool', default=False),
+    'turbo_idle_timeout': dict(type='int', default=300),
+    'concurrency': dict(type='int', default=10),
+    'prefetch_depth': dict(type='int', default=0),
+    'memoize': dict(type='bool', default=True),
+    'cache_ttl': dict(type='int', default=0),
+    'cache_dir': dict(type='path', required=False),
+    'json_codec': dict(type='str', default='auto', choices=['auto', 'orjson', 'ujson', 'json']),
+    'metrics': dict(type='bool', default=False),
+    'conditional_get': dict(type='bool', default=False),
     'api_version': dict(type='str', default='v1')
 }
 
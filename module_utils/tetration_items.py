@@ -0,0 +1,45 @@
+# This file contains the base of the action plugins of the tetration modules
+# accepting an `items` list.  It runs on the controller, no module imports it.
+
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.errors import AnsibleActionFail
+from ansible.module_utils.common._collections_compat import Mapping
+from ansible.plugins.action import ActionBase
+
+
+class TetrationItemsAction(ActionBase):
+    '''
+    Action of the modules accepting an `items` list: the whole list is sent
+    to a single run of the module, which shares its client between the
+    items, and the per-item results are returned like those of a loop.
+
+    Items may be given as plain values, which are taken as the ITEM_KEY
+    option of the module, such as a list of email addresses.
+    '''
+
+    ITEM_KEY = None
+
+    def run(self, tmp=None, task_vars=None):
+        result = super(TetrationItemsAction, self).run(tmp, task_vars)
+        del tmp
+
+        module_args = dict(self._task.args)
+        items = module_args.get('items')
+        if items is not None:
+            if not isinstance(items, list):
+                raise AnsibleActionFail('items must be a list, got %s' % type(items).__name__)
+            if not items:
+                result.update(changed=False, results=[], msg='No items')
+                return result
+            module_args['items'] = [
+                item if isinstance(item, Mapping) or self.ITEM_KEY is None else {self.ITEM_KEY: item}
+                for item in items]
+
+        result.update(self._execute_module(module_args=module_args, task_vars=task_vars))
+        if items is not None:
+            for item, item_result in zip(items, result.get('results') or []):
+                item_result['item'] = item
+                item_result['ansible_loop_var'] = 'item'
+        return result
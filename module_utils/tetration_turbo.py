@@ -0,0 +1,301 @@
+# This file contains the "turbo" worker used by the tetration modules.
+#
+# Every Ansible task runs a module in a fresh Python process, which pays for
+# the imports, a new requests.Session and a full TLS handshake before doing
+# any real work.  When turbo is enabled the first module of a play starts a
+# small daemon on the controller that keeps RestClient instances (and their
+# sessions and caches) warm, and every later module sends its requests to
+# that daemon over a Unix socket.  The daemon exits on its own once it has
+# been idle for `idle_timeout` seconds.
+
+import os
+import json
+import time
+import errno
+import socket
+import struct
+import base64
+import hashlib
+import stat
+import threading
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+_HEADER = struct.Struct('!I')
+_SPAWN_WAIT_SEC = 10
+
+
+class TurboError(Exception):
+    ''' Raised when the turbo daemon cannot be reached or fails a request '''
+
+
+def daemon_key(provider):
+    '''Returns the key of the daemon serving a provider
+
+    Every provider option (endpoint, credentials, timeouts, ...) is part of
+    the key, so tasks with different settings never share a client.
+    '''
+    options = dict((k, v) for k, v in provider.items() if not k.startswith('turbo'))
+    encoded = json.dumps(options, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:24]
+
+
+def user_tmp_dir(name):
+    ''' Returns the path of a directory under ~/.ansible/tmp, which only the controller user can write to '''
+    return os.path.join(os.path.expanduser('~'), '.ansible', 'tmp', name)
+
+
+def socket_path(key):
+    return os.path.join(user_tmp_dir('tetration-turbo'), '%s.sock' % key)
+
+
+def _check_private(path, forbidden_mode):
+    ''' Raises TurboError unless path belongs to the current user and has none of the forbidden_mode bits '''
+    st = os.lstat(path)
+    if st.st_uid != os.getuid() or st.st_mode & forbidden_mode:
+        raise TurboError('%s is not private to the current user' % path)
+
+
+def send_message(sock, message):
+    data = json.dumps(message).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock):
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    data = _recv_exactly(sock, _HEADER.unpack(header)[0])
+    if data is None:
+        return None
+    return json.loads(data.decode('utf-8'))
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def encode_response(response):
+    ''' Serializes the parts of a requests.Response used by the modules '''
+    return {
+        'status_code': response.status_code,
+        'reason': response.reason,
+        'url': response.url,
+        'headers': dict(response.headers),
+        'content': base64.b64encode(response.content).decode('ascii'),
+        'encoding': response.encoding
+    }
+
+
+def decode_response(message, response_class):
+    ''' Rebuilds a response_class (requests.Response) from encode_response '''
+    response = response_class()
+    response.status_code = message['status_code']
+    response.reason = message['reason']
+    response.url = message['url']
+    response.headers.update(message['headers'])
+    response.encoding = message['encoding']
+    response._content = base64.b64decode(message['content'])
+    return response
+
+
+class _TurboHandler(socketserver.BaseRequestHandler):
+    ''' Serves one module process for the lifetime of its connection '''
+
+    def handle(self):
+        server = self.server
+        client = server.checkout()
+        try:
+            while True:
+                message = recv_message(self.request)
+                if message is None:
+                    return
+                server.touch()
+                send_message(self.request, server.dispatch(client, message))
+        finally:
+            server.checkin(client)
+            server.touch()
+
+
+class TurboServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    '''
+    Unix socket server hosting a pool of warm clients.
+
+    Each connection (one module task) checks out a client for its whole
+    lifetime, so per-task state like the deadline and the counters never
+    leaks between concurrent tasks, while sessions and caches are reused by
+    the tasks that follow.
+    '''
+    daemon_threads = True
+
+    def __init__(self, path, client_factory, begin_task, idle_timeout):
+        self.client_factory = client_factory
+        self.begin_task = begin_task
+        self.idle_timeout = idle_timeout
+        self.pool = []
+        self.active = 0
+        self.last_activity = time.time()
+        self.lock = threading.Lock()
+        old_umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.__init__(self, path, _TurboHandler)
+        finally:
+            os.umask(old_umask)
+
+    def touch(self):
+        self.last_activity = time.time()
+
+    def checkout(self):
+        with self.lock:
+            self.active += 1
+            if self.pool:
+                return self.pool.pop()
+        return self.client_factory()
+
+    def checkin(self, client):
+        with self.lock:
+            self.active -= 1
+            self.pool.append(client)
+
+    def dispatch(self, client, message):
+        try:
+            if message['op'] == 'begin':
+                self.begin_task(client, message.get('deadline'))
+                return {'ok': True}
+            if message['op'] == 'stats':
+                return {'stats': client.get_stats()}
+            if message['op'] == 'metrics':
+                return {'metrics': client.get_metrics()}
+            response = client.signed_http_request(
+                message['method'], message['uri_path'], args=message.get('args'))
+            if response is None:
+                return {'response': None}
+            return {'response': encode_response(response)}
+        except Exception as exc:
+            return {'error': {'type': type(exc).__name__, 'message': str(exc)}}
+
+    def idle(self):
+        with self.lock:
+            return not self.active and time.time() - self.last_activity > self.idle_timeout
+
+
+def _serve(path, client_factory, begin_task, idle_timeout):
+    server = TurboServer(path, client_factory, begin_task, idle_timeout)
+    worker = threading.Thread(target=server.serve_forever)
+    worker.daemon = True
+    worker.start()
+    try:
+        while not server.idle():
+            time.sleep(1)
+    finally:
+        server.shutdown()
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+def _spawn(path, client_factory, begin_task, idle_timeout):
+    '''
+    Starts the daemon in a detached grandchild of the current process.
+
+    The grandchild closes the standard streams it inherited, otherwise Ansible
+    would keep waiting for the module output until the daemon exits.
+    '''
+    pid = os.fork()
+    if pid:
+        os.waitpid(pid, 0)
+        return
+    try:
+        os.setsid()
+        if os.fork():
+            os._exit(0)
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        os.chdir('/')
+        _serve(path, client_factory, begin_task, idle_timeout)
+    finally:
+        os._exit(0)
+
+
+def _connect(path):
+    # the requests sent to the daemon carry the API credentials
+    if os.path.lexists(path):
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            raise TurboError('%s is not a socket' % path)
+        _check_private(path, 0o077)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error:
+        sock.close()
+        raise
+    return sock
+
+
+def connect(provider, client_factory, begin_task, idle_timeout=300):
+    '''
+    Returns a socket connected to the daemon serving `provider`, starting the
+    daemon first when none is running.
+
+    Args:
+        provider: dict of provider options, used to key the daemon
+        client_factory: callable returning a new client for the daemon pool
+        begin_task: callable(client, deadline) resetting a client for a task
+        idle_timeout: Int of seconds after which an idle daemon exits
+
+    Raises:
+        TurboError when no daemon could be reached
+    '''
+    if not HAS_FCNTL or not hasattr(os, 'fork'):
+        raise TurboError('turbo mode requires a POSIX controller')
+    path = socket_path(daemon_key(provider))
+    old_umask = os.umask(0o077)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    finally:
+        os.umask(old_umask)
+    _check_private(os.path.dirname(path), 0o022)
+    try:
+        return _connect(path)
+    except socket.error:
+        pass
+
+    # Only one fork may start the daemon, the others wait for its socket
+    lock_fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        try:
+            return _connect(path)
+        except socket.error as exc:
+            if exc.errno == errno.ECONNREFUSED:
+                # left behind by a daemon that did not shut down cleanly
+                os.unlink(path)
+        _spawn(path, client_factory, begin_task, idle_timeout)
+        give_up_at = time.time() + _SPAWN_WAIT_SEC
+        while time.time() < give_up_at:
+            try:
+                return _connect(path)
+            except socket.error:
+                time.sleep(0.05)
+        raise TurboError('turbo daemon did not start listening on %s' % path)
+    finally:
+        os.close(lock_fd)
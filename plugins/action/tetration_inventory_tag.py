@@ -0,0 +1,21 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+
+import ansible.module_utils
+from ansible.plugins.loader import module_utils_loader
+
+# The base action is kept in module_utils, where ansible does not look for
+# actions; it is imported on the controller from the configured directory
+_TETRATION_UTILS = module_utils_loader.find_plugin('tetration_items')
+if _TETRATION_UTILS and os.path.dirname(_TETRATION_UTILS) not in ansible.module_utils.__path__:
+    ansible.module_utils.__path__.append(os.path.dirname(_TETRATION_UTILS))
+
+from ansible.module_utils.tetration_items import TetrationItemsAction
+
+
+class ActionModule(TetrationItemsAction):
+    ''' Runs tetration_inventory_tag once for a whole list of items, see its items option '''
+
+    ITEM_KEY = 'ip_address'
@@ -0,0 +1,205 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+name: tetration_metrics
+type: aggregate
+short_description: Summarizes the Tetration API calls made by the modules of a play
+description:
+  - Collects the C(tetration_metrics) records returned by the Tetration modules
+    and, at the end of the playbook, prints for every play the number of calls,
+    the latency percentiles, the bytes transferred, the retries and the 429
+    responses per route template, and the time each module spent talking to
+    the cluster.
+  - Writes every call to an NDJSON timeline file, one JSON object per line
+    with the play, task, host and module that made it.
+  - Only modules run with metrics enabled report their calls, see the
+    C(metrics) provider option and C(enable_module_metrics).
+requirements:
+  - enable in configuration
+options:
+  timeline_path:
+    description:
+      - File the timeline of the calls is written to, replaced at the start of
+        every playbook
+      - Set to an empty string to not write a timeline
+    type: path
+    default: tetration_metrics.ndjson
+    env:
+      - name: TETRATION_METRICS_TIMELINE
+    ini:
+      - section: callback_tetration_metrics
+        key: timeline_path
+  enable_module_metrics:
+    description:
+      - Set the C(TETRATION_METRICS) environment variable of the controller so
+        the modules run locally report their calls without changing their
+        C(provider)
+    type: bool
+    default: true
+    env:
+      - name: TETRATION_METRICS_ENABLE_MODULES
+    ini:
+      - section: callback_tetration_metrics
+        key: enable_module_metrics
+  top_routes:
+    description: Number of route templates listed in the summary, the slowest first
+    type: int
+    default: 20
+    ini:
+      - section: callback_tetration_metrics
+        key: top_routes
+'''
+
+import json
+import math
+import os
+
+from collections import defaultdict
+
+from ansible.module_utils._text import to_text
+from ansible.plugins.callback import CallbackBase
+
+
+def percentile(ordered, percent):
+    ''' Returns the nearest-rank percentile of a sorted list, 0 when empty '''
+    if not ordered:
+        return 0
+    rank = int(math.ceil(percent / 100.0 * len(ordered)))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class CallAggregate(object):
+    ''' Totals of the calls made to one route template or by one module '''
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.throttled = 0
+        self.retry_sleep_sec = 0.0
+
+    def add(self, call):
+        self.latencies.append(float(call.get('latency_sec') or 0))
+        status = call.get('status')
+        if status is None or status >= 400:
+            self.errors += 1
+        self.bytes_sent += call.get('bytes_sent') or 0
+        self.bytes_received += call.get('bytes_received') or 0
+        self.retries += call.get('retries') or 0
+        self.throttled += call.get('throttled') or 0
+        self.retry_sleep_sec += call.get('retry_sleep_sec') or 0
+
+    @property
+    def total_sec(self):
+        return sum(self.latencies)
+
+
+class PlayMetrics(object):
+    ''' Calls made by the modules of one play '''
+
+    def __init__(self, name):
+        self.name = name
+        self.routes = defaultdict(CallAggregate)
+        self.modules = defaultdict(CallAggregate)
+        self.module_tasks = defaultdict(int)
+        self.calls_dropped = 0
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'tetration_metrics'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self.timeline = None
+        self.plays = []
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(CallbackModule, self).set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+        if self.get_option('enable_module_metrics'):
+            os.environ.setdefault('TETRATION_METRICS', 'true')
+
+    def v2_playbook_on_start(self, playbook):
+        path = self.get_option('timeline_path')
+        if path:
+            try:
+                self.timeline = open(path, 'w')
+            except (IOError, OSError) as exc:
+                self._display.warning('tetration_metrics: unable to write the timeline to %s: %s' % (
+                    path, to_text(exc)))
+
+    def v2_playbook_on_play_start(self, play):
+        self.plays.append(PlayMetrics(play.get_name()))
+
+    def __record(self, result):
+        metrics_list = []
+        if isinstance(result._result.get('tetration_metrics'), dict):
+            metrics_list.append(result._result['tetration_metrics'])
+        for item in result._result.get('results') or []:
+            if isinstance(item, dict) and isinstance(item.get('tetration_metrics'), dict):
+                metrics_list.append(item['tetration_metrics'])
+        if not metrics_list:
+            return
+        if not self.plays:
+            self.plays.append(PlayMetrics(None))
+        play = self.plays[-1]
+
+        module = result._task.action
+        play.module_tasks[module] += 1
+        for metrics in metrics_list:
+            play.calls_dropped += metrics.get('calls_dropped') or 0
+            for call in metrics.get('calls') or []:
+                play.routes[(call.get('method'), call.get('route'))].add(call)
+                play.modules[module].add(call)
+                if self.timeline is not None:
+                    line = dict(call, play=play.name, task=result._task.get_name(),
+                                host=result._host.get_name(), module=module)
+                    self.timeline.write(json.dumps(line, sort_keys=True) + '\n')
+        if self.timeline is not None:
+            self.timeline.flush()
+
+    def v2_runner_on_ok(self, result):
+        self.__record(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self.__record(result)
+
+    def __summarize(self, play):
+        display = self._display.display
+        top_routes = self.get_option('top_routes')
+        self._display.banner('TETRATION API CALLS [%s]' % (play.name or 'play'))
+        display('%-7s %-44s %7s %6s %9s %9s %9s %10s %10s %7s %5s' % (
+            'method', 'route', 'calls', 'errors', 'p50 ms', 'p90 ms', 'p99 ms',
+            'sent KB', 'recv KB', 'retries', '429'))
+        ordered = sorted(play.routes.items(), key=lambda item: -item[1].total_sec)
+        for (method, route), calls in ordered[:top_routes]:
+            latencies = sorted(calls.latencies)
+            display('%-7s %-44s %7d %6d %9.1f %9.1f %9.1f %10.1f %10.1f %7d %5d' % (
+                method, route, len(latencies), calls.errors,
+                percentile(latencies, 50) * 1000, percentile(latencies, 90) * 1000,
+                percentile(latencies, 99) * 1000, calls.bytes_sent / 1024.0,
+                calls.bytes_received / 1024.0, calls.retries, calls.throttled))
+        if len(ordered) > top_routes:
+            display('... %d more routes' % (len(ordered) - top_routes))
+
+        display('')
+        display('%-44s %7s %7s %12s %12s' % ('module', 'tasks', 'calls', 'api time s', 'retry wait s'))
+        for module, calls in sorted(play.modules.items(), key=lambda item: -item[1].total_sec):
+            display('%-44s %7d %7d %12.2f %12.2f' % (
+                module, play.module_tasks[module], len(calls.latencies), calls.total_sec, calls.retry_sleep_sec))
+        if play.calls_dropped:
+            display('%d calls were not recorded, the modules keep at most 10000 per task' % play.calls_dropped)
+
+    def v2_playbook_on_stats(self, stats):
+        for play in self.plays:
+            if play.routes:
+                self.__summarize(play)
+        self.plays = []
+        if self.timeline is not None:
+            self.timeline.close()
+            self.timeline = None
@@ -36,9 +36,37 @@ options:
       timeout:
         description:
           - The amount of time to wait before receiving a response
+          - When C(adaptive_timeout) is enabled this is the upper bound of the
+            read timeout of every request
           - Value can also be specified using C(TETRATION_TIMEOUT) environment
             variable.
         default: 10
+      connect_timeout:
+        description:
+          - The amount of time to wait for the TCP/TLS connection to the
+            cluster to be established
+          - Value can also be specified using C(TETRATION_CONNECT_TIMEOUT) environment
+            variable.
+        type: float
+        default: 5
+      adaptive_timeout:
+        description:
+          - Derive the read timeout of each route from the latency observed
+            for that route during the task, so small and fast routes give up on
+            a stalled connection long before C(timeout) expires
+          - Value can also be specified using C(TETRATION_ADAPTIVE_TIMEOUT) environment
+            variable.
+        type: bool
+        default: 'no'
+      deadline:
+        description:
+          - Total number of seconds the task may spend talking to the cluster,
+            including every page of paginated requests and every retry
+          - Set to 0 to disable the deadline
+          - Value can also be specified using C(TETRATION_DEADLINE) environment
+            variable.
+        type: int
+        default: 0
       max_retries:
         description:
           - Configures the number of attempted retries before the connection
@@ -47,6 +75,230 @@ options:
             variable.
         type: int
         default: 3
+      retry_backoff:
+        description:
+          - Backoff curve used to space out retries of throttled (429) or
+            unavailable (502, 503, 504) responses
+          - A C(Retry-After) header returned by the cluster always takes
+            precedence over the curve
+          - Value can also be specified using C(TETRATION_RETRY_BACKOFF) environment
+            variable.
+        type: str
+        choices: [constant, linear, exponential, decorrelated]
+        default: decorrelated
+      retry_base_delay:
+        description:
+          - Delay in seconds before the first retry
+          - Value can also be specified using C(TETRATION_RETRY_BASE_DELAY) environment
+            variable.
+        type: float
+        default: 1.0
+      retry_max_delay:
+        description:
+          - Longest delay in seconds between two retries
+          - Value can also be specified using C(TETRATION_RETRY_MAX_DELAY) environment
+            variable.
+        type: float
+        default: 30.0
+      retry_budget:
+        description:
+          - Total number of seconds a task may sleep between retries. Once
+            the budget is spent the last response is returned as is
+          - Set to 0 to disable the budget
+          - Value can also be specified using C(TETRATION_RETRY_BUDGET) environment
+            variable.
+        type: float
+        default: 60.0
+      rate_limit:
+        description:
+          - Maximum number of requests per second sent to the cluster by all
+            the forks running on the controller with the same C(server_endpoint)
+            and C(api_key)
+          - The forks share a token bucket stored in a file on the controller
+          - Set to 0 to disable rate limiting
+          - Value can also be specified using C(TETRATION_RATE_LIMIT) environment
+            variable.
+        type: float
+        default: 0
+      rate_limit_burst:
+        description:
+          - Number of requests that may be sent back to back before
+            C(rate_limit) applies
+          - Defaults to C(rate_limit) requests
+          - Value can also be specified using C(TETRATION_RATE_LIMIT_BURST) environment
+            variable.
+        type: int
+      rate_limit_file:
+        description:
+          - File holding the shared token bucket
+          - Defaults to a file in C(~/.ansible/tmp/tetration-ratelimit) on the
+            controller named after a hash of C(server_endpoint) and C(api_key)
+          - Value can also be specified using C(TETRATION_RATE_LIMIT_FILE) environment
+            variable.
+        type: path
+      pool_connections:
+        description:
+          - Number of per-host connection pools kept by the HTTP client
+          - Value can also be specified using C(TETRATION_POOL_CONNECTIONS) environment
+            variable.
+        type: int
+        default: 10
+      pool_maxsize:
+        description:
+          - Maximum number of connections kept open to the cluster
+          - Value can also be specified using C(TETRATION_POOL_MAXSIZE) environment
+            variable.
+        type: int
+        default: 10
+      pool_block:
+        description:
+          - When all C(pool_maxsize) connections are busy, wait for one to be
+            released instead of opening a connection that is closed after use
+          - Value can also be specified using C(TETRATION_POOL_BLOCK) environment
+            variable.
+        type: bool
+        default: 'no'
+      keep_alive:
+        description:
+          - Keep connections open between requests so later requests skip the
+            TCP and TLS handshakes
+          - Value can also be specified using C(TETRATION_KEEP_ALIVE) environment
+            variable.
+        type: bool
+        default: 'yes'
+      tcp_keepalive:
+        description:
+          - Number of idle seconds after which TCP keep-alive probes are sent on
+            open connections, so connections dropped by a firewall or load
+            balancer are detected
+          - Set to 0 to use the operating system defaults
+          - Value can also be specified using C(TETRATION_TCP_KEEPALIVE) environment
+            variable.
+        type: int
+        default: 0
+      compression:
+        description:
+          - Ask the cluster for gzip or deflate encoded responses. Responses are
+            decompressed while they are read, which mostly helps large lists
+            like agents, scopes and inventory filters over slow links
+          - Value can also be specified using C(TETRATION_COMPRESSION) environment
+            variable.
+        type: bool
+        default: 'yes'
+      compress_requests:
+        description:
+          - Gzip request bodies of 1 KiB or more before sending them
+          - "Only enable this when the cluster, or the proxy in front of it,
+            accepts C(Content-Encoding: gzip) request bodies"
+          - Value can also be specified using C(TETRATION_COMPRESS_REQUESTS) environment
+            variable.
+        type: bool
+        default: 'no'
+      turbo:
+        description:
+          - Send the requests of the task through a worker process on the
+            controller that keeps the API client, its TLS connections and its
+            caches warm between tasks
+          - The worker is started by the first task that needs it, is shared
+            by every task using the same provider settings and listens on a
+            Unix socket in C(~/.ansible/tmp/tetration-turbo), only accessible
+            to the current user
+          - Falls back to a direct connection when the worker cannot be
+            started
+          - Value can also be specified using C(TETRATION_TURBO) environment
+            variable.
+        type: bool
+        default: 'no'
+      turbo_idle_timeout:
+        description:
+          - Number of seconds without any task after which the turbo worker
+            exits
+          - Value can also be specified using C(TETRATION_TURBO_IDLE_TIMEOUT) environment
+            variable.
+        type: int
+        default: 300
+      concurrency:
+        description:
+          - Maximum number of requests a module sends at the same time when it
+            fans out independent calls, such as fetching the details of many
+            applications
+          - Requests are sent with aiohttp when it is installed, otherwise on a
+            pool of threads
+          - Value can also be specified using C(TETRATION_CONCURRENCY) environment
+            variable.
+        type: int
+        default: 10
+      prefetch_depth:
+        description:
+          - Number of pages of a paginated query, such as the software agent
+            inventory, fetched ahead on a background thread while the module
+            processes the current page
+          - With the default of 0 pages are fetched one at a time and their
+            records are decoded while they download; a prefetched page is
+            decoded in full before the module gets its first record
+          - Value can also be specified using C(TETRATION_PREFETCH_DEPTH) environment
+            variable.
+        type: int
+        default: 0
+      memoize:
+        description:
+          - Serve repeated identical GET requests of one task from memory
+          - A write made by the task drops the remembered responses of the
+            resources it may change
+          - Value can also be specified using C(TETRATION_MEMOIZE) environment
+            variable.
+        type: bool
+        default: true
+      cache_ttl:
+        description:
+          - Number of seconds the reference collections (scopes, roles, inventory
+            filters, agent config profiles and applications) downloaded by a
+            task are reused by the following tasks and forks on the controller
+          - Any write made by these modules to a collection drops its cached copy
+          - Set to 0 to disable the cache
+          - Value can also be specified using C(TETRATION_CACHE_TTL) environment
+            variable.
+        type: int
+        default: 0
+      cache_dir:
+        description:
+          - Directory holding the cached collections, by default
+            C(~/.ansible/tmp/tetration-cache) on the controller
+          - Value can also be specified using C(TETRATION_CACHE_DIR) environment
+            variable.
+        type: path
+      json_codec:
+        description:
+          - JSON library used to serialize request bodies and parse responses
+          - C(auto) uses C(orjson) or C(ujson) when installed, and the standard
+            library C(json) module otherwise
+          - Value can also be specified using C(TETRATION_JSON_CODEC) environment
+            variable.
+        type: str
+        choices: [auto, orjson, ujson, json]
+        default: auto
+      metrics:
+        description:
+          - Add a C(tetration_metrics) object to the module result with a record
+            of every API call (route template, method, status, latency, bytes,
+            retries and time slept) and the page and cache counters of the task
+          - Value can also be specified using C(TETRATION_METRICS) environment
+            variable, which also applies when a provider is given.
+        type: bool
+        default: false
+      conditional_get:
+        description:
+          - Keep the responses of GET requests that carry an C(ETag) or
+            C(Last-Modified) header, and ask the cluster whether they changed
+            with C(If-None-Match) / C(If-Modified-Since) when they are requested
+            again by the same client, such as with I(turbo=true)
+          - A C(304 Not Modified) answer is served from the kept copy
+          - Only helps a client that lives across tasks, so it is best combined
+            with I(turbo=true)
+          - Value can also be specified using C(TETRATION_CONDITIONAL_GET) environment
+            variable.
+        type: bool
+        default: false
       api_version:
         description:
           - Specifies the version of Tetration OpenAPI to use
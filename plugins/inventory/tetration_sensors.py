@@ -0,0 +1,479 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+name: tetration_sensors
+plugin_type: inventory
+short_description: Tetration software agents inventory source
+description:
+  - Builds hosts and groups from the software agents returned by C(GET /sensors),
+    decoding every page while it downloads.
+  - Hosts are grouped by the scopes they belong to, their platform, their
+    agent type and their annotations.
+  - Scope membership is evaluated on the controller from the scope queries and
+    the interface addresses of each agent. Queries using filter types or fields
+    this plugin does not know are treated as not matching.
+  - With the inventory cache enabled, a cached inventory younger than
+    C(refresh_interval) is used as is. An older one is refreshed
+    incrementally, only rebuilding the hosts whose C(timestamp_field) changed
+    and dropping the agents that are gone.
+  - Uses a YAML configuration file that ends with C(tetration_sensors.yml) or
+    C(tetration_sensors.yaml).
+extends_documentation_fragment:
+  - constructed
+  - inventory_cache
+options:
+  plugin:
+    description: Token that ensures this is a source file for the C(tetration_sensors) plugin.
+    required: true
+    choices: [tetration_sensors, cisco.secureworkload.tetration_sensors]
+  server_endpoint:
+    description:
+      - Specifies the DNS host name or address for connecting to the remote
+        tetration cluster
+    required: true
+    env:
+      - name: TETRATION_SERVER_ENDPOINT
+  api_key:
+    description: API Key used for tetration authentication
+    required: true
+    env:
+      - name: TETRATION_API_KEY
+  api_secret:
+    description: Specifies the API secret used for tetration authentication
+    required: true
+    env:
+      - name: TETRATION_API_SECRET
+  verify:
+    description: Boolean value to enable or disable verifying SSL certificates
+    type: bool
+    default: false
+    env:
+      - name: TETRATION_VERIFY
+  timeout:
+    description: The amount of time to wait before receiving a response
+    type: int
+    default: 10
+    env:
+      - name: TETRATION_TIMEOUT
+  max_retries:
+    description: Number of retries of throttled or unavailable requests
+    type: int
+    default: 3
+    env:
+      - name: TETRATION_MAX_RETRIES
+  rate_limit:
+    description:
+      - Maximum number of requests per second sent to the cluster, shared with
+        the modules running on the controller
+      - Set to 0 to disable rate limiting
+    type: float
+    default: 0
+    env:
+      - name: TETRATION_RATE_LIMIT
+  api_version:
+    description: Specifies the version of Tetration OpenAPI to use
+    type: str
+    default: v1
+    env:
+      - name: TETRATION_API_VERSION
+  page_size:
+    description: Number of agents requested per page
+    type: int
+    default: 1000
+  hostname_field:
+    description:
+      - Agent attribute used as the inventory host name
+      - C(ip) is the first IPv4 address of the agent
+    type: str
+    choices: [host_name, ip, uuid]
+    default: host_name
+  group_prefix:
+    description: Prefix of the name of every group created by the plugin
+    type: str
+    default: tetration_
+  group_by:
+    description:
+      - Groups to create
+      - C(scope) creates one group per scope the agent belongs to, named after
+        the full scope name
+      - C(annotations) creates one group per key and value of C(annotations_field)
+    type: list
+    elements: str
+    choices: [scope, platform, agent_type, annotations]
+    default: [scope, platform, agent_type, annotations]
+  annotations_field:
+    description: Agent attribute holding a dict of annotations
+    type: str
+    default: user_annotations
+  timestamp_field:
+    description:
+      - Agent attribute that changes whenever the agent changes, used to
+        decide which cached hosts can be reused as they are
+    type: str
+    default: last_config_fetch_at
+  refresh_interval:
+    description:
+      - Number of seconds a cached inventory is used without contacting the
+        cluster
+      - Set to 0 to refresh the cached inventory on every run
+    type: int
+    default: 300
+'''
+
+EXAMPLES = r'''
+# tetration_sensors.yml
+plugin: tetration_sensors
+server_endpoint: https://my-cluster.example.com
+hostname_field: ip
+group_by: [scope, platform]
+cache: true
+cache_plugin: jsonfile
+cache_connection: ~/.ansible/inventory_cache
+cache_timeout: 0
+refresh_interval: 600
+keyed_groups:
+  - key: tetration_sensor.current_sw_version
+    prefix: agent_version
+'''
+
+import hashlib
+import ipaddress
+import json
+import os
+import time
+
+import ansible.module_utils
+from ansible.errors import AnsibleParserError
+from ansible.inventory.group import to_safe_group_name
+from ansible.module_utils._text import to_native, to_text
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+from ansible.plugins.loader import module_utils_loader
+
+# RestClient is shared with the modules: the inventory runs before any
+# module, so add the configured module_utils directory to ansible.module_utils
+_TETRATION_UTILS = module_utils_loader.find_plugin('tetration')
+if _TETRATION_UTILS and os.path.dirname(_TETRATION_UTILS) not in ansible.module_utils.__path__:
+    ansible.module_utils.__path__.append(os.path.dirname(_TETRATION_UTILS))
+
+from ansible.module_utils.tetration import RestClient
+from ansible.module_utils import tetration_constants
+
+CACHE_VERSION = 1
+
+
+def _compare(op, value, expected):
+    try:
+        if op == 'lt':
+            return value < expected
+        if op == 'lte':
+            return value <= expected
+        if op == 'gt':
+            return value > expected
+        return value >= expected
+    except TypeError:
+        return None
+
+
+def _all(results):
+    results = list(results)
+    if False in results:
+        return False
+    return None if None in results else True
+
+
+def _any(results):
+    results = list(results)
+    if True in results:
+        return True
+    return None if None in results else False
+
+
+def _compile(query):
+    '''
+    Returns a function evaluating a query on the fields of one interface to
+    True, False or None when the query cannot be evaluated. None goes through
+    `not` unchanged, so that negating an unknown filter does not match
+    everything, and decides `and` / `or` only when the known filters do not.
+    '''
+    kind = query.get('type')
+    if kind in ('and', 'or'):
+        filters = [_compile(f) for f in query.get('filters') or []]
+        combine = _all if kind == 'and' else _any
+        return lambda fields: combine(f(fields) for f in filters)
+    if kind == 'not':
+        inner = _compile(query.get('filter') or {})
+
+        def negate(fields):
+            result = inner(fields)
+            return None if result is None else not result
+        return negate
+    field = query.get('field')
+    expected = query.get('value')
+    if kind == 'subnet':
+        try:
+            network = ipaddress.ip_network(to_text(expected), strict=False)
+        except ValueError:
+            return lambda fields: None
+
+        def in_subnet(fields):
+            address = fields.get('ip_address')
+            if address is None:
+                return None
+            return address.version == network.version and address in network
+        return in_subnet
+    if kind in ('eq', 'ne', 'contains', 'in', 'lt', 'lte', 'gt', 'gte'):
+        values = set(to_text(v) for v in expected or []) if kind == 'in' else None
+
+        def compare(fields):
+            if field not in fields:
+                return None
+            value = fields[field]
+            if kind in ('eq', 'ne'):
+                return (to_text(value) == to_text(expected)) == (kind == 'eq')
+            if kind == 'contains':
+                return to_text(expected) in to_text(value)
+            if kind == 'in':
+                return to_text(value) in values
+            return _compare(kind, value, expected)
+        return compare
+    return lambda fields: None
+
+
+def compile_query(query):
+    '''
+    Returns a function telling whether one interface of an agent, given as a
+    dict of field values, matches a scope or filter query.
+
+    Filters with an unknown type, or on a field missing from the interface,
+    never match, even when negated.
+    '''
+    evaluate = _compile(query)
+    return lambda fields: evaluate(fields) is True
+
+
+def interface_fields(sensor, annotations_field):
+    ''' Yields the field values scope queries are evaluated against, one dict per interface '''
+    common = {'host_name': sensor.get('host_name'), 'os': sensor.get('platform')}
+    for key, value in (sensor.get(annotations_field) or {}).items():
+        common['user_' + key] = value
+    for interface in sensor.get('interfaces') or []:
+        fields = dict(common)
+        fields['ip'] = interface.get('ip')
+        fields['vrf_id'] = interface.get('vrf_id')
+        fields['vrf_name'] = interface.get('vrf')
+        try:
+            fields['ip_address'] = ipaddress.ip_address(to_text(interface.get('ip')))
+        except ValueError:
+            fields['ip_address'] = None
+        yield fields
+
+
+class ScopeTree(object):
+    '''
+    Scopes of the tenant with their compiled queries. An agent belongs to a
+    scope when it matches the short query of the scope and of every parent,
+    so only the children of matching scopes are evaluated.
+    '''
+
+    def __init__(self, scopes):
+        self.scopes = dict((s['id'], s) for s in scopes)
+        self.children = {}
+        self.roots = []
+        for scope in scopes:
+            parent_id = scope.get('parent_app_scope_id')
+            if parent_id in self.scopes:
+                self.children.setdefault(parent_id, []).append(scope['id'])
+            else:
+                self.roots.append(scope['id'])
+        self.queries = dict(
+            (s['id'], compile_query(s.get('short_query') or s.get('query') or {})) for s in scopes)
+
+    def digest(self):
+        ''' Identifies the scope names, queries and hierarchy, to tell when cached groups are stale '''
+        summary = sorted(
+            (s['id'], s.get('name'), s.get('parent_app_scope_id'),
+             json.dumps(s.get('short_query'), sort_keys=True)) for s in self.scopes.values())
+        return hashlib.sha256(to_text(json.dumps(summary)).encode('utf-8')).hexdigest()
+
+    def memberships(self, interfaces):
+        ''' Returns the names of the scopes matched by any of the interfaces '''
+        names = set()
+        for fields in interfaces:
+            pending = list(self.roots)
+            while pending:
+                scope_id = pending.pop()
+                if self.queries[scope_id](fields):
+                    names.add(self.scopes[scope_id]['name'])
+                    pending.extend(self.children.get(scope_id, ()))
+        return sorted(names)
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = 'tetration_sensors'
+
+    def verify_file(self, path):
+        ''' Only accepts files named tetration_sensors.yml or tetration_sensors.yaml '''
+        if super(InventoryModule, self).verify_file(path):
+            return path.endswith(('tetration_sensors.yml', 'tetration_sensors.yaml'))
+        return False
+
+    def _client(self):
+        return RestClient(
+            self.get_option('server_endpoint'),
+            api_key=self.get_option('api_key'),
+            api_secret=self.get_option('api_secret'),
+            api_version=self.get_option('api_version'),
+            verify=self.get_option('verify'),
+            timeout=self.get_option('timeout'),
+            max_retries=self.get_option('max_retries'),
+            rate_limit=self.get_option('rate_limit'))
+
+    @staticmethod
+    def _check_response(response, target):
+        if response.status_code != 200:
+            raise AnsibleParserError('GET %s failed with status %s: %s' % (
+                target, response.status_code, to_native(response.text)))
+
+    def _iter_sensors(self, client):
+        ''' Yields every agent, decoding the pages while they download '''
+        params = {'limit': self.get_option('page_size')}
+        while True:
+            response = client.get(tetration_constants.TETRATION_API_SENSORS, params=dict(params), stream=True)
+            self._check_response(response, tetration_constants.TETRATION_API_SENSORS)
+            records = client.iter_records(response)
+            try:
+                for sensor in records:
+                    yield sensor
+            finally:
+                records.close()
+            if not records.meta.get('offset'):
+                return
+            params['offset'] = records.meta['offset']
+
+    def _settings_digest(self, scope_tree):
+        ''' Identifies everything besides the agent itself that a cached host depends on '''
+        settings = [scope_tree.digest() if 'scope' in self.get_option('group_by') else None]
+        settings.extend(self.get_option(name) for name in (
+            'hostname_field', 'group_prefix', 'group_by', 'annotations_field'))
+        return hashlib.sha256(to_text(json.dumps(settings, sort_keys=True)).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _host_address(sensor):
+        addresses = [i.get('ip') for i in sensor.get('interfaces') or [] if i.get('ip')]
+        for address in addresses:
+            try:
+                parsed = ipaddress.ip_address(to_text(address))
+            except ValueError:
+                continue
+            if parsed.version == 4 and not parsed.is_loopback and not parsed.is_link_local:
+                return address
+        return addresses[0] if addresses else None
+
+    def _build_host(self, sensor, scope_tree):
+        ''' Returns the cached form of an agent: its name, groups and variables '''
+        prefix = self.get_option('group_prefix')
+        group_by = self.get_option('group_by')
+        address = self._host_address(sensor)
+        name = {'host_name': sensor.get('host_name'), 'ip': address, 'uuid': sensor.get('uuid')}[
+            self.get_option('hostname_field')] or sensor.get('uuid')
+
+        scopes = []
+        if 'scope' in group_by:
+            scopes = scope_tree.memberships(interface_fields(sensor, self.get_option('annotations_field')))
+        groups = ['%sscope_%s' % (prefix, scope) for scope in scopes]
+        if 'platform' in group_by and sensor.get('platform'):
+            groups.append('%splatform_%s' % (prefix, sensor['platform']))
+        if 'agent_type' in group_by and sensor.get('agent_type'):
+            groups.append('%sagent_%s' % (prefix, sensor['agent_type']))
+        if 'annotations' in group_by:
+            for key, value in sorted((sensor.get(self.get_option('annotations_field')) or {}).items()):
+                groups.append('%sannotation_%s_%s' % (prefix, key, value))
+
+        host_vars = {
+            'tetration_uuid': sensor.get('uuid'),
+            'tetration_scopes': scopes,
+            'tetration_sensor': sensor
+        }
+        if address:
+            host_vars['ansible_host'] = address
+        return {
+            'name': to_text(name),
+            'stamp': sensor.get(self.get_option('timestamp_field')),
+            'groups': [to_safe_group_name(g, force=True, silent=True) for g in groups],
+            'vars': host_vars
+        }
+
+    def _refresh(self, cached):
+        '''
+        Downloads the agents and returns the new cache document. Hosts of
+        `cached` whose timestamp and settings did not change are reused.
+        '''
+        client = self._client()
+        scope_tree = ScopeTree([])
+        if 'scope' in self.get_option('group_by'):
+            response = client.get(tetration_constants.TETRATION_API_SCOPES)
+            self._check_response(response, tetration_constants.TETRATION_API_SCOPES)
+            scope_tree = ScopeTree(response.json())
+        settings = self._settings_digest(scope_tree)
+
+        previous = {}
+        if cached and cached.get('settings') == settings:
+            previous = cached.get('hosts') or {}
+        hosts = {}
+        reused = 0
+        for sensor in self._iter_sensors(client):
+            uuid = sensor.get('uuid')
+            entry = previous.get(uuid)
+            if entry is not None and entry.get('stamp') is not None and \
+                    entry['stamp'] == sensor.get(self.get_option('timestamp_field')):
+                reused += 1
+            else:
+                entry = self._build_host(sensor, scope_tree)
+            hosts[uuid] = entry
+        self.display.vvv('tetration_sensors: %d agents, %d reused from the cache, %d dropped' % (
+            len(hosts), reused, len(set(previous) - set(hosts))))
+        return {
+            'version': CACHE_VERSION,
+            'refreshed_at': time.time(),
+            'settings': settings,
+            'hosts': hosts
+        }
+
+    def _populate(self, document):
+        strict = self.get_option('strict')
+        for entry in document['hosts'].values():
+            host = self.inventory.add_host(entry['name'])
+            for group in entry['groups']:
+                self.inventory.add_group(group)
+                self.inventory.add_child(group, host)
+            for key, value in entry['vars'].items():
+                self.inventory.set_variable(host, key, value)
+            self._set_composite_vars(self.get_option('compose'), entry['vars'], host, strict=strict)
+            self._add_host_to_composed_groups(self.get_option('groups'), entry['vars'], host, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option('keyed_groups'), entry['vars'], host, strict=strict)
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        self._read_config_data(path)
+        cache_key = self.get_cache_key(path)
+
+        use_cache = self.get_option('cache')
+        cached = None
+        if use_cache and cache:
+            try:
+                cached = self._cache[cache_key]
+            except KeyError:
+                pass
+        if not isinstance(cached, dict) or cached.get('version') != CACHE_VERSION:
+            cached = None
+
+        age = time.time() - cached['refreshed_at'] if cached else None
+        if cached is not None and age < self.get_option('refresh_interval'):
+            document = cached
+        else:
+            document = self._refresh(cached)
+            if use_cache:
+                self._cache[cache_key] = document
+        self._populate(document)
@@ -0,0 +1,239 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+name: tetration_id
+short_description: Resolve Tetration object names to their ids
+description:
+  - Returns the id of every scope, role, inventory filter, agent config profile,
+    application or user named in the terms, looked up on the controller.
+  - Each collection is downloaded once per controller process and endpoint, and
+    kept as an in-memory index from name to id, so any number of lookups in a
+    task, including every item of a loop, are answered from memory.
+  - With C(cache_ttl) set in the C(provider) the downloaded collections are
+    also shared with the following tasks and forks, like the modules do.
+options:
+  _terms:
+    description:
+      - Names to resolve. Scopes are named by their full name, such as
+        C(Default:Prod), users by their email address.
+    required: true
+  kind:
+    description: Kind of object the terms name
+    type: str
+    required: true
+    choices: [scope, role, filter, profile, application, user]
+  app_scope_id:
+    description:
+      - Only consider objects of this scope, or for C(kind=scope) scopes under
+        this root scope
+      - Required to resolve names that are used in several scopes
+    type: str
+  refresh:
+    description:
+      - Check whether the collection changed on the cluster before answering,
+        instead of relying on the index built earlier by this process
+      - The index is only rebuilt when the collection actually changed
+    type: bool
+    default: false
+  errors:
+    description:
+      - What to do when a name is unknown or names several objects
+      - With C(warn) and C(ignore) the id of such a name is returned as C(None)
+    type: str
+    choices: [strict, warn, ignore]
+    default: strict
+extends_documentation_fragment: tetration_doc_common
+'''
+
+EXAMPLES = r'''
+- name: Resolve a scope id
+  debug:
+    msg: "{{ lookup('tetration_id', 'Default:Prod', kind='scope') }}"
+
+- name: Give every user of the list the same roles
+  tetration_user:
+    provider: "{{ my_provider }}"
+    email: "{{ item }}"
+    app_scope_id: "{{ lookup('tetration_id', 'Default', kind='scope', provider=my_provider) }}"
+    role_ids: "{{ query('tetration_id', 'Operators', 'Auditors', kind='role', provider=my_provider) }}"
+  loop: "{{ users }}"
+'''
+
+RETURN = r'''
+_raw:
+  description: Ids of the objects named by the terms, in the same order
+  type: list
+  elements: str
+'''
+
+import json
+import os
+import time
+
+import ansible.module_utils
+from ansible.errors import AnsibleLookupError
+from ansible.module_utils._text import to_native, to_text
+from ansible.plugins.loader import module_utils_loader
+from ansible.plugins.lookup import LookupBase
+from ansible.utils.display import Display
+
+# Ansible packs the configured module_utils into the modules it sends, but
+# the lookup runs in the controller and imports them from their directory
+_TETRATION_UTILS = module_utils_loader.find_plugin('tetration')
+if _TETRATION_UTILS and os.path.dirname(_TETRATION_UTILS) not in ansible.module_utils.__path__:
+    ansible.module_utils.__path__.append(os.path.dirname(_TETRATION_UTILS))
+
+from ansible.module_utils.tetration import HAS_FCNTL, ResponseCache, TetrationApiBase
+from ansible.module_utils import tetration_constants
+
+display = Display()
+
+# route, name field and scope field of every kind of object
+KINDS = {
+    'scope': (tetration_constants.TETRATION_API_SCOPES, 'name', 'root_app_scope_id'),
+    'role': (tetration_constants.TETRATION_API_ROLE, 'name', 'app_scope_id'),
+    'filter': (tetration_constants.TETRATION_API_INVENTORY_FILTER, 'name', 'app_scope_id'),
+    'profile': (tetration_constants.TETRATION_API_AGENT_CONFIG_PROFILES, 'name', 'root_app_scope_id'),
+    'application': (tetration_constants.TETRATION_API_APPLICATIONS, 'name', 'app_scope_id'),
+    'user': (tetration_constants.TETRATION_API_USER, 'email', 'app_scope_id'),
+}
+
+# Clients of this controller process and their indexes, kept between lookups
+_CLIENTS = {}
+
+
+class NameIndex(object):
+    '''
+    Ids of the objects of one collection by name, then by scope.
+
+    Attributes:
+        digest: String body digest of the response the index was built
+        from, None when unknown
+        built_at: Float time the index was built
+    '''
+
+    def __init__(self, objects, name_field, scope_field, digest=None):
+        self.names = {}
+        for obj in objects:
+            if obj.get(name_field) is None or obj.get('id') is None:
+                continue
+            self.names.setdefault(obj[name_field], []).append((obj['id'], obj.get(scope_field)))
+        self.digest = digest
+        self.built_at = time.time()
+
+    def find(self, name, app_scope_id=None):
+        ''' Returns the ids of the objects named `name` '''
+        return [obj_id for obj_id, scope_id in self.names.get(name, [])
+                if app_scope_id is None or scope_id == app_scope_id]
+
+
+class Collections(object):
+    ''' API client of one provider and the name indexes built with it '''
+
+    def __init__(self, provider):
+        # the client lives as long as the controller process, so revalidating
+        # the collections pays off unless the provider turns it off
+        if provider.get('conditional_get') is None and 'TETRATION_CONDITIONAL_GET' not in os.environ:
+            provider['conditional_get'] = True
+        self.api = TetrationApiBase(provider, None)
+        self.cache = None
+        if float(self.api.provider.get('cache_ttl') or 0) > 0 and HAS_FCNTL:
+            self.cache = ResponseCache(
+                self.api.provider.get('cache_dir') or ResponseCache.default_cache_dir(),
+                self.api.provider['cache_ttl'],
+                self.api.provider.get('server_endpoint'),
+                self.api.provider.get('api_key'),
+                uri_prefix=self.api.rc.uri_prefix,
+                codec=self.api.codec)
+        self.indexes = {}
+
+    def __download(self, route):
+        '''
+        Returns the objects of route and the digest of the response body,
+        None when the objects come from the shared cache or several pages.
+        '''
+        token = None
+        if self.cache is not None:
+            hit, value, token = self.cache.get(route, None)
+            if hit:
+                return value, None
+        objects = []
+        digest = None
+        params = {}
+        while True:
+            response = self.api.rc.get(route, params=dict(params))
+            if response.status_code != 200:
+                raise AnsibleLookupError('GET %s failed with status %s: %s' % (
+                    route, response.status_code, to_native(response.text)))
+            document = self.api.codec.response_json(response)
+            if not isinstance(document, dict):
+                objects = document
+                digest = getattr(response, 'body_digest', None)
+                break
+            objects.extend(document.get('results', []))
+            if not document.get('offset'):
+                break
+            params['offset'] = document['offset']
+        if token is not None:
+            self.cache.put(route, None, objects, token)
+        return objects, digest
+
+    def index(self, kind, refresh=False):
+        ''' Returns the NameIndex of kind, building it on first use '''
+        index = self.indexes.get(kind)
+        if index is not None and not refresh:
+            return index
+        route, name_field, scope_field = KINDS[kind]
+        objects, digest = self.__download(route)
+        if index is not None and digest is not None and digest == index.digest:
+            # the collection did not change since the index was built
+            return index
+        index = self.indexes[kind] = NameIndex(objects, name_field, scope_field, digest)
+        return index
+
+
+def collections_for(provider):
+    ''' Returns the Collections of provider, shared by every lookup of this process '''
+    key = json.dumps(provider, sort_keys=True, default=str)
+    if key not in _CLIENTS:
+        try:
+            _CLIENTS[key] = Collections(dict(provider))
+        except ValueError as exc:
+            raise AnsibleLookupError(to_native(exc))
+    return _CLIENTS[key]
+
+
+class LookupModule(LookupBase):
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+        kind = self.get_option('kind')
+        app_scope_id = self.get_option('app_scope_id')
+        errors = self.get_option('errors')
+
+        collections = collections_for(self.get_option('provider') or {})
+        try:
+            index = collections.index(kind, refresh=self.get_option('refresh'))
+        except Exception as exc:
+            if isinstance(exc, AnsibleLookupError):
+                raise
+            raise AnsibleLookupError('Unable to read the %s collection: %s' % (kind, to_native(exc)))
+
+        ids = []
+        for term in terms:
+            name = to_text(term)
+            found = index.find(name, app_scope_id)
+            if len(found) == 1:
+                ids.append(found[0])
+                continue
+            if found:
+                msg = '%s "%s" names %d objects (%s), set app_scope_id' % (kind, name, len(found), ', '.join(found))
+            else:
+                msg = 'No %s named "%s"' % (kind, name)
+            if errors == 'strict':
+                raise AnsibleLookupError(msg)
+            if errors == 'warn':
+                display.warning(msg)
+            ids.append(None)
+        return ids
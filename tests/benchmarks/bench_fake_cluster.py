@@ -0,0 +1,143 @@
+"""
+End to end benchmark of the client against the local fake OpenAPI server.
+
+Starts tests.fake_openapi with a synthetic tenant in another process, so
+that the server does not compete with the client for the GIL, and times the
+access patterns the modules rely on, with the optimizations off and on:
+
+    sensors   page through every software agent (prefetch_depth 0 / 2)
+    scopes    download /app_scopes repeatedly (conditional_get off / on)
+    details   fetch the details of every application (serial / gather /
+              run_batch)
+
+Latency, throttling and errors are injected by the server, e.g.:
+
+    python -m tests.benchmarks.bench_fake_cluster --sensors 100000 --scopes 10000 --latency 0.02
+    python -m tests.benchmarks.bench_fake_cluster --scenario details --throttle-every 10
+"""
+import argparse
+import contextlib
+import json
+import subprocess
+import sys
+import time
+
+from ansible.module_utils import basic
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils.basic import AnsibleModule
+
+from module_utils import tetration
+from module_utils import tetration_constants
+
+
+class FakeCluster(object):
+    ''' Address and credentials of a fake OpenAPI server process '''
+
+    def __init__(self, endpoint, api_key, api_secret):
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.api_secret = api_secret
+
+    def credentials(self):
+        return {'server_endpoint': self.endpoint, 'api_key': self.api_key, 'api_secret': self.api_secret}
+
+
+@contextlib.contextmanager
+def fake_cluster(args):
+    ''' Runs tests.fake_openapi in a child process for the duration of the block '''
+    command = [sys.executable, '-m', 'tests.fake_openapi',
+               '--sensors', str(args.sensors), '--scopes', str(args.scopes),
+               '--applications', str(args.applications), '--latency', str(args.latency),
+               '--throttle-every', str(args.throttle_every), '--error-rate', str(args.error_rate)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        settings = dict(process.stdout.readline().strip().split('=', 1) for _ in range(3))
+        yield FakeCluster(settings['TETRATION_SERVER_ENDPOINT'], settings['TETRATION_API_KEY'],
+                          settings['TETRATION_API_SECRET'])
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def make_module(api, **provider):
+    ''' Builds a TetrationApiModule talking to the fake server '''
+    provider.update(api.credentials())
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps({'ANSIBLE_MODULE_ARGS': {
+        'provider': provider,
+        '_ansible_remote_tmp': '/tmp',
+        '_ansible_keep_remote_files': False
+    }}))
+    module = AnsibleModule(argument_spec=dict(
+        provider=dict(type='dict', options=tetration_constants.TETRATION_PROVIDER_SPEC)))
+    return tetration.TetrationApiModule(module)
+
+
+def report(scenario, variant, started, stats, items):
+    elapsed = time.monotonic() - started
+    print('%-8s %-24s %8.2f s  %6d req  %5d retries  %8.1f MB  %9.0f items/s' % (
+        scenario, variant, elapsed, stats['requests'], stats['retries'],
+        stats['bytes_received_wire'] / 1e6, items / elapsed if elapsed else 0))
+
+
+def bench_sensors(api, args):
+    for depth in (0, 2):
+        tet_module = make_module(api, prefetch_depth=depth, retry_base_delay=0.01)
+        started = time.monotonic()
+        count = sum(1 for _ in tet_module.iter_paginated(
+            'GET', tetration_constants.TETRATION_API_SENSORS, page_size=args.page_size))
+        report('sensors', 'prefetch_depth=%d' % depth, started, tet_module.get_stats(), count)
+
+
+def bench_scopes(api, args):
+    for conditional_get in (False, True):
+        client = tetration.RestClient(
+            api.endpoint, api_key=api.api_key, api_secret=api.api_secret,
+            conditional_get=conditional_get, retry_base_delay=0.01)
+        started = time.monotonic()
+        count = 0
+        for _ in range(args.repeat):
+            count += len(client.get(tetration_constants.TETRATION_API_SCOPES).json())
+        report('scopes', 'conditional_get=%s' % conditional_get, started, client.get_stats(), count)
+
+
+def bench_details(api, args):
+    applications = make_module(api).run_method('GET', tetration_constants.TETRATION_API_APPLICATIONS)
+    calls = [('GET', '%s/%s/details' % (tetration_constants.TETRATION_API_APPLICATIONS, app['id']))
+             for app in applications]
+    variants = [
+        ('serial', lambda tet_module: [tet_module.run_method(*call) for call in calls]),
+        ('gather', lambda tet_module: tet_module.gather(calls)),
+        ('run_batch', lambda tet_module: tet_module.run_batch(calls)[0]),
+    ]
+    for name, run in variants:
+        tet_module = make_module(api, concurrency=args.concurrency, memoize=False, retry_base_delay=0.01)
+        started = time.monotonic()
+        results = run(tet_module)
+        assert len(results) == len(calls)
+        report('details', name, started, tet_module.get_stats(), len(calls))
+
+
+SCENARIOS = {'sensors': bench_sensors, 'scopes': bench_scopes, 'details': bench_details}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the client against the fake OpenAPI server')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append')
+    parser.add_argument('--sensors', type=int, default=20000)
+    parser.add_argument('--scopes', type=int, default=2000)
+    parser.add_argument('--applications', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.01, help='seconds added to every request')
+    parser.add_argument('--throttle-every', type=int, default=0, help='answer every Nth request with 429')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests answered with 503')
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=10)
+    args = parser.parse_args()
+
+    with fake_cluster(args) as api:
+        for scenario in args.scenario or sorted(SCENARIOS):
+            SCENARIOS[scenario](api, args)
+
+
+if __name__ == '__main__':
+    main()
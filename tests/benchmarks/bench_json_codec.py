@@ -0,0 +1,88 @@
+"""
+Benchmark of the JSON codecs available to the modules.
+
+Builds /app_scopes and /sensors documents shaped like the ones returned by
+a cluster and times encoding and decoding them with every installed codec.
+
+Run from the repository root:
+
+    python -m tests.benchmarks.bench_json_codec
+"""
+import json
+import timeit
+
+from module_utils import tetration
+
+ROUNDS = 20
+
+
+def app_scopes(count=2000):
+    scopes = []
+    for i in range(count):
+        scopes.append({
+            'id': '%024x' % i,
+            'short_name': 'scope-%d' % i,
+            'name': 'Default:Datacenter:scope-%d' % i,
+            'description': 'Scope for application tier %d' % i,
+            'vrf_id': 1,
+            'parent_app_scope_id': '%024x' % (i // 10),
+            'child_app_scope_ids': ['%024x' % (i * 10 + j) for j in range(3)],
+            'policy_priority': i,
+            'dirty': False,
+            'short_query': {
+                'type': 'and',
+                'filters': [
+                    {'type': 'subnet', 'field': 'ip', 'value': '10.%d.%d.0/24' % (i // 250, i % 250)},
+                    {'type': 'eq', 'field': 'user_orchestrator_system/os', 'value': 'linux'},
+                    {'type': 'contains', 'field': 'host_name', 'value': 'app-%d' % i},
+                ]
+            },
+            'query': {'type': 'and', 'filters': [{'field': 'vrf_id', 'type': 'eq', 'value': 1}]},
+            'created_at': 1600000000 + i,
+            'updated_at': 1700000000 + i,
+        })
+    return scopes
+
+
+def sensors(count=1000):
+    results = []
+    for i in range(count):
+        results.append({
+            'uuid': '%040x' % i,
+            'host_name': 'host-%05d.example.com' % i,
+            'agent_type': 'ENFORCER',
+            'platform': 'CentOS-7.9',
+            'current_sw_version': '3.7.1.5-enforcer',
+            'enable_pid_lookup': True,
+            'last_config_fetch_at': 1700000000 + i,
+            'created_at': 1600000000 + i,
+            'interfaces': [{
+                'name': 'eth%d' % j,
+                'ip': '10.%d.%d.%d' % (j, i // 250, i % 250),
+                'mac': '00:50:56:%02x:%02x:%02x' % (j, i // 256 % 256, i % 256),
+                'netmask': '255.255.255.0',
+                'family_type': 'IPV4',
+                'vrf': 'Default',
+                'vrf_id': 1,
+            } for j in range(4)],
+        })
+    return {'results': results, 'offset': 'next-page-cursor'}
+
+
+def main():
+    fixtures = [('/app_scopes', app_scopes()), ('/sensors', sensors())]
+    codecs = [name for name in tetration.JsonCodec.CODECS
+              if name == 'json' or getattr(tetration, 'HAS_' + name.upper())]
+    for route, document in fixtures:
+        payload = json.dumps(document).encode('utf-8')
+        print('%s (%.1f MB)' % (route, len(payload) / 1e6))
+        for name in codecs:
+            codec = tetration.JsonCodec(name)
+            assert codec.loads(payload) == document
+            dumps = timeit.timeit(lambda: codec.dumps(document), number=ROUNDS) / ROUNDS
+            loads = timeit.timeit(lambda: codec.loads(payload), number=ROUNDS) / ROUNDS
+            print('  %-7s dumps: %7.2f ms  loads: %7.2f ms' % (name, dumps * 1000, loads * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Micro benchmark of the request signing path.
+
+Compares the original pipeline (requests.Session.prepare_request, a fresh
+HMAC per request and one update per signed line) with
+RestClient.prepare_signed_request.  Nothing is sent on the wire.
+
+Run from the repository root:
+
+    python -m tests.benchmarks.bench_signing
+"""
+import base64
+import hashlib
+import hmac
+import json
+import timeit
+from datetime import datetime
+
+import requests
+from requests.compat import urljoin
+
+from module_utils import tetration
+
+ENDPOINT = 'https://fake.com'
+API_KEY = b'deadbeef'
+API_SECRET = b'beef' * 8
+ROUNDS = 20000
+
+
+def legacy_prepare(session, http_method, uri_path, params=None, json_body=''):
+    req = session.prepare_request(requests.Request(
+        http_method, urljoin(ENDPOINT, uri_path), params=params, data=json_body))
+    req.headers['Content-Type'] = 'application/json'
+    if req.body and req.method in ['POST', 'PUT', 'DELETE']:
+        body = req.body if isinstance(req.body, bytes) else req.body.encode('utf-8')
+        req.headers['X-Tetration-Cksum'] = hashlib.sha256(body).hexdigest()
+    req.headers['User-Agent'] = 'Cisco Tetration Python client'
+    req.headers['Timestamp'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S+0000')
+    req.headers['Id'] = API_KEY
+    digest = hmac.new(API_SECRET, digestmod=hashlib.sha256)
+    for line in [req.method, req.path_url, req.headers.get('X-Tetration-Cksum', ''),
+                 req.headers.get('Content-Type', ''), req.headers.get('Timestamp', '')]:
+        digest.update(line.encode('utf-8') + b'\n')
+    req.headers['Authorization'] = base64.b64encode(digest.digest())
+    return req
+
+
+def main():
+    session = requests.Session()
+    client = tetration.RestClient(ENDPOINT, api_key=API_KEY.decode(), api_secret=API_SECRET.decode())
+    body = json.dumps({'short_name': 'web', 'short_query': {'type': 'eq', 'field': 'ip', 'value': '10.0.0.1'}})
+    cases = [
+        ('GET', '/openapi/v1/sensors', {'offset': 'abc', 'limit': 100}, ''),
+        ('POST', '/openapi/v1/app_scopes', None, body),
+    ]
+    for method, path, params, json_body in cases:
+        before = timeit.timeit(
+            lambda: legacy_prepare(session, method, path, params, json_body), number=ROUNDS)
+        after = timeit.timeit(
+            lambda: client.prepare_signed_request(method, path, params, json_body), number=ROUNDS)
+        print('%-5s before: %8.0f req/s  after: %8.0f req/s  (x%.2f)' % (
+            method, ROUNDS / before, ROUNDS / after, before / after))
+
+
+if __name__ == '__main__':
+    main()
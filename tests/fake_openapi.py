@@ -0,0 +1,603 @@
+"""
+Local stand-in for the Secure Workload OpenAPI.
+
+FakeOpenApi serves a FakeTenant over HTTP on 127.0.0.1 so that the client,
+the modules and the benchmarks can be exercised without a cluster.  Like a
+cluster it checks the HMAC signature and body checksum of every request,
+pages /sensors with an opaque `offset` cursor, answers conditional GETs and
+gzips large responses.  Latency, 429 throttling and 503 errors can be
+injected to see how the client behaves under load.
+
+    with FakeOpenApi(FakeTenant(sensors=100000, scopes=10000), latency=0.02) as api:
+        client = tetration.RestClient(api.endpoint, **api.credentials())
+
+Run it on its own to point playbooks at it:
+
+    python -m tests.fake_openapi --sensors 100000 --scopes 10000
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import hmac
+import ipaddress
+import itertools
+import json
+import random
+import socket
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from module_utils.tetration import route_template
+
+API_KEY = 'deadbeef'
+API_SECRET = 'beefbeefbeefbeef'
+API_PREFIX = '/openapi/v1'
+
+PLATFORMS = ['CentOS-7.9', 'Ubuntu-20.04', 'RedHatEnterpriseServer-8.4', 'MSServer2019Standard']
+AGENT_TYPES = ['ENFORCER', 'SENSOR', 'VISIBILITY']
+COMPRESSION_MIN_SIZE = 1024
+
+
+def object_id(kind, index):
+    ''' Returns a 24 hex digit id, unique per kind of object '''
+    return hashlib.md5(kind.encode('utf-8')).hexdigest()[:8] + '%016x' % index
+
+
+class FakeTenant(object):
+    '''
+    Synthetic tenant: a tree of scopes under one root scope, users, roles,
+    inventory filters, applications with policies, and software agents.
+
+    Agents are built from their index when they are read, so a tenant with
+    100k agents costs no memory until they are paged through.  Changes to
+    agents are kept in `sensor_updates` and `deleted_sensors`.
+    '''
+
+    def __init__(self, sensors=1000, scopes=100, users=50, roles=20, filters=100, applications=20,
+                 policies_per_application=10, root_scope_name='Default', seed=0):
+        self.sensor_count = sensors
+        self.root_scope_name = root_scope_name
+        self.epoch = 1600000000
+        self.sensor_updates = {}
+        self.deleted_sensors = set()
+        self.inventory_tags = {}
+        self.lock = threading.RLock()
+        self.versions = {}
+        self.created = itertools.count(1000000)
+        rng = random.Random(seed)
+
+        self.collections = {name: {} for name in (
+            'app_scopes', 'users', 'roles', 'filters/inventories', 'applications', 'policies',
+            'inventory_config/profiles', 'inventory_config/intents')}
+
+        networks = []
+        for i in range(max(scopes, 1)):
+            parent = None if i == 0 else self.collections['app_scopes'][object_id('scope', (i - 1) // 10)]
+            short_name = root_scope_name if i == 0 else 'scope-%d' % i
+            networks.append(self.scope_network(networks, i))
+            short_query = {'type': 'subnet', 'field': 'ip', 'value': str(networks[i])}
+            query = short_query if parent is None else {'type': 'and', 'filters': [parent['query'], short_query]}
+            self.add('app_scopes', {
+                'id': object_id('scope', i),
+                'short_name': short_name,
+                'name': short_name if parent is None else parent['name'] + ':' + short_name,
+                'description': 'Scope %d' % i,
+                'parent_app_scope_id': None if parent is None else parent['id'],
+                'root_app_scope_id': object_id('scope', 0),
+                'child_app_scope_ids': [],
+                'short_query': short_query,
+                'query': query,
+                'policy_priority': i,
+                'vrf_id': 1,
+                'dirty': False,
+                'dirty_short_query': None,
+                'updated_at': self.epoch
+            })
+            if parent is not None:
+                parent['child_app_scope_ids'].append(object_id('scope', i))
+        scope_ids = list(self.collections['app_scopes'])
+
+        for i in range(roles):
+            self.add('roles', {
+                'id': object_id('role', i),
+                'name': 'role-%d' % i,
+                'description': 'Role %d' % i,
+                'app_scope_id': scope_ids[i % len(scope_ids)],
+                'capabilities': []
+            })
+        role_ids = list(self.collections['roles'])
+
+        for i in range(users):
+            self.add('users', {
+                'id': object_id('user', i),
+                'email': 'user%d@example.com' % i,
+                'first_name': 'First%d' % i,
+                'last_name': 'Last%d' % i,
+                'app_scope_id': scope_ids[0],
+                'role_ids': rng.sample(role_ids, min(len(role_ids), 2)),
+                'created_at': self.epoch,
+                'disabled_at': None
+            })
+
+        for i in range(filters):
+            query = {'type': 'eq', 'field': 'host_name', 'value': 'host-%06d' % i}
+            self.add('filters/inventories', {
+                'id': object_id('filter', i),
+                'name': 'filter-%d' % i,
+                'app_scope_id': scope_ids[i % len(scope_ids)],
+                'short_query': query,
+                'query': query,
+                'primary': False,
+                'public': False
+            })
+        filter_ids = list(self.collections['filters/inventories'])
+
+        for i in range(applications):
+            app_id = object_id('application', i)
+            self.add('applications', {
+                'id': app_id,
+                'name': 'application-%d' % i,
+                'description': 'Application %d' % i,
+                'app_scope_id': scope_ids[i % len(scope_ids)],
+                'primary': True,
+                'alternate_query_mode': False,
+                'enforcement_enabled': False,
+                'latest_adm_version': 1,
+                'catch_all_action': 'DENY',
+                'absolute_policies': [],
+                'default_policies': []
+            })
+            for j in range(policies_per_application):
+                self.add_policy(app_id, 'default_policies', {
+                    'consumer_filter_id': filter_ids[j % len(filter_ids)] if filter_ids else scope_ids[0],
+                    'provider_filter_id': filter_ids[(j + 1) % len(filter_ids)] if filter_ids else scope_ids[0],
+                    'action': 'ALLOW',
+                    'priority': 100 + j,
+                    'l4_params': [{'id': object_id('l4', i * 1000 + j), 'proto': 6, 'port': [443, 443]}]
+                })
+
+    @staticmethod
+    def scope_network(networks, index):
+        '''
+        Subnet of the scope at `index`: the root scope holds 10.0.0.0/8 and
+        the Nth child of a scope the Nth sixteenth of its parent's subnet.
+        '''
+        if index == 0:
+            return ipaddress.IPv4Network('10.0.0.0/8')
+        parent = networks[(index - 1) // 10]
+        prefix = min(parent.prefixlen + 4, 32)
+        offset = ((index - 1) % 10) << (32 - prefix) if prefix > parent.prefixlen else 0
+        return ipaddress.IPv4Network((int(parent.network_address) + offset, prefix))
+
+    def add(self, collection, obj):
+        with self.lock:
+            self.collections[collection][obj['id']] = obj
+            self.touch(collection)
+        return obj
+
+    def touch(self, collection):
+        self.versions[collection] = self.versions.get(collection, 0) + 1
+
+    def add_policy(self, app_id, rank, policy):
+        policy = dict(policy)
+        policy.setdefault('id', object_id('policy', next(self.created)))
+        policy['application_id'] = app_id
+        policy['rank'] = 'ABSOLUTE' if rank == 'absolute_policies' else 'DEFAULT'
+        self.add('policies', policy)
+        self.collections['applications'][app_id][rank].append(policy['id'])
+        return policy
+
+    def sensor(self, index):
+        ''' Returns the agent at `index`, None if it was deleted '''
+        uuid = '%040x' % (index + 1)
+        if uuid in self.deleted_sensors:
+            return None
+        # spread the agents over 10.0.0.0/8, and so over the scope tree
+        ip = str(ipaddress.IPv4Address(0x0A000000 + (index + 1) * 0x9E3779 % 0x1000000))
+        sensor = {
+            'uuid': uuid,
+            'host_name': 'host-%06d' % index,
+            'platform': PLATFORMS[index % len(PLATFORMS)],
+            'agent_type': AGENT_TYPES[index % len(AGENT_TYPES)],
+            'current_sw_version': '3.7.1.5',
+            'enable_pid_lookup': False,
+            'created_at': self.epoch,
+            'last_config_fetch_at': self.epoch + index % 3600,
+            'last_software_update_at': self.epoch,
+            'interfaces': [{
+                'name': 'eth0',
+                'ip': ip,
+                'netmask': '255.0.0.0',
+                'family_type': 'IPV4',
+                'mac': '00:50:56:%02x:%02x:%02x' % ((index >> 16) & 255, (index >> 8) & 255, index & 255),
+                'vrf': 'Default',
+                'vrf_id': 1
+            }],
+            'user_annotations': {'tier': ('web', 'app', 'db')[index % 3]}
+        }
+        sensor.update(self.sensor_updates.get(uuid, {}))
+        return sensor
+
+    def sensor_index(self, uuid):
+        try:
+            index = int(uuid, 16) - 1
+        except ValueError:
+            return None
+        return index if 0 <= index < self.sensor_count else None
+
+    def update_sensor(self, index, **fields):
+        ''' Changes an agent, bumping its last_config_fetch_at '''
+        uuid = '%040x' % (index + 1)
+        fields.setdefault('last_config_fetch_at', int(time.time()))
+        self.sensor_updates.setdefault(uuid, {}).update(fields)
+
+
+class FakeOpenApi(ThreadingHTTPServer):
+    '''
+    HTTP server answering the OpenAPI routes used by the modules from a
+    FakeTenant.
+
+    Attributes:
+        tenant: FakeTenant served
+        latency: Float of seconds each request takes
+        throttle_every: Int, every Nth request is answered 429, 0 to disable
+        error_rate: Float between 0 and 1 of requests answered 503
+        rejections: list of (method, route template, body subset) of the
+        requests answered 422, to make chosen calls fail
+        requests_seen: list of (method, route template, status) of the
+        requests served
+    '''
+    daemon_threads = True
+
+    def __init__(self, tenant=None, api_key=API_KEY, api_secret=API_SECRET, latency=0, throttle_every=0,
+                 error_rate=0, seed=0):
+        self.tenant = tenant or FakeTenant()
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.error_rate = error_rate
+        self.requests_seen = []
+        self.rejections = []
+        self.random = random.Random(seed)
+        self.counter_lock = threading.Lock()
+        self.thread = None
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), FakeOpenApiHandler)
+
+    @property
+    def endpoint(self):
+        return 'http://127.0.0.1:%d' % self.server_port
+
+    def credentials(self):
+        ''' Returns the RestClient / provider arguments to talk to this server '''
+        return {'server_endpoint': self.endpoint, 'api_key': self.api_key, 'api_secret': self.api_secret}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def count(self, method=None, route=None):
+        ''' Returns the number of requests seen, optionally for one method / route template '''
+        return len([seen for seen in self.requests_seen
+                    if (method is None or seen[0] == method) and (route is None or seen[1] == route)])
+
+    def injected_failure(self):
+        ''' Returns the status of an injected failure for the next request, or None '''
+        with self.counter_lock:
+            number = len(self.requests_seen) + 1
+            if self.throttle_every and number % self.throttle_every == 0:
+                return 429
+            if self.error_rate and self.random.random() < self.error_rate:
+                return 503
+        return None
+
+    def rejected(self, method, route, body):
+        ''' Returns True when a request matches one of the rejections '''
+        for rejected_method, rejected_route, subset in self.rejections:
+            if (method, route) == (rejected_method, rejected_route) and all(
+                    isinstance(body, dict) and body.get(k) == v for k, v in subset.items()):
+                return True
+        return False
+
+
+class FakeOpenApiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        # headers and body are written separately, do not let Nagle delay the body
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request()
+
+    do_POST = do_PUT = do_DELETE = do_GET
+
+    # -------------------------------------------------------------------
+    # Plumbing
+    # -------------------------------------------------------------------
+    def handle_request(self):
+        api = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        raw_body = self.rfile.read(length) if length else b''
+        url = urlparse(self.path)
+        path = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else url.path
+        self.query = dict((k, v[0]) for k, v in parse_qs(url.query).items())
+        route = route_template(path, '')
+
+        if api.latency:
+            time.sleep(api.latency)
+        error = self.verify_signature(raw_body)
+        if error:
+            return self.reply(403, {'error': error}, route)
+        failure = api.injected_failure()
+        if failure == 429:
+            return self.reply(429, {'error': 'Too many requests'}, route, {'Retry-After': '0'})
+        if failure:
+            return self.reply(failure, {'error': 'Service unavailable'}, route)
+
+        if self.headers.get('Content-Encoding') == 'gzip':
+            raw_body = gzip.decompress(raw_body)
+        try:
+            self.body = json.loads(raw_body.decode('utf-8')) if raw_body else None
+        except ValueError:
+            return self.reply(400, {'error': 'Invalid JSON body'}, route)
+        if api.rejected(self.command, route, self.body):
+            return self.reply(422, {'error': 'Rejected'}, route)
+
+        segments = [s for s in path.split('/') if s]
+        with api.tenant.lock:
+            status, document, headers = self.dispatch(segments)
+        if status == 200 and self.command == 'GET' and headers.get('ETag'):
+            if self.headers.get('If-None-Match') == headers['ETag']:
+                return self.reply(304, None, route, headers)
+        return self.reply(status, document, route, headers)
+
+    def verify_signature(self, raw_body):
+        ''' Returns why the request is not signed like RestClient signs, None if it is '''
+        api = self.server
+        if self.headers.get('Id') != api.api_key:
+            return 'Unknown API key'
+        checksum = self.headers.get('X-Tetration-Cksum', '')
+        if raw_body and self.command in ('POST', 'PUT', 'DELETE'):
+            if checksum != hashlib.sha256(raw_body).hexdigest():
+                return 'Body checksum mismatch'
+        signed = ''.join('%s\n' % line for line in [
+            self.command, self.path, checksum,
+            self.headers.get('Content-Type', ''), self.headers.get('Timestamp', '')])
+        expected = base64.b64encode(hmac.new(
+            api.api_secret.encode('ascii'), signed.encode('utf-8'), hashlib.sha256).digest()).decode('ascii')
+        if not hmac.compare_digest(expected, self.headers.get('Authorization', '')):
+            return 'Invalid signature'
+        return None
+
+    def reply(self, status, document, route, headers=None):
+        self.server.requests_seen.append((self.command, route, status))
+        body = b'' if document is None or status == 304 else json.dumps(document).encode('utf-8')
+        headers = dict(headers or {})
+        if len(body) >= COMPRESSION_MIN_SIZE and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=1)
+            headers['Content-Encoding'] = 'gzip'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    # -------------------------------------------------------------------
+    # Routes
+    # -------------------------------------------------------------------
+    def dispatch(self, segments):
+        tenant = self.server.tenant
+        if segments[:1] == ['sensors']:
+            return self.sensors(segments[1:])
+        if segments[:2] == ['inventory', 'tags'] and len(segments) >= 3:
+            return self.inventory_tags(segments[2], segments[3:])
+        if segments[:3] == ['assets', 'cmdb', 'attributenames']:
+            names = sorted(set(k for tags in tenant.inventory_tags.values() for k in tags))
+            return 200, names, {}
+        if segments == ['app_scopes', 'commit_dirty']:
+            for scope in tenant.collections['app_scopes'].values():
+                if scope['dirty']:
+                    scope.update(dirty=False, short_query=scope['dirty_short_query'], dirty_short_query=None)
+            tenant.touch('app_scopes')
+            return 202, {}, {}
+        if segments[:1] == ['applications'] and len(segments) == 3:
+            return self.application_children(segments[1], segments[2])
+        if segments[:1] == ['users'] and len(segments) == 3:
+            return self.user_action(segments[1], segments[2])
+        if segments[:1] == ['roles'] and segments[2:] == ['capabilities']:
+            role = tenant.collections['roles'].get(segments[1])
+            if role is None:
+                return 404, {'error': 'Not found'}, {}
+            capability = dict(self.body or {}, id=object_id('capability', len(role['capabilities'])))
+            role['capabilities'].append(capability)
+            tenant.touch('roles')
+            return 200, capability, {}
+        for size in (2, 1):
+            name = '/'.join(segments[:size])
+            if name in tenant.collections and len(segments) in (size, size + 1):
+                return self.crud(name, segments[size] if len(segments) > size else None)
+        return 404, {'error': 'Unknown route'}, {}
+
+    def crud(self, name, obj_id):
+        tenant = self.server.tenant
+        objects = tenant.collections[name]
+        etag = {'ETag': '"%s-%d"' % (name.replace('/', '-'), tenant.versions.get(name, 0))}
+        if obj_id is None:
+            if self.command == 'GET':
+                results = [obj for obj in objects.values() if self.matches_query(obj)]
+                if name == 'users' and self.query.get('include_disabled') != 'true':
+                    results = [u for u in results if not u['disabled_at']]
+                return 200, results, etag
+            if self.command == 'POST':
+                obj = dict(self.body or {})
+                obj['id'] = object_id(name, next(tenant.created))
+                if name == 'users':
+                    obj.setdefault('role_ids', [])
+                    obj.update(created_at=int(time.time()), disabled_at=None)
+                if name == 'roles':
+                    obj.setdefault('capabilities', [])
+                if name in ('app_scopes', 'filters/inventories'):
+                    obj.setdefault('short_query', obj.get('query'))
+                    obj['query'] = obj['short_query']
+                return 200, tenant.add(name, obj), {}
+            return 405, {'error': 'Method not allowed'}, {}
+        obj = objects.get(obj_id)
+        if obj is None:
+            return 404, {'error': 'Not found'}, {}
+        if self.command == 'GET':
+            return 200, obj, etag
+        if self.command == 'PUT':
+            update = dict(self.body or {})
+            if name == 'filters/inventories' and 'query' in update:
+                update['short_query'] = update['query']
+            if name == 'app_scopes' and 'short_query' in update:
+                update['dirty'] = True
+                update['dirty_short_query'] = update.pop('short_query')
+            obj.update(update)
+            tenant.touch(name)
+            return 200, obj, {}
+        if self.command == 'DELETE':
+            if name == 'users':
+                obj['disabled_at'] = int(time.time())
+            else:
+                del objects[obj_id]
+            tenant.touch(name)
+            return 200, obj, {}
+        return 405, {'error': 'Method not allowed'}, {}
+
+    def matches_query(self, obj):
+        for key in ('app_scope_id', 'root_app_scope_id'):
+            if key in self.query and obj.get(key, self.query[key]) != self.query[key]:
+                return False
+        return True
+
+    def user_action(self, user_id, action):
+        tenant = self.server.tenant
+        user = tenant.collections['users'].get(user_id)
+        if user is None:
+            return 404, {'error': 'Not found'}, {}
+        role_id = (self.body or {}).get('role_id')
+        if action == 'add_role' and self.command == 'PUT':
+            if role_id not in tenant.collections['roles']:
+                return 422, {'error': 'Unknown role'}, {}
+            if role_id not in user['role_ids']:
+                user['role_ids'].append(role_id)
+        elif action == 'remove_role' and self.command == 'DELETE':
+            user['role_ids'] = [r for r in user['role_ids'] if r != role_id]
+        elif action == 'enable' and self.command == 'POST':
+            user['disabled_at'] = None
+        else:
+            return 404, {'error': 'Unknown route'}, {}
+        tenant.touch('users')
+        return 200, user, {}
+
+    def application_children(self, app_id, child):
+        tenant = self.server.tenant
+        app = tenant.collections['applications'].get(app_id)
+        if app is None:
+            return 404, {'error': 'Not found'}, {}
+        policies = tenant.collections['policies']
+        if child == 'details' and self.command == 'GET':
+            details = dict(app)
+            for rank in ('absolute_policies', 'default_policies'):
+                details[rank] = [policies[p] for p in app[rank] if p in policies]
+            return 200, details, {}
+        if child in ('absolute_policies', 'default_policies') and self.command == 'GET':
+            return 200, [policies[p] for p in app[child] if p in policies], {}
+        if child == 'policies' and self.command == 'POST':
+            rank = 'absolute_policies' if (self.body or {}).get('rank') == 'ABSOLUTE' else 'default_policies'
+            return 200, tenant.add_policy(app_id, rank, self.body or {}), {}
+        return 404, {'error': 'Unknown route'}, {}
+
+    def sensors(self, rest):
+        tenant = self.server.tenant
+        if rest:
+            index = tenant.sensor_index(rest[0])
+            sensor = tenant.sensor(index) if index is not None else None
+            if sensor is None:
+                return 404, {'error': 'Not found'}, {}
+            if self.command == 'DELETE':
+                tenant.deleted_sensors.add(sensor['uuid'])
+            return 200, sensor, {}
+        limit = max(int(self.query.get('limit') or 1000), 1)
+        try:
+            start = int(base64.urlsafe_b64decode(self.query['offset'].encode('ascii'))) if self.query.get('offset') else 0
+        except (TypeError, ValueError):
+            return 400, {'error': 'Invalid offset'}, {}
+        page = []
+        index = start
+        while index < tenant.sensor_count and len(page) < limit:
+            sensor = tenant.sensor(index)
+            if sensor is not None:
+                page.append(sensor)
+            index += 1
+        document = {'results': page}
+        if index < tenant.sensor_count:
+            document['offset'] = base64.urlsafe_b64encode(str(index).encode('ascii')).decode('ascii')
+        return 200, document, {}
+
+    def inventory_tags(self, root_scope, rest):
+        tenant = self.server.tenant
+        ip = self.query.get('ip') or (self.body or {}).get('ip')
+        if rest == ['search']:
+            return 200, [dict(tags, ip=key) for key, tags in tenant.inventory_tags.items()
+                         if ip is None or key == ip], {}
+        if rest:
+            return 404, {'error': 'Unknown route'}, {}
+        if self.command == 'GET':
+            return 200, tenant.inventory_tags.get(ip, {}), {}
+        if self.command == 'POST':
+            tenant.inventory_tags.setdefault(ip, {}).update((self.body or {}).get('attributes') or {})
+            return 200, {'warnings': []}, {}
+        if self.command == 'DELETE':
+            tenant.inventory_tags.pop(ip, None)
+            return 200, {}, {}
+        return 405, {'error': 'Method not allowed'}, {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sensors', type=int, default=1000)
+    parser.add_argument('--scopes', type=int, default=100)
+    parser.add_argument('--applications', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--throttle-every', type=int, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    args = parser.parse_args()
+    tenant = FakeTenant(sensors=args.sensors, scopes=args.scopes, applications=args.applications)
+    api = FakeOpenApi(tenant, latency=args.latency,
+                      throttle_every=args.throttle_every, error_rate=args.error_rate)
+    print('TETRATION_SERVER_ENDPOINT=%s' % api.endpoint)
+    print('TETRATION_API_KEY=%s' % api.api_key)
+    print('TETRATION_API_SECRET=%s' % api.api_secret, flush=True)
+    try:
+        api.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
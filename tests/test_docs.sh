@@ -25,6 +25,7 @@ declare -a arr=("tetration_application"
                 "tetration_software_agent_config_profile"
                 "tetration_software_agent_config_intent"
                 "tetration_user"
+                "tetration_users"
                 )
 
 for i in "${arr[@]}"
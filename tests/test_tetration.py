@@ -1,14 +1,40 @@
 import pytest
 import json
+import gzip
+import io
+import hashlib
+import hmac
+import base64
+import requests
 
 from module_utils import tetration
 from module_utils import tetration_constants
+from module_utils import tetration_turbo
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils import basic
 from ansible.module_utils._text import to_bytes
+from ansible.errors import AnsibleLookupError
 
 from dotenv import load_dotenv
 import os
+import socket
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ansible.inventory.manager import InventoryManager
+from ansible.parsing.dataloader import DataLoader
+from ansible.plugins.loader import callback_loader, fragment_loader, inventory_loader, lookup_loader, module_utils_loader
+
+# the controller plugins import module_utils from the configured directory
+module_utils_loader.add_directory(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'module_utils'))
+
+from plugins.inventory.tetration_sensors import ScopeTree, compile_query, interface_fields
+from tests.fake_openapi import FakeOpenApi, FakeTenant, object_id
 
 
 @pytest.fixture()
@@ -158,6 +184,19 @@ def set_module_args(args):
     basic._ANSIBLE_ARGS = to_bytes(args)
 
 
+def make_api_module(**provider):
+    ''' Returns a TetrationApiModule of a fake cluster, provider overrides its options '''
+    module_args = dict(
+        provider=dict(type='dict', options=tetration_constants.TETRATION_PROVIDER_SPEC)
+    )
+    set_module_args({'provider': dict({
+        'server_endpoint': 'https://fake.com',
+        'api_key': 'deadbeef',
+        'api_secret': 'beef'
+    }, **provider)})
+    return tetration.TetrationApiModule(AnsibleModule(argument_spec=module_args))
+
+
 class TestRestClient:
     def test_create_class_instance(self):
         server_endpoint = "https://www.google.com"
@@ -775,3 +814,1524 @@ class TestTetrationApiModule:
             tet_client.is_subset(test_obj1, test_obj2)
 
         assert str(e.value) == "Both objects must be dictionaries."
+
+
+class TestRouteTimeouts:
+    def test_route_template_collapses_object_ids(self):
+        route = f"/openapi/v1{tetration_constants.TETRATION_API_USER}/5bb7eaa3497d4f4e657ca65a/add_role"
+
+        assert tetration.route_template(route) == '/users/{id}/add_role'
+        assert tetration.route_template('/openapi/v1/sensors?offset=abc') == '/sensors'
+
+    def test_latency_model_uses_max_timeout_without_samples(self):
+        model = tetration.RouteLatencyModel(min_samples=3)
+        model.observe('/roles', 0.1)
+
+        assert model.timeout_for('/roles', 10) == 10
+        assert model.timeout_for('/users', 10) == 10
+
+    def test_latency_model_tightens_fast_routes(self):
+        model = tetration.RouteLatencyModel(multiplier=3.0, min_timeout=0.5, min_samples=3)
+        for latency in [0.2, 0.3, 0.4]:
+            model.observe('/roles', latency)
+
+        assert model.quantile('/roles', 50) == 0.3
+        assert model.timeout_for('/roles', 10) == pytest.approx(1.2)
+        assert model.timeout_for('/roles', 1) == 1
+
+    def test_adaptive_timeout_flag_is_parsed(self):
+        for value, expected in [('no', False), ('false', False), ('yes', True), (True, True)]:
+            rest_client = tetration.RestClient(
+                'https://fake.com', api_key='deadbeef', api_secret='beef', adaptive_timeout=value)
+            assert rest_client.adaptive_timeout is expected
+
+    def test_expired_deadline_raises_before_sending(self):
+        rest_client = tetration.RestClient(
+            'https://localhost:1', api_key='deadbeef', api_secret='beef', deadline=0.01)
+        rest_client.deadline_at -= 1
+
+        with pytest.raises(tetration.TetrationDeadlineExceeded):
+            rest_client.get(tetration_constants.TETRATION_API_USER)
+
+
+def make_response(status_code, body=b'{}', headers=None):
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp._content = body
+    resp.headers.update(headers or {})
+    return resp
+
+
+class TestRetryPolicy:
+    def test_parse_retry_after_seconds_and_date(self):
+        assert tetration.RetryPolicy.parse_retry_after('7') == 7.0
+        assert tetration.RetryPolicy.parse_retry_after(None) is None
+        assert tetration.RetryPolicy.parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+
+    def test_backoff_curves_without_jitter(self):
+        exponential = tetration.RetryPolicy(backoff='exponential', base_delay=1, max_delay=5, jitter=False)
+        linear = tetration.RetryPolicy(backoff='linear', base_delay=2, jitter=False)
+
+        assert [exponential.delay(a) for a in range(4)] == [1, 2, 4, 5]
+        assert [linear.delay(a) for a in range(3)] == [2, 4, 6]
+
+    def test_decorrelated_jitter_stays_within_bounds(self):
+        policy = tetration.RetryPolicy(base_delay=1, max_delay=10)
+        delay = None
+        for attempt in range(20):
+            delay = policy.delay(attempt, delay)
+            assert 1 <= delay <= 10
+
+    def test_retry_after_takes_precedence(self):
+        policy = tetration.RetryPolicy(backoff='constant', base_delay=1, jitter=False)
+
+        assert policy.delay(0, retry_after='3') == 3
+
+    def test_invalid_backoff(self):
+        with pytest.raises(ValueError):
+            tetration.RetryPolicy(backoff='fibonacci')
+
+    def test_retries_are_counted_and_bounded_by_budget(self, monkeypatch):
+        rest_client = tetration.RestClient(
+            'https://localhost:1', api_key='deadbeef', api_secret='beef', max_retries=5,
+            retry_policy=tetration.RetryPolicy(backoff='constant', base_delay=0.01, budget=0.025, jitter=False))
+        sent = []
+
+        def fake_send(req, **kwargs):
+            sent.append(req)
+            return make_response(429)
+
+        monkeypatch.setattr(rest_client.session, 'send', fake_send)
+        resp = rest_client.get(tetration_constants.TETRATION_API_USER)
+
+        assert resp.status_code == 429
+        assert len(sent) == 3
+        stats = rest_client.get_stats()
+        assert stats['requests'] == 3
+        assert stats['retries'] == 2
+        assert stats['throttled'] == 3
+        assert stats['retry_sleep_sec'] == pytest.approx(0.02)
+
+    def test_module_result_contains_stats(self, capsys):
+        tet_module = make_api_module()
+
+        with pytest.raises(SystemExit):
+            tet_module.module.exit_json(changed=False)
+
+        result = json.loads(capsys.readouterr().out)
+        assert result['tetration_stats']['retries'] == 0
+
+
+class TestRateLimiter:
+    def test_burst_is_served_without_waiting(self, tmp_path):
+        limiter = tetration.RateLimiter(10, burst=3, state_file=str(tmp_path / 'bucket'))
+
+        assert [limiter.acquire() for _ in range(3)] == [0, 0, 0]
+
+    def test_limiters_sharing_a_state_file_share_the_bucket(self, tmp_path):
+        state_file = str(tmp_path / 'bucket')
+        fork_1 = tetration.RateLimiter(20, burst=2, state_file=state_file)
+        fork_2 = tetration.RateLimiter(20, burst=2, state_file=state_file)
+
+        assert fork_1.acquire() == 0
+        assert fork_2.acquire() == 0
+        assert fork_1.acquire() > 0
+
+    def test_acquire_gives_up_after_max_wait(self, tmp_path):
+        limiter = tetration.RateLimiter(0.1, burst=1, state_file=str(tmp_path / 'bucket'))
+
+        assert limiter.acquire() == 0
+        assert limiter.acquire(max_wait=0.01) is None
+
+    def test_default_state_file_depends_on_cluster_and_key(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('HOME', str(tmp_path))
+        first = tetration.RateLimiter.default_state_file('https://a.example.com', b'key1')
+        second = tetration.RateLimiter.default_state_file('https://a.example.com', b'key2')
+
+        assert first != second
+        assert first == tetration.RateLimiter.default_state_file('https://a.example.com', 'key1')
+        assert os.path.dirname(first) == str(tmp_path / '.ansible' / 'tmp' / 'tetration-ratelimit')
+        assert os.stat(os.path.dirname(first)).st_mode & 0o777 == 0o700
+        assert tetration.RateLimiter(10, state_file=first).acquire() == 0
+
+
+class FakeTurboClient:
+    def __init__(self):
+        self.deadline = None
+        self.calls = []
+
+    def signed_http_request(self, http_method, uri_path, args=None):
+        self.calls.append((http_method, uri_path))
+        return make_response(200, body=b'[{"id": "1"}]', headers={'Content-Type': 'application/json'})
+
+    def get_stats(self):
+        return {'requests': len(self.calls)}
+
+
+class TestTurbo:
+    def test_daemon_key_depends_on_every_provider_option(self):
+        provider = {'server_endpoint': 'https://fake.com', 'api_key': 'deadbeef', 'api_secret': 'beef'}
+        other_secret = dict(provider, api_secret='cafe')
+        with_turbo = dict(provider, turbo=True, turbo_idle_timeout=10)
+
+        assert tetration_turbo.daemon_key(provider) != tetration_turbo.daemon_key(other_secret)
+        assert tetration_turbo.daemon_key(provider) == tetration_turbo.daemon_key(with_turbo)
+
+    def test_false_strings_from_the_environment_disable_turbo(self, monkeypatch):
+        monkeypatch.setenv('TETRATION_TURBO', 'false')
+        monkeypatch.setenv('TETRATION_MEMOIZE', 'no')
+        provider = {'server_endpoint': 'https://fake.com', 'api_key': 'deadbeef', 'api_secret': 'beef'}
+
+        api = tetration.TetrationApiBase(provider, None)
+
+        assert api.provider['turbo'] is False
+        assert api.provider['memoize'] is False
+        assert api.provider['keep_alive'] is True
+        assert type(api.rc) is tetration.RestClient
+
+    def test_response_round_trip(self):
+        resp = make_response(404, body=b'{"error": "missing"}', headers={'X-Test': 'yes'})
+        resp.reason = 'Not Found'
+
+        rebuilt = tetration_turbo.decode_response(tetration_turbo.encode_response(resp), requests.Response)
+
+        assert rebuilt.status_code == 404
+        assert rebuilt.json() == {'error': 'missing'}
+        assert rebuilt.headers['x-test'] == 'yes'
+        assert not rebuilt.ok
+
+    def test_server_reuses_clients_between_tasks(self, tmp_path):
+        clients = []
+
+        def factory():
+            clients.append(FakeTurboClient())
+            return clients[-1]
+
+        def begin_task(client, deadline):
+            client.deadline = deadline
+
+        path = str(tmp_path / 'turbo.sock')
+        server = tetration_turbo.TurboServer(path, factory, begin_task, idle_timeout=60)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            for _ in range(2):
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.connect(path)
+                tetration_turbo.send_message(sock, {'op': 'begin', 'deadline': 30})
+                assert tetration_turbo.recv_message(sock) == {'ok': True}
+                tetration_turbo.send_message(sock, {'op': 'request', 'method': 'GET', 'uri_path': '/openapi/v1/users'})
+                reply = tetration_turbo.recv_message(sock)
+                resp = tetration_turbo.decode_response(reply['response'], requests.Response)
+                assert resp.json() == [{'id': '1'}]
+                sock.close()
+                while server.active:
+                    time.sleep(0.01)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert len(clients) == 1
+        assert clients[0].deadline == 30
+        assert len(clients[0].calls) == 2
+
+    def test_socket_lives_in_a_private_directory(self, monkeypatch):
+        # a short home, the path of a Unix socket is limited to about 100 bytes
+        home = tempfile.mkdtemp(dir='/tmp')
+        monkeypatch.setenv('HOME', home)
+        provider = {'server_endpoint': 'https://fake.com', 'api_key': 'deadbeef'}
+        path = tetration_turbo.socket_path(tetration_turbo.daemon_key(provider))
+        assert os.path.dirname(path) == os.path.join(home, '.ansible', 'tmp', 'tetration-turbo')
+
+        # a socket others may connect to is refused, and left in place
+        os.makedirs(os.path.dirname(path), mode=0o700)
+        planted = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        planted.bind(path)
+        os.chmod(path, 0o777)
+        try:
+            with pytest.raises(tetration_turbo.TurboError):
+                tetration_turbo.connect(provider, None, None)
+            assert os.path.exists(path)
+
+            os.chmod(path, 0o600)
+            os.chmod(os.path.dirname(path), 0o777)
+            with pytest.raises(tetration_turbo.TurboError):
+                tetration_turbo.connect(provider, None, None)
+        finally:
+            planted.close()
+            shutil.rmtree(home)
+
+
+class TestConnectionPool:
+    def test_pool_settings_are_applied_to_the_session(self):
+        rest_client = tetration.RestClient(
+            'https://fake.com', api_key='deadbeef', api_secret='beef',
+            pool_connections=2, pool_maxsize=20, pool_block=True, keep_alive=False)
+
+        adapter = rest_client.session.get_adapter('https://fake.com/openapi/v1/users')
+        assert adapter is rest_client.adapter
+        assert adapter.poolmanager.connection_pool_kw['maxsize'] == 20
+        assert adapter.poolmanager.connection_pool_kw['block'] is True
+        assert rest_client.session.headers['Connection'] == 'close'
+
+    def test_false_strings_turn_the_session_flags_off(self):
+        rest_client = tetration.RestClient(
+            'https://fake.com', api_key='deadbeef', api_secret='beef',
+            pool_block='false', keep_alive='false', compression='false')
+
+        adapter = rest_client.session.get_adapter('https://fake.com/openapi/v1/users')
+        assert adapter.poolmanager.connection_pool_kw['block'] is False
+        assert rest_client.session.headers['Connection'] == 'close'
+        assert rest_client.session.headers['Accept-Encoding'] == 'identity'
+
+    def test_tcp_keepalive_socket_options(self):
+        adapter = tetration.TetrationHTTPAdapter(tcp_keepalive=30)
+
+        options = adapter.poolmanager.connection_pool_kw['socket_options']
+        assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options
+
+    def test_pool_stats_are_reported(self):
+        rest_client = tetration.RestClient('https://fake.com', api_key='deadbeef', api_secret='beef')
+        rest_client.adapter.record_checkout(reused=False)
+        rest_client.adapter.record_checkout(reused=True)
+        rest_client.adapter.record_checkout(reused=True, waited=0.5)
+
+        pool = rest_client.get_stats()['pool']
+        assert pool == {
+            'connections_created': 1,
+            'connections_reused': 2,
+            'connection_waits': 1,
+            'connection_wait_sec': 0.5
+        }
+
+
+class TestCompression:
+    def capture_requests(self, rest_client, monkeypatch):
+        sent = []
+
+        def fake_send(req, **kwargs):
+            sent.append(req)
+            return make_response(200, body=b'{"ok": true}')
+
+        monkeypatch.setattr(rest_client.session, 'send', fake_send)
+        return sent
+
+    def test_accept_encoding_negotiation(self, monkeypatch):
+        rest_client = tetration.RestClient('https://fake.com', api_key='deadbeef', api_secret='beef')
+        plain_client = tetration.RestClient(
+            'https://fake.com', api_key='deadbeef', api_secret='beef', compression=False)
+        sent = self.capture_requests(rest_client, monkeypatch)
+        sent_plain = self.capture_requests(plain_client, monkeypatch)
+
+        rest_client.get(tetration_constants.TETRATION_API_SENSORS)
+        plain_client.get(tetration_constants.TETRATION_API_SENSORS)
+
+        assert sent[0].headers['Accept-Encoding'] == 'gzip, deflate'
+        assert sent_plain[0].headers['Accept-Encoding'] == 'identity'
+
+    def test_large_request_bodies_are_gzipped_and_checksummed(self, monkeypatch):
+        rest_client = tetration.RestClient(
+            'https://fake.com', api_key='deadbeef', api_secret='beef', compress_requests=True)
+        sent = self.capture_requests(rest_client, monkeypatch)
+        payload = json.dumps({'description': 'x' * 4096})
+
+        rest_client.post(tetration_constants.TETRATION_API_SCOPES, json_body=payload)
+        rest_client.post(tetration_constants.TETRATION_API_SCOPES, json_body='{"a": 1}')
+
+        assert sent[0].headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(sent[0].body).decode('utf-8') == payload
+        assert sent[0].headers['X-Tetration-Cksum'] == hashlib.sha256(sent[0].body).hexdigest()
+        assert 'Content-Encoding' not in sent[1].headers
+        stats = rest_client.get_stats()
+        assert stats['bytes_sent'] == len(sent[0].body) + len('{"a": 1}')
+        assert stats['bytes_received'] == 2 * len(b'{"ok": true}')
+
+    def test_compress_requests_false_string_sends_plain_bodies(self, monkeypatch):
+        rest_client = tetration.RestClient(
+            'https://fake.com', api_key='deadbeef', api_secret='beef', compress_requests='false')
+        sent = self.capture_requests(rest_client, monkeypatch)
+
+        rest_client.post(tetration_constants.TETRATION_API_SCOPES, json_body=json.dumps({'description': 'x' * 4096}))
+
+        assert 'Content-Encoding' not in sent[0].headers
+
+
+def legacy_signature(req, api_secret):
+    digest = hmac.new(api_secret, digestmod=hashlib.sha256)
+    for line in [req.method, req.path_url, req.headers.get('X-Tetration-Cksum', ''),
+                 req.headers.get('Content-Type', ''), req.headers.get('Timestamp', '')]:
+        digest.update(to_bytes(line) + b'\n')
+    return base64.b64encode(digest.digest())
+
+
+class TestRequestSigning:
+    def test_signature_matches_the_reference_scheme(self):
+        rest_client = tetration.RestClient('https://fake.com', api_key='deadbeef', api_secret='beef')
+        for method, body in [('GET', ''), ('POST', '{"name": "x"}'), ('DELETE', '')]:
+            req = rest_client.prepare_signed_request(
+                method, '/openapi/v1/app_scopes', params={'offset': 'a b'}, json_body=body)
+            assert req.headers['Authorization'] == legacy_signature(req, b'beef')
+            assert req.headers['Id'] == b'deadbeef'
+            assert req.headers['Content-Type'] == 'application/json'
+            assert req.url == 'https://fake.com/openapi/v1/app_scopes?offset=a+b'
+
+    def test_body_is_encoded_once_and_checksummed(self):
+        rest_client = tetration.RestClient('https://fake.com', api_key='deadbeef', api_secret='beef')
+        body = json.dumps({'description': u'café'})
+
+        req = rest_client.prepare_signed_request('PUT', '/openapi/v1/roles/1', json_body=body)
+        get_req = rest_client.prepare_signed_request('GET', '/openapi/v1/roles')
+
+        assert req.body == body.encode('utf-8')
+        assert req.headers['Content-Length'] == str(len(req.body))
+        assert req.headers['X-Tetration-Cksum'] == hashlib.sha256(req.body).hexdigest()
+        assert get_req.body is None
+        assert 'X-Tetration-Cksum' not in get_req.headers
+        assert 'Content-Length' not in get_req.headers
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    delay = 0.1
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.seen.append(dict(self.headers))
+        time.sleep(self.delay)
+        body = json.dumps({'path': self.path}).encode('utf-8')
+        self.send_response(404 if '/missing' in self.path else 200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def recording_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+    server.seen = []
+    worker = threading.Thread(target=server.serve_forever)
+    worker.daemon = True
+    worker.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestGather:
+    @pytest.mark.parametrize('use_aiohttp', [True, False])
+    def test_calls_run_concurrently_and_keep_their_order(self, recording_server, monkeypatch, use_aiohttp):
+        if use_aiohttp and not tetration.HAS_AIOHTTP:
+            pytest.skip('aiohttp is not installed')
+        monkeypatch.setattr(tetration, 'HAS_AIOHTTP', use_aiohttp)
+        tet_module = make_api_module(server_endpoint='http://127.0.0.1:%d' % recording_server.server_port, concurrency=20)
+        routes = ['/applications/%024x/details' % i for i in range(20)]
+
+        started = time.monotonic()
+        results = tet_module.gather([('GET', route) for route in routes])
+
+        assert time.monotonic() - started < 20 * RecordingHandler.delay
+        assert [result['path'] for result in results] == ['/openapi/v1' + route for route in routes]
+        assert tet_module.rc.get_stats()['requests'] == 20
+        for headers in recording_server.seen:
+            assert headers['Id'] == 'deadbeef'
+            assert 'Authorization' in headers and 'Timestamp' in headers
+
+    @pytest.mark.parametrize('use_aiohttp', [True, False])
+    def test_failed_calls_fail_the_module_like_run_method(self, recording_server, monkeypatch, capsys, use_aiohttp):
+        if use_aiohttp and not tetration.HAS_AIOHTTP:
+            pytest.skip('aiohttp is not installed')
+        monkeypatch.setattr(tetration, 'HAS_AIOHTTP', use_aiohttp)
+        tet_module = make_api_module(server_endpoint='http://127.0.0.1:%d' % recording_server.server_port, concurrency=20)
+
+        with pytest.raises(SystemExit):
+            tet_module.gather([('GET', '/roles'), ('GET', '/missing/one'), ('GET', '/users')])
+
+        result = json.loads(capsys.readouterr().out)
+        assert result['failed'] and result['code'] == 404 and result['operation'] == 'get'
+        # the worker threads did not share the session of the client
+        assert getattr(tet_module.rc._local, 'session', None) is None
+
+
+class TestRunBatch:
+    def test_calls_run_on_threads_and_keep_their_order(self, recording_server):
+        tet_module = make_api_module(server_endpoint='http://127.0.0.1:%d' % recording_server.server_port, concurrency=8)
+        routes = ['/roles/%024x' % i for i in range(16)]
+
+        started = time.monotonic()
+        results, errors = tet_module.run_batch([('GET', route) for route in routes])
+
+        assert time.monotonic() - started < 8 * RecordingHandler.delay
+        assert errors == []
+        assert [result['path'] for result in results] == ['/openapi/v1' + route for route in routes]
+        stats = tet_module.get_stats()
+        assert stats['requests'] == 16
+        # every thread opened its own connection, counted on the client
+        assert stats['pool']['connections_created'] == 8
+        # the main session is not used by the worker threads
+        assert getattr(tet_module.rc._local, 'session', None) is None
+
+    def test_failed_calls_are_collected(self, recording_server):
+        tet_module = make_api_module(server_endpoint='http://127.0.0.1:%d' % recording_server.server_port, concurrency=4)
+        calls = [('GET', '/users/%024x' % i) for i in range(3)] + [('GET', '/missing/one'), ('GET', '/users/last')]
+
+        results, errors = tet_module.run_batch(calls)
+
+        assert results[3] is None
+        assert results[4] == {'path': '/openapi/v1/users/last'}
+        assert errors == [{
+            'index': 3,
+            'msg': '{"path": "/openapi/v1/missing/one"}',
+            'operation': 'get',
+            'code': 404,
+            'route': '/missing/one'
+        }]
+        # outside of a batch a failure still fails the module
+        with pytest.raises(SystemExit):
+            tet_module.run_method('GET', '/missing/two')
+
+    def test_connection_errors_are_collected(self):
+        tet_module = make_api_module(server_endpoint='http://127.0.0.1:9', concurrency=1)
+        tet_module.rc.retries = 1
+
+        results, errors = tet_module.run_batch([('GET', '/roles'), ('DELETE', '/roles/1')])
+
+        assert results == [None, None]
+        assert [(e['index'], e['operation'], e['route']) for e in errors] == [
+            (0, 'get', '/roles'), (1, 'delete', '/roles/1')]
+
+
+def make_streamed_response(status_code, body):
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp.raw = io.BytesIO(body)
+    return resp
+
+
+class TestStreamingDecoder:
+    def test_items_are_decoded_across_chunk_boundaries(self):
+        document = {'results': [{'host_name': u'hé%d' % i, 'n': i * 1000} for i in range(20)] + [12345],
+                    'offset': 'next', 'total': 21}
+        body = json.dumps(document).encode('utf-8')
+        stream = tetration.JsonRecordStream(body[i:i + 1] for i in range(len(body)))
+
+        assert list(stream) == document['results']
+        assert stream.meta == {'offset': 'next', 'total': 21}
+
+    def test_top_level_arrays_and_empty_documents(self):
+        assert list(tetration.JsonRecordStream([b' [1, ', b'2 ,{"a": [3]}]'])) == [1, 2, {'a': [3]}]
+        assert list(tetration.JsonRecordStream([b'[]'])) == []
+        stream = tetration.JsonRecordStream([b'{"offset": 5, "results": []}'])
+        assert list(stream) == [] and stream.meta == {'offset': 5}
+
+    def test_truncated_documents_raise(self):
+        with pytest.raises(ValueError):
+            list(tetration.JsonRecordStream([b'{"results": [{"a": 1}, {"b"']))
+
+    def test_paginated_get_filters_records_while_streaming(self, monkeypatch):
+        tet_module = make_api_module()
+        pages = [
+            {'results': [{'id': 1}, {'id': 2}], 'offset': 'b'},
+            {'results': [{'id': 3}, {'id': 4}]}
+        ]
+        sent = []
+
+        def fake_send(req, **kwargs):
+            assert kwargs['stream'] is True
+            sent.append(req.url)
+            return make_streamed_response(200, json.dumps(pages[len(sent) - 1]).encode('utf-8'))
+
+        monkeypatch.setattr(tet_module.rc.session, 'send', fake_send)
+        results = tet_module.run_method_paginated(
+            'GET', tetration_constants.TETRATION_API_SENSORS, record_filter=lambda r: r['id'] % 2 == 0)
+
+        assert results == [{'id': 2}, {'id': 4}]
+        assert 'offset=b' in sent[1]
+        assert tet_module.rc.get_stats()['bytes_received'] == sum(len(json.dumps(p)) for p in pages)
+
+
+class TestJsonCodec:
+    def test_auto_prefers_the_fastest_installed_codec(self, monkeypatch):
+        monkeypatch.setattr(tetration, 'HAS_ORJSON', False)
+        monkeypatch.setattr(tetration, 'HAS_UJSON', False)
+        assert tetration.JsonCodec('auto').name == 'json'
+        monkeypatch.setattr(tetration, 'HAS_UJSON', True)
+        assert tetration.JsonCodec().name == 'ujson'
+
+    def test_unavailable_codec_is_rejected(self, monkeypatch):
+        monkeypatch.setattr(tetration, 'HAS_ORJSON', False)
+        with pytest.raises(ValueError):
+            tetration.JsonCodec('orjson')
+        with pytest.raises(ValueError):
+            tetration.JsonCodec('simplejson')
+
+    @pytest.mark.parametrize('name', tetration.JsonCodec.CODECS)
+    def test_codecs_round_trip_bodies(self, name):
+        if name != 'json' and not getattr(tetration, 'HAS_' + name.upper()):
+            pytest.skip('%s is not installed' % name)
+        codec = tetration.JsonCodec(name)
+        document = {'name': u'café/ops', 'filters': [{'value': '10.0.0.0/8'}], 'priority': 10, 'dirty': None}
+
+        assert codec.loads(codec.dumps(document)) == document
+        assert codec.response_json(make_response(200, body=json.dumps(document).encode('utf-8'))) == document
+
+
+def serve_pages(tet_module, monkeypatch, count, fail_at=None):
+    """ Serves `count` pages of 10 records, returns the query of every request and its thread """
+    requests_seen = []
+
+    def fake_send(req, **kwargs):
+        query = dict(p.split('=') for p in req.url.split('?')[1].split('&'))
+        requests_seen.append((threading.current_thread().name, query))
+        page = int(query.get('offset', 0))
+        if page == fail_at:
+            return make_streamed_response(403, b'forbidden')
+        body = {'results': [{'id': page * 10 + i} for i in range(10)]}
+        if page + 1 < count:
+            body['offset'] = page + 1
+        return make_streamed_response(200, json.dumps(body).encode('utf-8'))
+
+    monkeypatch.setattr(tet_module.rc.session, 'send', fake_send)
+    return requests_seen
+
+
+class TestPrefetch:
+    @pytest.mark.parametrize('prefetch_depth', [0, 1, 3])
+    def test_pages_keep_their_order(self, monkeypatch, prefetch_depth):
+        tet_module = make_api_module(prefetch_depth=prefetch_depth)
+        requests_seen = serve_pages(tet_module, monkeypatch, 7)
+
+        results = tet_module.run_method_paginated('GET', tetration_constants.TETRATION_API_SENSORS)
+
+        assert [r['id'] for r in results] == list(range(70))
+        threads = set(thread for thread, _ in requests_seen)
+        assert (threading.current_thread().name in threads) == (prefetch_depth == 0)
+
+    def test_worker_errors_fail_the_module_from_the_main_thread(self, monkeypatch, capsys):
+        tet_module = make_api_module(prefetch_depth=2)
+        serve_pages(tet_module, monkeypatch, 7, fail_at=3)
+
+        with pytest.raises(SystemExit):
+            tet_module.run_method_paginated('GET', tetration_constants.TETRATION_API_SENSORS)
+
+        result = json.loads(capsys.readouterr().out)
+        assert result['failed'] and result['code'] == 403
+
+
+class TestIterPaginated:
+    def test_page_size_and_params_are_honored_without_mutation(self, monkeypatch):
+        tet_module = make_api_module()
+        requests_seen = serve_pages(tet_module, monkeypatch, 3)
+        params = {'include_deleted': 'true'}
+
+        records = list(tet_module.iter_paginated(
+            'GET', tetration_constants.TETRATION_API_SENSORS, params=params, page_size=250))
+
+        assert len(records) == 30
+        assert params == {'include_deleted': 'true'}
+        assert [query['limit'] for _, query in requests_seen] == ['250'] * 3
+        assert all(query['include_deleted'] == 'true' for _, query in requests_seen)
+
+    @pytest.mark.parametrize('prefetch_depth', [0, 1])
+    def test_early_termination_stops_fetching_pages(self, monkeypatch, prefetch_depth):
+        tet_module = make_api_module(prefetch_depth=prefetch_depth)
+        requests_seen = serve_pages(tet_module, monkeypatch, 50)
+
+        first_match = next(r for r in tet_module.iter_paginated(
+            'GET', tetration_constants.TETRATION_API_SENSORS) if r['id'] == 12)
+        limited = list(tet_module.iter_paginated(
+            'GET', tetration_constants.TETRATION_API_SENSORS, max_items=15))
+
+        assert first_match == {'id': 12}
+        assert [r['id'] for r in limited] == list(range(15))
+        # both walks needed 2 pages; a prefetching worker also fills its
+        # queue and fetches one more page before it notices the walk ended
+        if prefetch_depth:
+            assert len(requests_seen) <= 2 * (2 + prefetch_depth + 1)
+        else:
+            assert len(requests_seen) == 4
+
+
+class TestObjectIndex:
+    def test_find_keeps_the_filter_semantics(self):
+        index = tetration.ObjectIndex()
+        index.add([{'id': 1, 'email': 'a@x.com'}, {'id': 2}, {'id': 3, 'email': 'b@x.com', 'tags': ['x']}])
+
+        assert index.find({'email': 'b@x.com'}) == [1, 2]
+        assert index.find({'email': 'c@x.com'}) == [1]
+        assert index.find({'tags': ['x']}) == [0, 1, 2]
+
+        index.add([{'id': 4, 'email': 'b@x.com'}])
+        assert index.find({'email': 'b@x.com'}) == [1, 2, 3]
+
+    def test_get_object_pages_until_a_match_and_reuses_the_index(self, monkeypatch):
+        tet_module = make_api_module()
+        sent = []
+        pages = {None: ({'results': [{'id': i, 'email': 'u%d@x.com' % i} for i in range(10)]}, 'p2'),
+                 'p2': ({'results': [{'id': i, 'email': 'u%d@x.com' % i} for i in range(10, 20)]}, 'p3'),
+                 'p3': ({'results': [{'id': 20, 'email': 'u20@x.com'}]}, None)}
+
+        def fake_send(req, **kwargs):
+            sent.append((req.method, req.url))
+            query = dict(p.split('=') for p in req.url.split('?')[1].split('&')) if '?' in req.url else {}
+            body, next_offset = pages[query.get('offset')]
+            body = dict(body, offset=next_offset) if next_offset else body
+            return make_response(200, body=json.dumps(body).encode('utf-8'))
+
+        monkeypatch.setattr(tet_module.rc.session, 'send', fake_send)
+        target = tetration_constants.TETRATION_API_USER
+
+        assert tet_module.get_object(dict(email='u12@x.com'), target=target)['id'] == 12
+        assert len(sent) == 2
+        assert tet_module.get_object(dict(email='u3@x.com'), target=target)['id'] == 3
+        assert tet_module.get_object(dict(email='nobody'), target=target) is None
+        assert len(sent) == 3
+        assert tet_module.get_object(dict(email='u0@x.com'), target=target, allow_multiple=True) == [
+            {'id': 0, 'email': 'u0@x.com'}]
+        assert len(sent) == 3
+
+        tet_module.run_method('PUT', target + '/5bb7bc01497d4f228d6b8123', req_payload={})
+        assert tet_module.get_object(dict(email='u3@x.com'), target=target)['id'] == 3
+        assert len(sent) == 5
+
+        tet_module.get_object(dict(app_scope_id='abc', email='u1@x.com'), target=target)
+        assert 'app_scope_id=abc' in sent[-1][1]
+
+    def test_replace_keeps_the_indexes_in_step(self):
+        index = tetration.ObjectIndex()
+        index.add([{'id': 1, 'email': 'a@x.com'}, {'id': 2, 'email': 'b@x.com'}])
+        assert index.find({'email': 'a@x.com'}) == [0]
+
+        index.replace(1, {'id': 1, 'email': 'c@x.com'})
+        index.replace(2, None)
+        index.add([{'id': 2, 'email': 'b@x.com'}, {'id': 3, 'email': 'a@x.com'}])
+
+        assert index.find({'email': 'a@x.com'}) == [3]
+        assert index.find({'email': 'c@x.com'}) == [0]
+        assert index.find({'email': 'b@x.com'}) == [2]
+        assert index.objects[1] is None
+
+    def test_writes_update_the_index_instead_of_dropping_it(self, fake_api):
+        tet_module = make_api_module(**fake_api.credentials())
+        users = tetration_constants.TETRATION_API_USER
+        roles = tetration_constants.TETRATION_API_ROLE
+        user = tet_module.get_object(dict(email='user0@example.com'), target=users)
+        role = tet_module.get_object(dict(name='role-5'), target=roles)
+
+        tet_module.run_method('PUT', '%s/%s/add_role' % (users, user['id']), req_payload={'role_id': role['id']})
+        created = tet_module.run_method('POST', users, req_payload={
+            'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User'})
+        tet_module.run_method('DELETE', '%s/%s' % (roles, role['id']))
+        tet_module.run_method('DELETE', '%s/%s' % (users, user['id']))
+
+        user = tet_module.get_object(dict(email='user0@example.com'), target=users)
+        assert role['id'] in user['role_ids'] and user['disabled_at']
+        assert tet_module.get_object(dict(email='new@example.com'), target=users)['id'] == created['id']
+        assert tet_module.get_object(dict(name='role-5'), target=roles) is None
+        assert fake_api.count('GET', '/users') == 1 and fake_api.count('GET', '/roles') == 1
+
+        # a write whose effect is unknown still drops the index
+        tet_module.run_method('POST', '/app_scopes/commit_dirty', req_payload={})
+        tet_module.get_object(dict(name='Default'), target=tetration_constants.TETRATION_API_SCOPES)
+        tet_module.run_method('POST', '/app_scopes/commit_dirty', req_payload={})
+        tet_module.get_object(dict(name='Default'), target=tetration_constants.TETRATION_API_SCOPES)
+        assert fake_api.count('GET', '/app_scopes') == 2
+
+    def test_found_objects_are_copies(self, fake_api):
+        tet_module = make_api_module(**fake_api.credentials())
+        users = tetration_constants.TETRATION_API_USER
+
+        user = tet_module.get_object(dict(email='user0@example.com'), target=users)
+        user.setdefault('role_ids', []).append('not-sent')
+        tet_module.get_object(dict(email='user1@example.com'), target=users, allow_multiple=True)[0]['email'] = 'x'
+
+        assert 'not-sent' not in (tet_module.get_object(dict(email='user0@example.com'), target=users).get('role_ids') or [])
+        assert tet_module.get_object(dict(email='user1@example.com'), target=users)['email'] == 'user1@example.com'
+        assert fake_api.count('GET', '/users') == 1
+
+
+class TestResponseCache:
+    def make_cache(self, tmp_path, ttl=60):
+        return tetration.ResponseCache(str(tmp_path), ttl, 'https://fake.com', 'deadbeef')
+
+    def test_entries_are_shared_and_expire(self, tmp_path):
+        fork_1 = self.make_cache(tmp_path)
+        fork_2 = self.make_cache(tmp_path)
+        expired = self.make_cache(tmp_path, ttl=-1)
+
+        hit, _, token = fork_1.get(tetration_constants.TETRATION_API_SCOPES, None)
+        assert not hit
+        fork_1.put(tetration_constants.TETRATION_API_SCOPES, None, [{'id': 's1'}], token)
+
+        assert fork_2.get(tetration_constants.TETRATION_API_SCOPES, None)[:2] == (True, [{'id': 's1'}])
+        assert not fork_2.get(tetration_constants.TETRATION_API_SCOPES, {'root_app_scope_id': 'x'})[0]
+        assert not expired.get(tetration_constants.TETRATION_API_SCOPES, None)[0]
+        assert fork_2.stats == {'hits': 1, 'misses': 1, 'invalidations': 0}
+
+    def test_only_reference_collections_are_cached(self, tmp_path):
+        cache = self.make_cache(tmp_path)
+
+        assert cache.get(tetration_constants.TETRATION_API_SENSORS, None) == (False, None, None)
+        assert cache.get('/app_scopes/5bb7bc01497d4f228d6b8123', None) == (False, None, None)
+        assert cache.stats['misses'] == 0
+
+    def test_writes_invalidate_and_discard_stale_fetches(self, tmp_path):
+        cache = self.make_cache(tmp_path)
+        other_fork = self.make_cache(tmp_path)
+        _, _, token = cache.get(tetration_constants.TETRATION_API_ROLE, None)
+        cache.put(tetration_constants.TETRATION_API_ROLE, None, ['old'], token)
+        _, _, stale_token = other_fork.get(tetration_constants.TETRATION_API_SCOPES, None)
+
+        cache.invalidate('/openapi/v1/roles/5bb7bc01497d4f228d6b8123/capabilities')
+        cache.invalidate('/app_scopes/commit_dirty')
+        other_fork.put(tetration_constants.TETRATION_API_SCOPES, None, ['stale'], stale_token)
+
+        assert not cache.get(tetration_constants.TETRATION_API_ROLE, None)[0]
+        assert not cache.get(tetration_constants.TETRATION_API_SCOPES, None)[0]
+
+    def test_default_cache_dir_is_private_to_the_user(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('HOME', str(tmp_path))
+        cache = tetration.ResponseCache(tetration.ResponseCache.default_cache_dir(), 60, 'https://fake.com', 'deadbeef')
+
+        _, _, token = cache.get(tetration_constants.TETRATION_API_SCOPES, None)
+        cache.put(tetration_constants.TETRATION_API_SCOPES, None, [{'id': 's1'}], token)
+
+        assert cache.root.startswith(str(tmp_path / '.ansible' / 'tmp' / 'tetration-cache'))
+        assert cache.get(tetration_constants.TETRATION_API_SCOPES, None)[0]
+        for directory in (tmp_path / '.ansible',
+                          tmp_path / '.ansible' / 'tmp',
+                          tmp_path / '.ansible' / 'tmp' / 'tetration-cache'):
+            assert directory.stat().st_mode & 0o777 == 0o700
+
+    def test_module_serves_cached_gets_and_reports_counts(self, tmp_path, monkeypatch):
+        sent = []
+
+        def fake_send(req, **kwargs):
+            sent.append(req.method)
+            return make_response(200, body=b'[{"id": "s1"}]')
+
+        for _ in range(2):
+            tet_module = make_api_module(cache_ttl=60, cache_dir=str(tmp_path))
+            monkeypatch.setattr(tet_module.rc.session, 'send', fake_send)
+            assert tet_module.run_method('GET', tetration_constants.TETRATION_API_SCOPES) == [{'id': 's1'}]
+
+        assert sent == ['GET']
+        tet_module.run_method('DELETE', tetration_constants.TETRATION_API_SCOPES + '/5bb7bc01497d4f228d6b8123')
+        tet_module.run_method('GET', tetration_constants.TETRATION_API_SCOPES)
+        assert sent == ['GET', 'DELETE', 'GET']
+        stats = tet_module.get_stats()
+        assert (stats['cache_hits'], stats['cache_misses']) == (1, 1)
+
+
+class TestMemoize:
+    def make_module(self, monkeypatch, delay=0):
+        tet_module = make_api_module()
+        sent = []
+
+        def fake_send(req, **kwargs):
+            sent.append((req.method, req.path_url))
+            time.sleep(delay)
+            return make_response(200, body=b'{"id": "r1", "capabilities": []}')
+
+        monkeypatch.setattr(tet_module.rc.session, 'send', fake_send)
+        return tet_module, sent
+
+    def test_identical_gets_are_served_from_memory_as_copies(self, monkeypatch):
+        tet_module, sent = self.make_module(monkeypatch)
+        role = tetration_constants.TETRATION_API_ROLE + '/5bb7bc01497d4f228d6b8123'
+
+        first = tet_module.run_method('GET', role)
+        first['capabilities'].append('mutated')
+        second = tet_module.run_method('GET', role)
+        tet_module.run_method('GET', role, params={'include': 'all'})
+
+        assert second == {'id': 'r1', 'capabilities': []}
+        assert len(sent) == 2
+        assert tet_module.get_stats()['memo_hits'] == 1
+
+    def test_writes_drop_only_the_affected_paths(self, monkeypatch):
+        tet_module, sent = self.make_module(monkeypatch)
+        roles = tetration_constants.TETRATION_API_ROLE
+        for target in [roles, roles + '/a1', roles + '/b2', tetration_constants.TETRATION_API_USER]:
+            tet_module.run_method('GET', target)
+
+        tet_module.run_method('POST', roles + '/a1/capabilities', req_payload={})
+        for target in [roles, roles + '/a1', roles + '/b2', tetration_constants.TETRATION_API_USER]:
+            tet_module.run_method('GET', target)
+
+        assert [path for method, path in sent[5:]] == ['/openapi/v1/roles', '/openapi/v1/roles/a1']
+
+    def test_concurrent_duplicate_gets_are_coalesced(self, monkeypatch):
+        tet_module, sent = self.make_module(monkeypatch, delay=0.2)
+        results = []
+        workers = [threading.Thread(target=lambda: results.append(
+            tet_module.run_method('GET', tetration_constants.TETRATION_API_SCOPES))) for _ in range(5)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert len(sent) == 1
+        assert len(results) == 5 and all(r == results[0] for r in results)
+
+
+class TestDiffObjects:
+    def test_query_trees_compare_regardless_of_order(self):
+        desired = {'type': 'and', 'filters': [
+            {'type': 'eq', 'field': 'ip', 'value': '10.0.0.1'},
+            {'type': 'or', 'filters': [
+                {'type': 'eq', 'field': 'port', 'value': '443'},
+                {'type': 'eq', 'field': 'port', 'value': 80}]}]}
+        current = {'filters': [
+            {'filters': [
+                {'value': '80', 'field': 'port', 'type': 'eq'},
+                {'value': 443, 'field': 'port', 'type': 'eq'}], 'type': 'or'},
+            {'field': 'ip', 'type': 'eq', 'value': '10.0.0.1'}], 'type': 'and'}
+
+        assert tetration.values_equal(desired, current)
+        current['filters'][0]['filters'][1]['value'] = 8443
+        assert not tetration.values_equal(desired, current)
+
+    def test_duplicates_and_types_are_not_ignored(self):
+        assert not tetration.values_equal([1, 1, 2], [1, 2, 2])
+        assert not tetration.values_equal(True, 'True')
+        assert not tetration.values_equal(None, 'None')
+        assert not tetration.values_equal({'a': 1}, {'a': 1, 'b': None})
+        assert tetration.values_equal(1.0, '1')
+
+    def test_diff_is_the_smallest_payload(self):
+        current = {
+            'id': 'abc',
+            'short_name': 'web',
+            'description': 'old',
+            'short_query': {'type': 'or', 'filters': [{'field': 'ip', 'type': 'eq', 'value': 'a'},
+                                                      {'field': 'ip', 'type': 'eq', 'value': 'b'}]}
+        }
+        desired = {
+            'short_name': 'web',
+            'description': 'new',
+            'policy_priority': 3,
+            'short_query': {'type': 'or', 'filters': [{'field': 'ip', 'type': 'eq', 'value': 'b'},
+                                                      {'field': 'ip', 'type': 'eq', 'value': 'a'}]}
+        }
+
+        assert tetration.diff_objects(desired, current) == {'description': 'new', 'policy_priority': 3}
+        assert tetration.diff_objects({'short_name': 'web'}, current) == {}
+
+
+class TestMetrics:
+    def test_calls_record_retries_and_sleep(self, monkeypatch):
+        rest_client = tetration.RestClient(
+            'https://localhost:1', api_key='deadbeef', api_secret='beef', metrics=True,
+            retry_policy=tetration.RetryPolicy(backoff='constant', base_delay=0.01, jitter=False))
+        replies = [make_response(429), make_response(200, b'{"id": 1}')]
+        monkeypatch.setattr(rest_client.session, 'send', lambda req, **kwargs: replies.pop(0))
+
+        rest_client.put('/users/5bb7bc01497d4f228d6b8123', json_body='{"a": 1}')
+
+        call, = rest_client.get_metrics()['calls']
+        assert call['method'] == 'PUT' and call['route'] == '/users/{id}'
+        assert call['status'] == 200
+        assert call['retries'] == 1 and call['throttled'] == 1
+        assert call['retry_sleep_sec'] == pytest.approx(0.01)
+        assert call['bytes_sent'] == 8 and call['bytes_received'] == 9 + 2
+        assert call['latency_sec'] >= 0.01
+
+    def test_module_result_contains_calls_and_pages(self, monkeypatch, capsys):
+        monkeypatch.setenv('TETRATION_METRICS', 'true')
+        tet_module = make_api_module()
+        serve_pages(tet_module, monkeypatch, 3)
+
+        tet_module.run_method_paginated('GET', tetration_constants.TETRATION_API_SENSORS)
+        with pytest.raises(SystemExit):
+            tet_module.module.exit_json(changed=False)
+
+        metrics = json.loads(capsys.readouterr().out)['tetration_metrics']
+        assert metrics['pages'] == 3 and metrics['paginated_calls'] == 1
+        assert [(c['route'], c['status']) for c in metrics['calls']] == [('/sensors', 200)] * 3
+        # streamed pages are counted once they have been read
+        assert all(c['bytes_received'] > 0 for c in metrics['calls'])
+
+    def test_metrics_are_off_by_default(self, monkeypatch, capsys):
+        monkeypatch.delenv('TETRATION_METRICS', raising=False)
+        tet_module = make_api_module()
+
+        with pytest.raises(SystemExit):
+            tet_module.module.exit_json(changed=False)
+
+        assert 'tetration_metrics' not in json.loads(capsys.readouterr().out)
+        assert tet_module.rc.metrics is None
+
+
+class ValidatingHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    version = 'v1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.seen.append(dict(self.headers))
+        etag = '"%s"' % self.version
+        if self.path.endswith('/app_scopes') and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps([{'id': self.version, 'path': self.path}]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.path.endswith('/app_scopes'):
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def validating_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ValidatingHandler)
+    server.seen = []
+    worker = threading.Thread(target=server.serve_forever)
+    worker.daemon = True
+    worker.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    ValidatingHandler.version = 'v1'
+
+
+class TestConditionalGet:
+    def make_client(self, server, conditional_get=True, **kwargs):
+        return tetration.RestClient(
+            'http://127.0.0.1:%d' % server.server_port, api_key='deadbeef', api_secret='beef',
+            conditional_get=conditional_get, **kwargs)
+
+    def test_not_modified_is_served_from_the_kept_copy(self, validating_server):
+        rest_client = self.make_client(validating_server)
+
+        first = rest_client.get(tetration_constants.TETRATION_API_SCOPES)
+        second = rest_client.get(tetration_constants.TETRATION_API_SCOPES)
+
+        assert 'If-None-Match' not in validating_server.seen[0]
+        assert validating_server.seen[1]['If-None-Match'] == '"v1"'
+        assert second.status_code == 200 and second.json() == first.json()
+        assert not first.unchanged and second.unchanged
+        assert rest_client.get_stats()['not_modified'] == 1
+
+        ValidatingHandler.version = 'v2'
+        third = rest_client.get(tetration_constants.TETRATION_API_SCOPES)
+        assert third.json()[0]['id'] == 'v2' and not third.unchanged
+
+    def test_bodies_without_validators_are_compared_by_digest(self, validating_server):
+        rest_client = self.make_client(validating_server)
+
+        first = rest_client.get(tetration_constants.TETRATION_API_ROLE)
+        second = rest_client.get(tetration_constants.TETRATION_API_ROLE)
+
+        assert all('If-None-Match' not in headers for headers in validating_server.seen)
+        assert first.body_digest == second.body_digest
+        assert second.unchanged
+        assert rest_client.get_stats()['not_modified'] == 0
+
+    def test_store_is_bounded(self):
+        store = tetration.ValidatorStore(max_entries=2, max_bytes=400)
+        for i in range(4):
+            response = make_response(200, b'x' * 100, headers={'ETag': '"%d"' % i})
+            store.update('https://fake.com/%d' % i, response)
+
+        assert store.conditional_headers('https://fake.com/0') == {}
+        assert store.conditional_headers('https://fake.com/3') == {'If-None-Match': '"3"'}
+
+    @pytest.mark.parametrize('conditional_get', [None, False, 'false'])
+    def test_is_off_unless_enabled(self, validating_server, conditional_get):
+        rest_client = self.make_client(validating_server, conditional_get=conditional_get)
+
+        rest_client.get(tetration_constants.TETRATION_API_SCOPES)
+        rest_client.get(tetration_constants.TETRATION_API_SCOPES)
+
+        assert all('If-None-Match' not in headers for headers in validating_server.seen)
+        assert 'not_modified' not in rest_client.get_stats()
+
+
+@pytest.fixture
+def fake_api():
+    with FakeOpenApi(FakeTenant(sensors=2500, scopes=30, users=5, roles=6)) as api:
+        yield api
+
+
+class TestFakeOpenApi:
+    def test_requests_must_be_signed_with_the_secret(self, fake_api):
+        good = tetration.RestClient(fake_api.endpoint, api_key=fake_api.api_key, api_secret=fake_api.api_secret)
+        bad = tetration.RestClient(fake_api.endpoint, api_key=fake_api.api_key, api_secret='0badc0de')
+
+        assert good.post('/roles', json_body='{"name": "r"}').status_code == 200
+        assert good.post('/roles', json_body='{"name": "r"}', params={'x': 1}).status_code == 200
+        response = bad.get('/roles')
+        assert response.status_code == 403 and response.json()['error'] == 'Invalid signature'
+
+    def test_sensors_are_paged_with_a_cursor(self, fake_api):
+        tet_module = make_api_module(prefetch_depth=1, **fake_api.credentials())
+
+        sensors = list(tet_module.iter_paginated('GET', tetration_constants.TETRATION_API_SENSORS, page_size=1000))
+
+        assert len(sensors) == 2500 and len(set(s['uuid'] for s in sensors)) == 2500
+        assert fake_api.count('GET', '/sensors') == 3
+
+    def test_throttled_requests_are_retried(self, fake_api):
+        fake_api.throttle_every = 2
+        tet_module = make_api_module(retry_base_delay=0.01, **fake_api.credentials())
+
+        tet_module.run_method('GET', tetration_constants.TETRATION_API_ROLE)
+        scopes = tet_module.run_method('GET', tetration_constants.TETRATION_API_SCOPES)
+
+        assert len(scopes) == 30
+        assert [status for _, _, status in fake_api.requests_seen] == [200, 429, 200]
+
+    def test_role_changes_are_applied_in_one_batch(self, fake_api):
+        tet_module = make_api_module(concurrency=4, **fake_api.credentials())
+        user = next(iter(fake_api.tenant.collections['users'].values()))
+        to_add = [r for r in fake_api.tenant.collections['roles'] if r not in user['role_ids']]
+        route = '%s/%s' % (tetration_constants.TETRATION_API_USER, user['id'])
+
+        calls = [('PUT', route + '/add_role', None, {'role_id': r}) for r in to_add]
+        calls += [('DELETE', route + '/remove_role', None, {'role_id': r}) for r in list(user['role_ids'])]
+        calls.append(('PUT', route + '/add_role', None, {'role_id': 'missing'}))
+        results, errors = tet_module.run_batch(calls)
+
+        assert sorted(user['role_ids']) == sorted(to_add)
+        assert [(e['index'], e['code']) for e in errors] == [(len(calls) - 1, 422)]
+
+
+def load_sensors_inventory(api, tmp_path, **options):
+    ''' Parses a tetration_sensors inventory source pointed at the fake server '''
+    inventory_loader.add_directory(os.path.join(os.path.dirname(__file__), '..', 'plugins', 'inventory'))
+    config = dict(plugin='tetration_sensors', cache=True, cache_plugin='jsonfile',
+                  cache_connection=str(tmp_path / 'cache'), refresh_interval=0, **api.credentials())
+    config.update(options)
+    source = tmp_path / 'tetration_sensors.yml'
+    source.write_text(json.dumps(config))
+    return InventoryManager(loader=DataLoader(), sources=[str(source)])
+
+
+class TestSensorsInventory:
+    def test_hosts_are_grouped_by_scope_platform_type_and_annotations(self, fake_api, tmp_path):
+        inventory = load_sensors_inventory(fake_api, tmp_path)
+
+        assert len(inventory.hosts) == 2500
+        host = inventory.get_host('host-000001')
+        assert host.vars['ansible_host'] == '10.60.110.242'
+        assert host.vars['tetration_scopes'] == ['Default', 'Default:scope-4']
+        assert sorted(g.name for g in host.get_groups()) == [
+            'all', 'tetration_agent_SENSOR', 'tetration_annotation_tier_app',
+            'tetration_platform_Ubuntu_20_04', 'tetration_scope_Default', 'tetration_scope_Default_scope_4']
+        assert fake_api.count('GET', '/sensors') == 3
+
+    def test_scope_queries_are_evaluated_per_interface(self):
+        scopes = ScopeTree([
+            {'id': 'r', 'name': 'R', 'short_query': {'type': 'eq', 'field': 'vrf_id', 'value': 1}},
+            {'id': 'a', 'name': 'R:A', 'parent_app_scope_id': 'r',
+             'short_query': {'type': 'subnet', 'field': 'ip', 'value': '10.1.0.0/16'}},
+            {'id': 'b', 'name': 'R:A:B', 'parent_app_scope_id': 'a',
+             'short_query': {'type': 'and', 'filters': [
+                 {'type': 'eq', 'field': 'user_tier', 'value': 'web'},
+                 {'type': 'not', 'filter': {'type': 'contains', 'field': 'host_name', 'value': 'test'}}]}},
+            {'id': 'c', 'name': 'R:C', 'parent_app_scope_id': 'r',
+             'short_query': {'type': 'regex', 'field': 'host_name', 'value': '.*'}}])
+        sensor = {'host_name': 'web-1', 'user_annotations': {'tier': 'web'}, 'interfaces': [
+            {'ip': '192.168.0.1', 'vrf_id': 1}, {'ip': '10.1.2.3', 'vrf_id': 1}]}
+
+        assert scopes.memberships(interface_fields(sensor, 'user_annotations')) == ['R', 'R:A', 'R:A:B']
+        sensor['interfaces'][1]['vrf_id'] = 2
+        assert scopes.memberships(interface_fields(sensor, 'user_annotations')) == ['R']
+
+    def test_negated_unknown_filters_do_not_match(self):
+        fields = next(interface_fields({'host_name': 'web-1', 'interfaces': [{'ip': '10.1.2.3'}]}, 'user_annotations'))
+        unknown = {'type': 'not', 'filter': {'type': 'bogus'}}
+        missing = {'type': 'not', 'filter': {'type': 'eq', 'field': 'user_tier', 'value': 'web'}}
+        known = {'type': 'eq', 'field': 'host_name', 'value': 'web-1'}
+
+        assert not compile_query(unknown)(fields)
+        assert not compile_query(missing)(fields)
+        assert not compile_query({'type': 'and', 'filters': [known, unknown]})(fields)
+        assert compile_query({'type': 'or', 'filters': [known, unknown]})(fields)
+        # a known false filter decides `and`, a known true one decides `or`
+        assert compile_query({'type': 'not', 'filter': {'type': 'and', 'filters': [
+            {'type': 'eq', 'field': 'host_name', 'value': 'db-1'}, unknown]}})(fields)
+        assert not compile_query({'type': 'not', 'filter': {'type': 'or', 'filters': [known, unknown]}})(fields)
+
+    def test_refresh_only_rebuilds_changed_agents(self, fake_api, tmp_path, monkeypatch):
+        load_sensors_inventory(fake_api, tmp_path)
+        fake_api.tenant.update_sensor(1, platform='Ubuntu-22.04')
+        fake_api.tenant.deleted_sensors.add('%040x' % 3)
+        plugin_class = type(inventory_loader.get('tetration_sensors'))
+        built = []
+        build_host = plugin_class._build_host
+        monkeypatch.setattr(plugin_class, '_build_host', lambda self, sensor, scopes: built.append(
+            sensor['uuid']) or build_host(self, sensor, scopes))
+
+        inventory = load_sensors_inventory(fake_api, tmp_path)
+
+        assert built == ['%040x' % 2]
+        assert len(inventory.hosts) == 2499 and 'host-000002' not in inventory.hosts
+        assert 'tetration_platform_Ubuntu_22_04' in [g.name for g in inventory.get_host('host-000001').get_groups()]
+
+    def test_recent_cache_is_used_without_contacting_the_cluster(self, fake_api, tmp_path):
+        load_sensors_inventory(fake_api, tmp_path, refresh_interval=3600)
+        requests_sent = len(fake_api.requests_seen)
+
+        inventory = load_sensors_inventory(fake_api, tmp_path, refresh_interval=3600)
+
+        assert len(inventory.hosts) == 2500
+        assert len(fake_api.requests_seen) == requests_sent
+
+
+def id_lookup():
+    fragment_loader.add_directory(os.path.join(os.path.dirname(__file__), '..', 'plugins', 'doc_fragments'))
+    lookup_loader.add_directory(os.path.join(os.path.dirname(__file__), '..', 'plugins', 'lookup'))
+    return lookup_loader.get('tetration_id', loader=DataLoader(), templar=None)
+
+
+class TestIdLookup:
+    def test_lookups_are_answered_from_one_download(self, fake_api):
+        scopes = list(fake_api.tenant.collections['app_scopes'].values())
+
+        ids = [id_lookup().run([s['name']], kind='scope', provider=fake_api.credentials())[0] for s in scopes]
+        roles = id_lookup().run(['role-1', 'role-2'], kind='role', provider=fake_api.credentials())
+
+        assert ids == [s['id'] for s in scopes]
+        assert roles == [object_id('role', 1), object_id('role', 2)]
+        assert fake_api.count('GET', '/app_scopes') == 1 and fake_api.count('GET', '/roles') == 1
+
+    def test_refresh_rebuilds_the_index_only_when_the_collection_changed(self, fake_api):
+        provider = fake_api.credentials()
+        lookup = id_lookup()
+        lookup.run(['role-1'], kind='role', provider=provider)
+        module = sys.modules[type(lookup).__module__]
+        index = module.collections_for(provider).indexes['role']
+
+        lookup.run(['role-1'], kind='role', provider=provider, refresh=True)
+        assert module.collections_for(provider).indexes['role'] is index
+
+        fake_api.tenant.add('roles', {'id': 'new-role', 'name': 'role-new', 'app_scope_id': None})
+        assert lookup.run(['role-new'], kind='role', provider=provider, refresh=True) == ['new-role']
+        assert fake_api.count('GET', '/roles') == 3
+
+    def test_unknown_and_ambiguous_names(self, fake_api):
+        provider = fake_api.credentials()
+        role = fake_api.tenant.collections['roles'][object_id('role', 1)]
+        fake_api.tenant.add('roles', {'id': 'other', 'name': 'role-1', 'app_scope_id': 'elsewhere'})
+
+        with pytest.raises(AnsibleLookupError, match='names 2 objects'):
+            id_lookup().run(['role-1'], kind='role', provider=provider)
+        assert id_lookup().run(['role-1'], kind='role', provider=provider,
+                               app_scope_id=role['app_scope_id']) == [role['id']]
+        with pytest.raises(AnsibleLookupError, match='No user named'):
+            id_lookup().run(['nobody@example.com'], kind='user', provider=provider)
+        assert id_lookup().run(['nobody@example.com', 'user1@example.com'], kind='user', provider=provider,
+                               errors='ignore') == [None, object_id('user', 1)]
+
+
+class CapturingDisplay(object):
+    verbosity = 0
+
+    def __init__(self):
+        self.lines = []
+
+    def display(self, msg, **kwargs):
+        self.lines.append(msg)
+
+    def banner(self, msg, **kwargs):
+        self.lines.append(msg)
+
+    def warning(self, msg, **kwargs):
+        self.lines.append('WARNING: ' + msg)
+
+
+def task_result(action, metrics=None, items=None):
+    task = types.SimpleNamespace(action=action, get_name=lambda: 'task ' + action)
+    host = types.SimpleNamespace(get_name=lambda: 'localhost')
+    result = {'tetration_metrics': metrics} if metrics else {}
+    if items:
+        result['results'] = [{'tetration_metrics': m} for m in items]
+    return types.SimpleNamespace(_result=result, _task=task, _host=host)
+
+
+def api_call(route, latency, status=200, **fields):
+    call = dict(method='GET', route=route, status=status, latency_sec=latency, bytes_sent=0,
+                bytes_received=1024, retries=0, throttled=0, retry_sleep_sec=0.0)
+    call.update(fields)
+    return call
+
+
+class TestMetricsCallback:
+    def test_calls_are_summarized_per_route_and_written_to_the_timeline(self, tmp_path):
+        callback_loader.add_directory(os.path.join(os.path.dirname(__file__), '..', 'plugins', 'callback'))
+        display = CapturingDisplay()
+        callback = callback_loader.get('tetration_metrics', display=display)
+        timeline = tmp_path / 'timeline.ndjson'
+        callback.set_options(direct={'timeline_path': str(timeline), 'enable_module_metrics': False})
+
+        callback.v2_playbook_on_start(None)
+        callback.v2_playbook_on_play_start(types.SimpleNamespace(get_name=lambda: 'users'))
+        callback.v2_runner_on_ok(task_result('tetration_user', items=[
+            {'calls': [api_call('/users', 0.1), api_call('/users/{id}', 0.2, retries=2, throttled=2)]},
+            {'calls': [api_call('/users', 0.3)], 'calls_dropped': 0}]))
+        callback.v2_runner_on_failed(task_result('tetration_role', metrics={
+            'calls': [api_call('/roles', 1.0, status=500)]}))
+        callback.v2_runner_on_ok(task_result('debug'))
+        callback.v2_playbook_on_stats(None)
+
+        lines = [json.loads(line) for line in timeline.read_text().splitlines()]
+        assert [(c['module'], c['route']) for c in lines] == [
+            ('tetration_user', '/users'), ('tetration_user', '/users/{id}'),
+            ('tetration_user', '/users'), ('tetration_role', '/roles')]
+        assert lines[0]['play'] == 'users' and lines[0]['host'] == 'localhost'
+        rows = [line.split() for line in display.lines]
+        assert rows[2][:6] == ['GET', '/roles', '1', '1', '1000.0', '1000.0']
+        assert rows[3][:6] == ['GET', '/users', '2', '0', '100.0', '300.0']
+        assert rows[4][-2:] == ['2', '2']
+        assert ['tetration_user', '1', '3', '0.60', '0.00'] in rows
+
+
+ROLE_ITEM_SPEC = dict(
+    name=dict(type='str', required=True),
+    description=dict(type='str', default=''),
+    state=dict(type='str', choices=['present', 'query'], default='query'),
+    provider=dict(type='dict', options=tetration_constants.TETRATION_PROVIDER_SPEC)
+)
+
+
+def run_role_item(module, tet_module):
+    ''' Minimal module body: looks the role up and creates it when missing '''
+    role = tet_module.get_object(target=tetration_constants.TETRATION_API_ROLE, filter={'name': module.params['name']})
+    if role is None and module.params['state'] == 'present':
+        role = tet_module.run_method('POST', tetration_constants.TETRATION_API_ROLE, req_payload={
+            'name': module.params['name'], 'description': module.params['description']})
+        module.exit_json(changed=True, object=role)
+    if role is None:
+        module.fail_json(msg='No role %s' % module.params['name'])
+    module.exit_json(changed=False, object=role)
+
+
+def run_role_items(api, capsys, **args):
+    args['provider'] = dict(api.credentials(), concurrency=4)
+    set_module_args(args)
+    module = AnsibleModule(argument_spec=tetration.item_argument_spec(ROLE_ITEM_SPEC))
+    with pytest.raises(SystemExit):
+        tetration.TetrationApiModule(module).run_items(ROLE_ITEM_SPEC, run_role_item)
+    return json.loads(capsys.readouterr().out)
+
+
+class TestRunItems:
+    @pytest.fixture(autouse=True, params=['arg_spec', 'validation'])
+    def validator(self, request, monkeypatch):
+        # ansible before 2.11 has no ArgumentSpecValidator
+        if request.param == 'validation':
+            monkeypatch.setattr(tetration, 'ArgumentSpecValidator', None)
+        return request.param
+
+    @pytest.mark.parametrize('params, error_count', [
+        ({'ip_address': '10.0.0.1', 'state': 'query'}, 0),
+        ({'ip_address': '10.0.0.1', 'state': 'present', 'attributes': 'a=1', 'tags': 'x,y'}, 0),
+        ({'ip_address': '10.0.0.1', 'ip_subnet': '10.0.0.0/24', 'state': 'query'}, 1),
+        ({'ip_subnet': '10.0.0.0/24', 'state': 'present'}, 1),
+        ({'ip_address': '10.0.0.1', 'state': 'bogus'}, 1),
+        ({'state': 'absent', 'unknown': 1}, 2),
+    ])
+    def test_items_are_validated_like_ansible_does(self, params, error_count):
+        spec = dict(
+            attributes=dict(type='dict'),
+            ip_address=dict(type='str'),
+            ip_subnet=dict(type='str'),
+            state=dict(type='str', required=True, choices=['absent', 'present', 'query']),
+            tags=dict(type='list', elements='str', default=[]),
+        )
+        validator = tetration.ItemValidator(
+            spec,
+            required_one_of=[['ip_address', 'ip_subnet']],
+            mutually_exclusive=[['ip_address', 'ip_subnet']],
+            required_if=[['state', 'present', ['attributes']]])
+
+        validated, errors = validator.validate(params)
+
+        assert len(errors) == error_count, errors
+        if not errors:
+            assert validated['ip_subnet'] is None
+            assert validated['tags'] == (['x', 'y'] if 'tags' in params else [])
+            assert validated['attributes'] == ({'a': '1'} if 'attributes' in params else None)
+
+    def test_items_share_the_client_and_report_like_a_loop(self, fake_api, capsys):
+        items = [{'name': 'role-%d' % i} for i in range(6)] + [{'name': 'new-role', 'state': 'present'}, {}]
+
+        result = run_role_items(fake_api, capsys, description='set for every item', items=items)
+
+        assert result['failed'] and result['msg'] == 'One or more items failed' and result['changed']
+        assert [r['item'] for r in result['results']] == items
+        assert [r['changed'] for r in result['results']] == [False] * 6 + [True, False]
+        assert result['results'][6]['object']['description'] == 'set for every item'
+        assert result['results'][7]['msg'] == 'missing required arguments: name'
+        assert fake_api.count('POST', '/roles') == 1
+        # one read of /roles before the write, at most one per worker after it
+        assert fake_api.count('GET', '/roles') <= 1 + 4
+
+    def test_item_failures_do_not_stop_the_other_items(self, fake_api, capsys):
+        result = run_role_items(fake_api, capsys, items=[{'name': 'missing'}, {'name': 'role-1'}])
+
+        assert [r.get('failed', False) for r in result['results']] == [True, False]
+        assert result['results'][0]['msg'] == 'No role missing'
+        assert result['results'][1]['object']['name'] == 'role-1'
+
+    def test_without_items_the_task_arguments_are_the_only_item(self, fake_api, capsys):
+        result = run_role_items(fake_api, capsys, name='role-2')
+
+        assert 'results' not in result and result['object']['name'] == 'role-2'
+        result = run_role_items(fake_api, capsys, state='present')
+        assert result['failed'] and result['msg'] == 'missing required arguments: name'
+
+
+def run_ansible_module(api, module_name, args, check=False):
+    ''' Runs a module of library/ and its action plugin through ansible against the fake server '''
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ,
+               ANSIBLE_LIBRARY=os.path.join(root, 'library'),
+               ANSIBLE_MODULE_UTILS=os.path.join(root, 'module_utils'),
+               ANSIBLE_ACTION_PLUGINS=os.path.join(root, 'plugins', 'action'),
+               ANSIBLE_PYTHON_INTERPRETER=sys.executable,
+               ANSIBLE_STDOUT_CALLBACK='minimal')
+    args = dict(args, provider=api.credentials())
+    command = [sys.executable, '-m', 'ansible', 'adhoc', 'localhost', '-c', 'local', '-i', 'localhost,',
+               '-m', module_name, '-a', json.dumps(args)] + (['--check'] if check else [])
+    process = subprocess.run(command, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                             stderr=subprocess.PIPE, universal_newlines=True)
+    assert ' => ' in process.stdout, process.stderr
+    status, output = process.stdout.split(' => ', 1)
+    result = json.loads(output)
+    # the minimal callback shows the failure in the status instead of the result
+    result.setdefault('failed', 'FAILED' in status)
+    return result
+
+
+def run_users_module(api, users, check=False, **args):
+    return run_ansible_module(api, 'tetration_users', dict(args, users=users), check=check)
+
+
+def writes_seen(api):
+    return [seen for seen in api.requests_seen if seen[0] != 'GET']
+
+
+class TestUsersModule:
+    def test_new_users_are_created_with_their_roles(self, fake_api):
+        users = [{'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User',
+                  'app_scope_name': 'default', 'role_names': ['role-1', 'role-2']}]
+
+        result = run_users_module(fake_api, users, check=True)
+        assert result['changed'] and result['created'] == ['new@example.com']
+        assert writes_seen(fake_api) == []
+
+        result = run_users_module(fake_api, users)
+        assert result['changed'] and result['created'] == ['new@example.com']
+        user = [u for u in fake_api.tenant.collections['users'].values() if u['email'] == 'new@example.com'][0]
+        assert sorted(user['role_ids']) == [object_id('role', 1), object_id('role', 2)]
+        assert user['app_scope_id'] == object_id('scope', 0)
+        assert writes_seen(fake_api) == [('POST', '/users', 200)]
+
+    def test_disabled_users_are_enabled_before_they_are_updated(self, fake_api):
+        result = run_users_module(fake_api, [{'email': 'user1@example.com', 'state': 'absent'}])
+        assert result['disabled'] == ['user1@example.com']
+        assert fake_api.tenant.collections['users'][object_id('user', 1)]['disabled_at']
+
+        seen = len(writes_seen(fake_api))
+        result = run_users_module(fake_api, [
+            {'email': 'user1@example.com', 'first_name': 'Renamed', 'role_ids': [object_id('role', 0)]}])
+
+        assert result['enabled'] == ['user1@example.com'] and result['updated'] == ['user1@example.com']
+        user = fake_api.tenant.collections['users'][object_id('user', 1)]
+        assert user['disabled_at'] is None and user['first_name'] == 'Renamed'
+        routes = [route for _, route, _ in writes_seen(fake_api)[seen:]]
+        assert routes[0] == '/users/{id}/enable' and '/users/{id}' in routes[1:]
+
+    def test_roles_are_reconciled_exactly_when_listed(self, fake_api):
+        users = fake_api.tenant.collections['users']
+        current = set(users[object_id('user', 2)]['role_ids'])
+        untouched = list(users[object_id('user', 3)]['role_ids'])
+        desired = set([object_id('role', 0), object_id('role', 5)])
+
+        result = run_users_module(fake_api, [
+            {'email': 'user2@example.com', 'role_ids': sorted(desired)},
+            {'email': 'user3@example.com', 'last_name': 'Kept'}])
+
+        assert result['roles_added'].get('user2@example.com', []) == sorted(desired - current)
+        assert result['roles_removed'].get('user2@example.com', []) == sorted(current - desired)
+        assert 'user3@example.com' not in result['roles_removed']
+        assert set(users[object_id('user', 2)]['role_ids']) == desired
+        assert users[object_id('user', 3)]['role_ids'] == untouched
+        # the role changes of one user are sent one after another, removals first
+        role_writes = [seen[0] for seen in writes_seen(fake_api) if seen[1].endswith('_role')]
+        assert role_writes == ['DELETE'] * len(current - desired) + ['PUT'] * len(desired - current)
+
+    def test_a_second_run_changes_nothing(self, fake_api):
+        users = [
+            {'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User', 'role_names': ['role-3']},
+            {'email': 'user0@example.com', 'last_name': 'Renamed', 'role_ids': []},
+            {'email': 'user4@example.com', 'state': 'absent'}]
+        assert run_users_module(fake_api, users, purge=True)['changed']
+        writes = len(writes_seen(fake_api))
+
+        result = run_users_module(fake_api, users, purge=True)
+
+        assert not result['changed']
+        assert len(writes_seen(fake_api)) == writes
+        assert fake_api.count('GET', '/users') == 2
+
+    def test_failed_changes_do_not_hide_the_successful_ones(self, fake_api):
+        users = fake_api.tenant.collections['users']
+        current = users[object_id('user', 0)]['role_ids']
+        to_add = sorted(set(fake_api.tenant.collections['roles']) - set(current))[:2]
+        users[object_id('user', 1)]['disabled_at'] = 1
+        fake_api.rejections = [('PUT', '/users/{id}/add_role', {'role_id': to_add[0]}),
+                               ('POST', '/users/{id}/enable', {})]
+
+        result = run_users_module(fake_api, [
+            {'email': 'user0@example.com', 'role_ids': current + to_add},
+            {'email': 'user1@example.com', 'last_name': 'Renamed'},
+            {'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User'}])
+
+        assert result['failed'] and result['changed']
+        assert result['msg'] == '3 of 5 changes failed'
+        assert result['created'] == ['new@example.com']
+        assert result['roles_added'] == {'user0@example.com': [to_add[1]]}
+        assert [(e['email'], e['change'], e['code']) for e in result['errors']] == [
+            ('user1@example.com', 'enable', 422),
+            ('user0@example.com', 'add_role', 422),
+            ('user1@example.com', 'update', None)]
+        assert users[object_id('user', 1)]['last_name'] == 'Last1'
+
+
+class TestItemsAction:
+    def test_plain_items_are_sent_to_one_module_run(self, fake_api):
+        emails = ['user1@example.com', 'user2@example.com']
+
+        result = run_ansible_module(fake_api, 'tetration_user', dict(items=emails, state='query'))
+
+        assert not result['failed']
+        assert [r['item'] for r in result['results']] == emails
+        assert [r['object']['email'] for r in result['results']] == emails
+        assert all(r['ansible_loop_var'] == 'item' for r in result['results'])
+
+
+class TestUserModule:
+    def test_roles_of_a_user_are_removed_then_added_one_at_a_time(self, fake_api):
+        user = fake_api.tenant.collections['users'][object_id('user', 0)]
+        current = set(user['role_ids'])
+        desired = sorted(set(fake_api.tenant.collections['roles']) - current)[:2]
+
+        result = run_ansible_module(fake_api, 'tetration_user', dict(
+            email='user0@example.com', state='present', role_ids=desired))
+
+        assert result['changed'] and sorted(result['object']['role_ids']) == desired
+        assert sorted(user['role_ids']) == desired
+        role_writes = [seen[:2] for seen in writes_seen(fake_api) if seen[1].endswith('_role')]
+        assert [method for method, _ in role_writes] == ['DELETE'] * len(current) + ['PUT'] * 2